@@ -0,0 +1,407 @@
+"""
+Local brand -> parent company registry
+
+Resolves brands to their parent companies (and remembers the analysis
+keywords/materials generated per company and product category) without an
+LLM call. The registry is seeded with well-known parent companies and the
+catalog's brands, and every new LLM resolution is written through to
+SQLite so it is only paid for once.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+from fuzzywuzzy import fuzz, process
+
+try:
+    from rapidfuzz import fuzz as rapid_fuzz
+    from rapidfuzz import process as rapid_process
+except ImportError:
+    rapid_fuzz = None
+    rapid_process = None
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from cache_store import CACHE_DIR
+
+# Minimum fuzzy score (0-100) for an unseen spelling to match a registered brand
+BRAND_MATCH_THRESHOLD = int(os.getenv('BRAND_MATCH_THRESHOLD', 90))
+
+# How long generated analysis keywords/materials are reused (seconds)
+ANALYSIS_PARAMS_TTL = float(os.getenv('ANALYSIS_PARAMS_TTL', 30 * 24 * 3600))
+
+# How long a parent company answered by the LLM is trusted before asking again (seconds)
+LLM_COMPANY_TTL = float(os.getenv('LLM_COMPANY_TTL', 30 * 24 * 3600))
+
+# Words dropped when normalising brand and company names
+LEGAL_SUFFIXES = {
+    "ltd", "limited", "pvt", "private", "inc", "incorporated", "corp", "corporation",
+    "co", "company", "llc", "plc", "gmbh", "ag", "sa",
+}
+
+# Parent companies of common brands, used when the catalog doesn't name the owner
+KNOWN_PARENT_COMPANIES = {
+    "Dove": "Unilever",
+    "Vaseline": "Unilever",
+    "Lakme": "Hindustan Unilever",
+    "Pond's": "Hindustan Unilever",
+    "Lux": "Hindustan Unilever",
+    "Lifebuoy": "Hindustan Unilever",
+    "Sunsilk": "Hindustan Unilever",
+    "Clinic Plus": "Hindustan Unilever",
+    "Glow & Lovely": "Hindustan Unilever",
+    "Pears": "Hindustan Unilever",
+    "Pantene": "Procter & Gamble",
+    "Head & Shoulders": "Procter & Gamble",
+    "Olay": "Procter & Gamble",
+    "Gillette": "Procter & Gamble",
+    "Nivea": "Beiersdorf",
+    "Garnier": "L'Oreal",
+    "Maybelline": "L'Oreal",
+    "L'Oreal Paris": "L'Oreal",
+    "Neutrogena": "Kenvue",
+    "Johnson's": "Kenvue",
+    "Clean & Clear": "Kenvue",
+    "Colgate": "Colgate-Palmolive",
+    "Palmolive": "Colgate-Palmolive",
+    "Cetaphil": "Galderma",
+    "Himalaya": "Himalaya Wellness",
+    "Mamaearth": "Honasa Consumer",
+    "The Derma Co": "Honasa Consumer",
+    "Patanjali": "Patanjali Ayurved",
+    "Dabur": "Dabur India",
+    "Vatika": "Dabur India",
+    "Parachute": "Marico",
+    "Set Wet": "Marico",
+    "Cinthol": "Godrej Consumer Products",
+    "Godrej No.1": "Godrej Consumer Products",
+    "Santoor": "Wipro Consumer Care",
+    "Boroplus": "Emami",
+    "Navratna": "Emami",
+    "Biotique": "Bio Veda Action Research",
+    "Lotus Herbals": "Lotus Herbals",
+}
+
+
+def normalize_brand(name: str) -> str:
+    """
+    Canonical form of a brand or company name for lookups
+
+    Lowercases, strips accents and punctuation, spells out '&' and drops
+    legal suffixes, so "L'Oréal Paris Pvt. Ltd." and "loreal paris" match.
+    """
+    text = unicodedata.normalize('NFKD', str(name or '')).encode('ascii', 'ignore').decode('ascii')
+    text = text.lower().replace('&', ' and ')
+    text = re.sub(r"['’`.]", '', text)
+    words = re.sub(r'[^a-z0-9]+', ' ', text).split()
+    while len(words) > 1 and words[-1] in LEGAL_SUFFIXES:
+        words.pop()
+    return ' '.join(words)
+
+
+class BrandRegistry:
+    """
+    Brand -> parent company table, plus analysis parameters per company
+    and product category.
+
+    Brand entries are held in memory for lookups and persisted to SQLite on
+    every write. Exact normalised names resolve with a dict lookup; other
+    spellings are fuzzy matched once and the match is remembered. Writes
+    always go to the exact normalised name, never to a fuzzy match.
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Open (or create) the registry and load it into memory
+
+        Args:
+            db_path: Path to the SQLite file
+        """
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict] = {}
+        self._aliases: Dict[str, Optional[str]] = {}
+        self._categories: Dict[str, str] = {}
+        self._stats = {'hits': 0, 'fuzzy_hits': 0, 'misses': 0, 'writes': 0,
+                       'params_hits': 0, 'params_misses': 0}
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS brands (
+                key TEXT PRIMARY KEY,
+                brand TEXT NOT NULL,
+                company TEXT,
+                category TEXT,
+                source TEXT,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS analysis_params (
+                company_key TEXT NOT NULL,
+                category_key TEXT NOT NULL,
+                keywords TEXT NOT NULL,
+                materials TEXT NOT NULL,
+                product_context TEXT,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (company_key, category_key)
+            )
+        """)
+        self._conn.commit()
+        for key, brand, company, category, source, updated_at in self._conn.execute(
+            "SELECT key, brand, company, category, source, updated_at FROM brands"
+        ):
+            self._entries[key] = {
+                'brand': brand,
+                'company': company,
+                'category': category,
+                'source': source,
+                'updated_at': updated_at,
+            }
+            if category:
+                self._categories[normalize_brand(category)] = category
+        self._seed_known_parents()
+
+    def _write(self, key: str, entry: Dict):
+        """Store an entry in memory and SQLite (caller holds the lock)"""
+        entry['updated_at'] = time.time()
+        self._entries[key] = entry
+        if entry['category']:
+            self._categories[normalize_brand(entry['category'])] = entry['category']
+        self._conn.execute(
+            "INSERT OR REPLACE INTO brands (key, brand, company, category, source, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (key, entry['brand'], entry['company'], entry['category'], entry['source'], entry['updated_at'])
+        )
+        self._stats['writes'] += 1
+
+    def _new_entry(self, brand: str) -> Dict:
+        return {'brand': brand, 'company': None, 'category': None, 'source': None, 'updated_at': None}
+
+    def _seed_known_parents(self):
+        """Add built-in parent companies for brands that have no company yet"""
+        with self._lock:
+            for brand, company in KNOWN_PARENT_COMPANIES.items():
+                key = normalize_brand(brand)
+                entry = self._entries.get(key)
+                if entry is None or not entry['company']:
+                    entry = dict(entry or self._new_entry(brand))
+                    entry.update(company=company, source='builtin')
+                    self._write(key, entry)
+            self._conn.commit()
+            self._aliases.clear()
+
+    def seed_from_catalog(self, csv_file_path: str) -> int:
+        """
+        Register every brand in the catalog CSV (with its most common category)
+
+        Brands already in the registry keep their company. All catalog
+        categories become known to product_category().
+
+        Args:
+            csv_file_path: Path to the catalog (merged_dataset.csv)
+
+        Returns:
+            Number of catalog brands
+        """
+        df = pd.read_csv(csv_file_path, usecols=lambda col: col.lower() in ('brand', 'category'), dtype=str)
+        df.columns = [col.lower() for col in df.columns]
+        if 'brand' not in df.columns:
+            return 0
+        df = df.dropna(subset=['brand'])
+        if 'category' not in df.columns:
+            df['category'] = None
+
+        brands = {}
+        with self._lock:
+            for category in df['category'].dropna().unique():
+                self._categories[normalize_brand(category)] = str(category).strip()
+        for brand, group in df.groupby('brand'):
+            categories = group['category'].dropna()
+            brands[brand.strip()] = categories.mode().iloc[0] if not categories.empty else None
+
+        with self._lock:
+            for brand, category in brands.items():
+                key = normalize_brand(brand)
+                if not key:
+                    continue
+                entry = self._entries.get(key)
+                if entry is None:
+                    entry = self._new_entry(brand)
+                    entry.update(category=category, source='catalog')
+                    self._write(key, entry)
+                elif not entry['category'] and category:
+                    self._write(key, dict(entry, category=category))
+            self._conn.commit()
+            self._aliases.clear()
+        return len(brands)
+
+    def _match_key(self, name: str) -> Optional[str]:
+        """Registered key for a name (exact, then fuzzy), or None (caller holds the lock)"""
+        key = normalize_brand(name)
+        if not key:
+            return None
+        if key in self._entries:
+            self._stats['hits'] += 1
+            return key
+        if key in self._aliases:
+            alias = self._aliases[key]
+            self._stats['fuzzy_hits' if alias else 'misses'] += 1
+            return alias
+
+        # Whole-name similarity only: a registered brand as the leading word ("Lux" in
+        # "Lux Cozi") is not evidence enough that it's the same brand
+        match = None
+        choices = list(self._entries)
+        if choices:
+            if rapid_process is not None:
+                found = rapid_process.extractOne(key, choices, scorer=rapid_fuzz.ratio,
+                                                 score_cutoff=BRAND_MATCH_THRESHOLD)
+            else:
+                found = process.extractOne(key, choices, scorer=fuzz.ratio,
+                                           score_cutoff=BRAND_MATCH_THRESHOLD)
+            match = found[0] if found else None
+        self._aliases[key] = match
+        self._stats['fuzzy_hits' if match else 'misses'] += 1
+        return match
+
+    def lookup(self, brand: str) -> Optional[Dict]:
+        """
+        Registry entry for a brand
+
+        Args:
+            brand: Brand name in any spelling
+
+        Returns:
+            Copy of the entry (brand, company, category, source, updated_at) or None
+        """
+        with self._lock:
+            key = self._match_key(brand)
+            return dict(self._entries[key]) if key else None
+
+    def resolve_company(self, brand: str) -> Optional[str]:
+        """
+        Parent company of a brand, or None if it hasn't been resolved yet
+
+        Companies answered by the LLM count as unresolved once they are older
+        than LLM_COMPANY_TTL, so a wrong answer is eventually asked again.
+        """
+        entry = self.lookup(brand)
+        if not entry:
+            return None
+        if entry['source'] == 'llm' and time.time() - (entry['updated_at'] or 0) > LLM_COMPANY_TTL:
+            return None
+        return entry['company']
+
+    def product_category(self, product_name: str) -> Optional[str]:
+        """
+        Catalog category named in a product name ("Patanjali Kesh Kanti Shampoo" -> "Shampoo")
+
+        Args:
+            product_name: Product name
+
+        Returns:
+            The longest catalog category whose words appear in the name, or None
+        """
+        words = normalize_brand(product_name).split()
+        padded = f" {' '.join(words)} "
+        with self._lock:
+            matches = [category for key, category in self._categories.items()
+                       if key and f" {key} " in padded]
+        return max(matches, key=len) if matches else None
+
+    def analysis_params(self, company: str, category: str) -> Optional[Tuple[List[str], List[str], Optional[str]]]:
+        """
+        Stored analysis parameters for a company's products in a category
+
+        Args:
+            company: Company name
+            category: Product category (see product_category)
+
+        Returns:
+            (keywords, materials, product_context), or None if missing or older than ANALYSIS_PARAMS_TTL
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT keywords, materials, product_context FROM analysis_params "
+                "WHERE company_key = ? AND category_key = ? AND updated_at > ?",
+                (normalize_brand(company), normalize_brand(category), time.time() - ANALYSIS_PARAMS_TTL)
+            ).fetchone()
+            self._stats['params_hits' if row else 'params_misses'] += 1
+        if row is None:
+            return None
+        return json.loads(row[0]), json.loads(row[1]), row[2]
+
+    def _update(self, brand: str, **fields):
+        """Write fields onto the entry for exactly this brand name, creating it if needed"""
+        with self._lock:
+            key = normalize_brand(brand)
+            if not key:
+                return
+            entry = dict(self._entries.get(key) or self._new_entry(brand))
+            entry.update(fields)
+            self._write(key, entry)
+            self._conn.commit()
+            # A new key can change which spelling a fuzzy alias should map to
+            self._aliases = {alias: target for alias, target in self._aliases.items() if target}
+
+    def record_company(self, brand: str, company: str, source: str = 'llm'):
+        """Remember a brand's parent company"""
+        if company and company.strip():
+            self._update(brand, company=company.strip(), source=source)
+
+    def record_analysis_params(self, company: str, category: str, keywords: List[str],
+                               materials: List[str], product_context: Optional[str] = None):
+        """Remember generated analysis parameters for a company's products in a category"""
+        if not (keywords and materials and normalize_brand(company) and normalize_brand(category)):
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO analysis_params "
+                "(company_key, category_key, keywords, materials, product_context, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (normalize_brand(company), normalize_brand(category), json.dumps(list(keywords)),
+                 json.dumps(list(materials)), product_context, time.time())
+            )
+            self._conn.commit()
+            self._stats['writes'] += 1
+
+    def get_stats(self) -> Dict:
+        """Lookup counters and registry size"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['brands'] = len(self._entries)
+            stats['resolved'] = sum(1 for entry in self._entries.values() if entry['company'])
+            stats['categories'] = len(self._categories)
+            stats['analysis_params'] = self._conn.execute("SELECT COUNT(*) FROM analysis_params").fetchone()[0]
+        return stats
+
+
+_brand_registry: Optional[BrandRegistry] = None
+_brand_registry_lock = threading.Lock()
+
+
+def get_brand_registry() -> BrandRegistry:
+    """Process-wide BrandRegistry"""
+    global _brand_registry
+    with _brand_registry_lock:
+        if _brand_registry is None:
+            _brand_registry = BrandRegistry(os.path.join(CACHE_DIR, 'brand_registry.sqlite3'))
+        return _brand_registry
+
+
+def seed_brand_registry(csv_file_path: str) -> int:
+    """Seed the shared BrandRegistry from the catalog CSV (see BrandRegistry.seed_from_catalog)"""
+    return get_brand_registry().seed_from_catalog(csv_file_path)
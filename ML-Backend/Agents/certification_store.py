@@ -0,0 +1,196 @@
+"""
+Local certification evidence store
+
+Records the outcome of every (company, material) certification check,
+verified or not found, with its sources, credibility and time, so repeat
+analyses reuse it until it goes stale instead of searching the web again.
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from cache_store import CACHE_DIR, normalize_cache_key
+from Agents.brand_registry import normalize_brand
+
+# How long stored outcomes are trusted (seconds): verified certifications with
+# High/Medium credibility, low-credibility ones, and "not found" results
+CERT_VERIFIED_TTL = float(os.getenv('CERT_VERIFIED_TTL', 90 * 24 * 3600))
+CERT_LOW_CREDIBILITY_TTL = float(os.getenv('CERT_LOW_CREDIBILITY_TTL', 30 * 24 * 3600))
+CERT_NOT_FOUND_TTL = float(os.getenv('CERT_NOT_FOUND_TTL', 14 * 24 * 3600))
+
+# Search results kept as sources per outcome
+MAX_SOURCES = 5
+
+
+def certification_ttl(found: bool, credibility: str) -> float:
+    """Freshness window for an outcome under the store's policy"""
+    if not found:
+        return CERT_NOT_FOUND_TTL
+    if str(credibility).strip().lower() in ('high', 'medium'):
+        return CERT_VERIFIED_TTL
+    return CERT_LOW_CREDIBILITY_TTL
+
+
+class CertificationStore:
+    """
+    SQLite knowledge base of certification check outcomes.
+
+    Each (company, material) pair keeps its latest outcome. Outcomes are
+    served while fresh (see certification_ttl); expired ones stay stored as
+    history and are replaced by the next live check.
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Open (or create) the store
+
+        Args:
+            db_path: Path to the SQLite file
+        """
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._stats = {'fresh_hits': 0, 'expired': 0, 'misses': 0, 'records': 0}
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS certifications (
+                company_key TEXT NOT NULL,
+                material_key TEXT NOT NULL,
+                company TEXT NOT NULL,
+                material TEXT NOT NULL,
+                found INTEGER NOT NULL,
+                certification TEXT,
+                credibility TEXT,
+                summary TEXT,
+                sources TEXT,
+                checked_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (company_key, material_key)
+            )
+        """)
+        self._conn.commit()
+
+    @staticmethod
+    def _keys(company_name: str, material: str):
+        return normalize_brand(company_name), normalize_cache_key(material)
+
+    @staticmethod
+    def _row_to_outcome(row) -> Dict:
+        company, material, found, certification, credibility, summary, sources, checked_at, expires_at = row
+        return {
+            'company': company,
+            'material': material,
+            'found': bool(found),
+            'certification': certification,
+            'credibility': credibility,
+            'summary': summary,
+            'sources': json.loads(sources) if sources else [],
+            'checked_at': checked_at,
+            'expires_at': expires_at,
+        }
+
+    def get_fresh(self, company_name: str, material: str) -> Optional[Dict]:
+        """
+        Stored outcome for a pair if it is still fresh
+
+        Args:
+            company_name: Company or brand name
+            material: Material or practice checked
+
+        Returns:
+            Outcome dict (found, certification, credibility, summary, sources,
+            checked_at, expires_at) or None if missing or expired
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT company, material, found, certification, credibility, summary, sources, "
+                "checked_at, expires_at FROM certifications WHERE company_key = ? AND material_key = ?",
+                self._keys(company_name, material)
+            ).fetchone()
+            if row is None:
+                self._stats['misses'] += 1
+                return None
+            if row[-1] <= time.time():
+                self._stats['expired'] += 1
+                return None
+            self._stats['fresh_hits'] += 1
+        return self._row_to_outcome(row)
+
+    def record(self, company_name: str, material: str, analysis: Dict, search_results: List[Dict]):
+        """
+        Store the outcome of a live certification check
+
+        Args:
+            company_name: Company or brand name
+            material: Material or practice checked
+            analysis: Certification analysis dict (found, certification, credibility, summary)
+            search_results: Search results the analysis was based on
+        """
+        found = bool(analysis.get('found'))
+        credibility = analysis.get('credibility', 'Low')
+        sources = [
+            {'title': result.get('title', ''), 'url': result.get('url', '')}
+            for result in search_results[:MAX_SOURCES] if result.get('url')
+        ]
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO certifications (company_key, material_key, company, material, found, "
+                "certification, credibility, summary, sources, checked_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (*self._keys(company_name, material), company_name, material, int(found),
+                 str(analysis.get('certification', 'None Found')), str(credibility),
+                 str(analysis.get('summary', '')), json.dumps(sources),
+                 now, now + certification_ttl(found, credibility))
+            )
+            self._conn.commit()
+            self._stats['records'] += 1
+
+    def company_outcomes(self, company_name: str, include_expired: bool = False) -> List[Dict]:
+        """All stored outcomes for a company, newest first"""
+        query = (
+            "SELECT company, material, found, certification, credibility, summary, sources, "
+            "checked_at, expires_at FROM certifications WHERE company_key = ?"
+        )
+        params = [normalize_brand(company_name)]
+        if not include_expired:
+            query += " AND expires_at > ?"
+            params.append(time.time())
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY checked_at DESC", params).fetchall()
+        return [self._row_to_outcome(row) for row in rows]
+
+    def get_stats(self) -> Dict:
+        """Lookup counters and stored outcome counts"""
+        now = time.time()
+        with self._lock:
+            stats = dict(self._stats)
+            stats['stored'], stats['fresh'], stats['verified'] = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(expires_at > ?), 0), COALESCE(SUM(found), 0) FROM certifications",
+                (now,)
+            ).fetchone()
+        return stats
+
+
+_certification_store: Optional[CertificationStore] = None
+_certification_store_lock = threading.Lock()
+
+
+def get_certification_store() -> CertificationStore:
+    """Process-wide CertificationStore"""
+    global _certification_store
+    with _certification_store_lock:
+        if _certification_store is None:
+            _certification_store = CertificationStore(os.path.join(CACHE_DIR, 'certifications.sqlite3'))
+        return _certification_store
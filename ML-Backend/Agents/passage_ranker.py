@@ -0,0 +1,206 @@
+"""
+Local passage ranking for LLM prompts
+
+Splits article text into passages, scores them against the company and
+keyword queries with BM25, and keeps only the best passages within a token
+budget so prompts carry relevant text instead of whole pages.
+"""
+
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Sequence, Tuple
+
+# Words per passage when chunking article text
+PASSAGE_WORDS = 60
+# Characters of each article read for chunking (raw page text can be very long)
+MAX_ARTICLE_CHARS = 20000
+# Passages kept per article at most
+MAX_PASSAGES_PER_ARTICLE = 3
+# Rough characters per token, used to size passages against the budget
+CHARS_PER_TOKEN = 4
+
+# BM25 parameters
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this "
+    "to was were will with we our their they he she you your not but".split()
+)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stopwords"""
+    return [token for token in _TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate LLM token count of a text"""
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def chunk_text(text: str, max_words: int = PASSAGE_WORDS) -> List[str]:
+    """
+    Split text into passages of whole sentences, about max_words long
+
+    Args:
+        text: Article text
+        max_words: Target passage length in words
+
+    Returns:
+        Passages in document order
+    """
+    passages = []
+    current: List[str] = []
+    for sentence in _SENTENCE_RE.split(text[:MAX_ARTICLE_CHARS]):
+        words = sentence.split()
+        if not words:
+            continue
+        # Very long "sentences" (tables, lists without punctuation) are cut into windows
+        while len(words) > max_words:
+            if current:
+                passages.append(" ".join(current))
+                current = []
+            passages.append(" ".join(words[:max_words]))
+            words = words[max_words:]
+        if current and len(current) + len(words) > max_words:
+            passages.append(" ".join(current))
+            current = []
+        current.extend(words)
+    if current:
+        passages.append(" ".join(current))
+    return passages
+
+
+class BM25:
+    """
+    Okapi BM25 scorer over a fixed set of passages
+    """
+
+    def __init__(self, passages: Sequence[str], k1: float = BM25_K1, b: float = BM25_B):
+        self.k1 = k1
+        self.b = b
+        self.term_counts = [Counter(tokenize(passage)) for passage in passages]
+        self.lengths = [sum(counts.values()) for counts in self.term_counts]
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+        document_frequency = Counter()
+        for counts in self.term_counts:
+            document_frequency.update(counts.keys())
+        total = len(self.term_counts)
+        self.idf = {
+            term: math.log(1 + (total - freq + 0.5) / (freq + 0.5))
+            for term, freq in document_frequency.items()
+        }
+
+    def score(self, query_terms: Sequence[str], index: int) -> float:
+        """BM25 score of one passage for the query terms"""
+        counts = self.term_counts[index]
+        length_norm = 1 - self.b + self.b * (self.lengths[index] / self.avg_length if self.avg_length else 0.0)
+        score = 0.0
+        for term in query_terms:
+            frequency = counts.get(term)
+            if frequency:
+                score += self.idf[term] * frequency * (self.k1 + 1) / (frequency + self.k1 * length_norm)
+        return score
+
+    def scores(self, query_terms: Sequence[str]) -> List[float]:
+        """BM25 scores of every passage for the query terms"""
+        return [self.score(query_terms, index) for index in range(len(self.term_counts))]
+
+
+def article_text(article: Dict) -> str:
+    """Best available text of a search result (full page text, then snippet)"""
+    return article.get("raw_content") or article.get("content") or article.get("snippet") or ""
+
+
+def rank_article_passages(articles: List[Dict], queries: List[str], token_budget: int,
+                          max_per_article: int = MAX_PASSAGES_PER_ARTICLE) -> List[List[str]]:
+    """
+    Choose the most relevant passages of each article within a token budget
+
+    Every article first gets its best-scoring passage (its lead passage when
+    nothing matches), then the remaining budget goes to the highest-scoring
+    matching passages overall, up to max_per_article per article.
+
+    Args:
+        articles: Search results
+        queries: Query strings (company name, keywords)
+        token_budget: Approximate tokens allowed across all selected passages
+        max_per_article: Passages kept per article at most
+
+    Returns:
+        Selected passages per article, in document order
+    """
+    chunks: List[Tuple[int, int, str]] = []
+    for article_index, article in enumerate(articles):
+        for position, passage in enumerate(chunk_text(article_text(article))):
+            chunks.append((article_index, position, passage))
+    if not chunks:
+        return [[] for _ in articles]
+
+    query_terms = list(dict.fromkeys(tokenize(" ".join(queries))))
+    scores = BM25([passage for _, _, passage in chunks]).scores(query_terms)
+    ranked = sorted(range(len(chunks)), key=lambda i: (-scores[i], chunks[i][0], chunks[i][1]))
+
+    selected = set()
+    per_article = Counter()
+    remaining = token_budget
+
+    def take(chunk_index: int) -> bool:
+        nonlocal remaining
+        article_index, _, passage = chunks[chunk_index]
+        cost = estimate_tokens(passage)
+        if chunk_index in selected or per_article[article_index] >= max_per_article or cost > remaining:
+            return False
+        selected.add(chunk_index)
+        per_article[article_index] += 1
+        remaining -= cost
+        return True
+
+    # One passage per article first so no source disappears entirely
+    seen_articles = set()
+    for chunk_index in ranked:
+        article_index = chunks[chunk_index][0]
+        if article_index not in seen_articles and take(chunk_index):
+            seen_articles.add(article_index)
+    # Then the best matching passages overall; passages matching no query term aren't worth the tokens
+    for chunk_index in ranked:
+        if remaining <= 0 or scores[chunk_index] <= 0:
+            break
+        take(chunk_index)
+
+    passages: List[List[str]] = [[] for _ in articles]
+    for chunk_index in sorted(selected, key=lambda i: (chunks[i][0], chunks[i][1])):
+        article_index, _, passage = chunks[chunk_index]
+        passages[article_index].append(passage)
+    return passages
+
+
+def condense_articles(articles: List[Dict], queries: List[str], token_budget: int) -> List[Dict]:
+    """
+    Replace each article's content with its most relevant passages
+
+    Args:
+        articles: Search results with raw_content and/or content
+        queries: Query strings (company name, keywords)
+        token_budget: Approximate tokens allowed across all articles' content
+
+    Returns:
+        Copies of the articles with "content" set to the selected passages
+        (joined by " ... "), "snippet" holding the search engine's original
+        snippet and "raw_content" removed. Articles left without a passage
+        once the budget runs out keep their snippet as content.
+    """
+    passages = rank_article_passages(articles, queries, token_budget)
+    condensed = []
+    for article, selected in zip(articles, passages):
+        snippet = article.get("snippet") or article.get("content") or ""
+        article = {key: value for key, value in article.items() if key != "raw_content"}
+        article["snippet"] = snippet
+        article["content"] = " ... ".join(selected) if selected else snippet
+        condensed.append(article)
+    return condensed
@@ -4,18 +4,82 @@ Sustainability Intelligence Agent System with Groq and Tavily
 Enhanced with LCA Result Integration for automatic company analysis
 """
 
+import asyncio
+import hashlib
 import json
+import threading
 import re
 import requests
 import os
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeout
 from datetime import datetime
-from typing import List, Dict, Any, Tuple, Optional
+from typing import List, Dict, Any, Tuple, Optional, Callable, Union
 from dataclasses import dataclass, asdict
+from types import SimpleNamespace
 import time
 from dotenv import load_dotenv
 
+# Ensure shared ML-Backend modules and the Agents package are importable
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, os.pardir))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from cache_store import get_cache, normalize_cache_key
+from rate_limit import get_rate_limiter
+from Agents.passage_ranker import condense_articles
+from Agents.brand_registry import get_brand_registry, normalize_brand
+from Agents.certification_store import get_certification_store
+
 load_dotenv()
 
+# Tavily requests per second shared by every Tavily caller in the process
+TAVILY_RATE_LIMIT = float(os.getenv('TAVILY_RATE_LIMIT', 5))
+
+# News queries issued per company and seconds allowed for them (they run in parallel)
+MAX_NEWS_QUERIES = 5
+NEWS_QUERY_TIMEOUT = float(os.getenv('NEWS_QUERY_TIMEOUT', 20))
+# Approximate tokens of article text kept (as ranked passages) for the news LLM prompts
+NEWS_CONTEXT_TOKEN_BUDGET = int(os.getenv('NEWS_CONTEXT_TOKEN_BUDGET', 2000))
+
+# progress(stage, data) callback reporting pipeline milestones
+ProgressCallback = Callable[[str, Dict], None]
+
+# Company analyses are served as-is for the fresh TTL, then served while being
+# refreshed in the background until the stale TTL expires (seconds)
+COMPANY_ANALYSIS_FRESH_TTL = float(os.getenv('COMPANY_ANALYSIS_FRESH_TTL', 24 * 3600))
+COMPANY_ANALYSIS_STALE_TTL = float(os.getenv('COMPANY_ANALYSIS_STALE_TTL', 14 * 24 * 3600))
+
+# Cached Groq responses: lifetime (seconds), maximum stored responses, and the
+# highest temperature whose output is reused; LLM_CACHE_BYPASS=1 disables reuse
+LLM_CACHE_TTL = float(os.getenv('LLM_CACHE_TTL', 7 * 24 * 3600))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv('LLM_CACHE_MAX_ENTRIES', 20000))
+LLM_CACHE_MAX_TEMPERATURE = 0.3
+LLM_CACHE_BYPASS = os.getenv('LLM_CACHE_BYPASS', '0') == '1'
+
+# Analyse news sentiment, key findings and evidence in one Groq call (per-field fallback)
+COMBINED_NEWS_ANALYSIS = os.getenv('COMBINED_NEWS_ANALYSIS', '1') == '1'
+# Sources left out of evidence summaries (political / general news outlets and topics)
+EVIDENCE_SKIP_DOMAINS = [
+    "ndtv.com", "republicworld.com", "news18.com", "indiatoday.in", "opindia.com",
+    "zeenews.india.com", "timesofindia.indiatimes.com", "hindustantimes.com",
+]
+EVIDENCE_BAN_KEYWORDS = [
+    "modi", "bjp", "congress", "election", "parliament", "arrest", "raid",
+    "court", "police", "scam", "graft", "investigation", "protest", "riots",
+    "boycott", "controversy", "ban", "sedition", "misleading ad"
+]
+SENTIMENT_LABELS = ("Positive", "Neutral", "Negative")
+
+# Fallback texts that mark a stage as having had nothing to work with or having failed
+NO_CERTIFICATION_INFO = "No information found."
+EVIDENCE_SUMMARY_ERROR = "Could not generate evidence-based summary due to an error."
+
+# Longest LLM reply accepted as a parent company name (characters / words)
+COMPANY_NAME_MAX_LENGTH = 60
+COMPANY_NAME_MAX_WORDS = 6
+
 # Groq imports
 from groq import Groq
 
@@ -70,13 +134,169 @@ class CompanyAnalysisParams:
     materials: List[str]
     product_context: str
 
+@dataclass
+class CachedMessage:
+    content: str
+
+@dataclass
+class CachedChoice:
+    message: CachedMessage
+
+@dataclass
+class CachedCompletion:
+    """Chat completion in the shape of a Groq response (choices[0].message.content)"""
+    choices: List[CachedChoice]
+    usage: Dict[str, int]
+    cached: bool
+
+def is_json_reply(content: Optional[str]) -> bool:
+    """Whether a completion holds a parseable JSON object (how the agents read JSON replies)"""
+    json_match = re.search(r'\{.*\}', content or "", re.DOTALL)
+    if not json_match:
+        return False
+    try:
+        json.loads(json_match.group())
+        return True
+    except ValueError:
+        return False
+
+def is_text_reply(content: Optional[str]) -> bool:
+    """Whether a free-text completion is non-empty"""
+    return bool(content and content.strip())
+
+def is_company_name_reply(content: Optional[str]) -> bool:
+    """Whether a completion looks like a bare company name rather than a sentence or explanation"""
+    name = (content or '').strip()
+    if not name or '\n' in name or len(name) > COMPANY_NAME_MAX_LENGTH:
+        return False
+    if len(name.split()) > COMPANY_NAME_MAX_WORDS:
+        return False
+    # "The company is Unilever." / "Owned by P&G" are answers wrapped in prose
+    return not re.search(r"\b(is|are|was|by|the company|manufacturer|i think|likely)\b|[:?!]", name.lower())
+
+def llm_cache_key(request: Dict) -> str:
+    """Hash of a chat completion request (model, messages, temperature, max_tokens, ...)"""
+    payload = json.dumps(request, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class CachedGroqClient:
+    """
+    Drop-in replacement for the Groq client that caches chat completions.
+
+    Responses are stored in a persistent cache keyed by a hash of the
+    request, so re-running an agent prompt on the same evidence costs no
+    tokens or network time, and identical concurrent requests share one API
+    call. Requests above LLM_CACHE_MAX_TEMPERATURE, or made with
+    bypass_cache=True, always go to the API. Callers pass a validate check
+    so replies they can't parse are never cached (and are re-requested if
+    an older cached copy fails it).
+    """
+    
+    def __init__(self, groq_key: str, ttl: float = LLM_CACHE_TTL,
+                 max_entries: int = LLM_CACHE_MAX_ENTRIES, bypass: bool = LLM_CACHE_BYPASS):
+        self.client = Groq(api_key=groq_key)
+        self.cache = get_cache('llm_responses', ttl, max_entries=max_entries)
+        self.bypass = bypass
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'bypassed': 0, 'rejected': 0,
+                       'tokens_used': 0, 'tokens_saved': 0, 'seconds_saved': 0.0}
+    
+    def _count(self, **increments):
+        with self._lock:
+            for name, value in increments.items():
+                self._stats[name] += value
+    
+    def create(self, bypass_cache: bool = False, validate: Optional[Callable[[str], bool]] = None,
+               **request):
+        """
+        Create a chat completion, serving repeated requests from the cache
+
+        Args:
+            bypass_cache: Always call the API (the fresh response is still cached)
+            validate: Check the reply content must pass to be cached (e.g. is_json_reply)
+            **request: Arguments for Groq's chat.completions.create
+
+        Returns:
+            Groq response for uncacheable requests, otherwise a CachedCompletion
+        """
+        if self.bypass or request.get('temperature', 1.0) > LLM_CACHE_MAX_TEMPERATURE:
+            self._count(bypassed=1)
+            return self.client.chat.completions.create(**request)
+        
+        key = llm_cache_key(request)
+        computed = []
+        
+        def call_api():
+            start = time.perf_counter()
+            response = self.client.chat.completions.create(**request)
+            usage = getattr(response, 'usage', None)
+            entry = {
+                'content': response.choices[0].message.content,
+                'usage': {
+                    'prompt_tokens': getattr(usage, 'prompt_tokens', 0) or 0,
+                    'completion_tokens': getattr(usage, 'completion_tokens', 0) or 0,
+                    'total_tokens': getattr(usage, 'total_tokens', 0) or 0
+                },
+                'latency': round(time.perf_counter() - start, 3)
+            }
+            computed.append(entry)
+            return entry
+        
+        def accept(entry: Dict) -> bool:
+            return validate is None or validate(entry['content'])
+        
+        if bypass_cache:
+            entry = call_api()
+            if accept(entry):
+                self.cache.set(key, entry)
+        else:
+            entry = self.cache.get_or_compute(key, call_api, validate=accept)
+            if not computed and not accept(entry):
+                # Cached before this reply was validated; replace it
+                self.cache.delete(key)
+                entry = self.cache.get_or_compute(key, call_api, validate=accept)
+        
+        if computed:
+            if not accept(entry):
+                self._count(rejected=1)
+            self._count(misses=1, tokens_used=entry['usage']['total_tokens'])
+        else:
+            self._count(hits=1, tokens_saved=entry['usage']['total_tokens'], seconds_saved=entry['latency'])
+        return CachedCompletion(
+            choices=[CachedChoice(message=CachedMessage(content=entry['content']))],
+            usage=entry['usage'],
+            cached=not computed
+        )
+    
+    def stats(self) -> Dict:
+        """Hit/miss counters and the tokens and API seconds saved by the cache"""
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        stats['seconds_saved'] = round(stats['seconds_saved'], 3)
+        return stats
+
+_llm_clients: Dict[str, CachedGroqClient] = {}
+_llm_clients_lock = threading.Lock()
+
+def get_llm_client(groq_key: str) -> CachedGroqClient:
+    """Process-wide cached Groq client for an API key (shared by all agents)"""
+    with _llm_clients_lock:
+        client = _llm_clients.get(groq_key)
+        if client is None:
+            client = CachedGroqClient(groq_key)
+            _llm_clients[groq_key] = client
+        return client
+
 class LCAResultParser:
     """
     Parser to extract product and company information from LCA results
     """
     
     def __init__(self, groq_key: str, groq_model: str = "llama-3.1-8b-instant"):
-        self.groq_client = Groq(api_key=groq_key)
+        self.groq_client = get_llm_client(groq_key)
         self.model = groq_model
     
     def parse_lca_text(self, lca_text: str) -> LCAProductInfo:
@@ -108,6 +328,71 @@ class LCAResultParser:
             stage_breakdown=stage_breakdown
         )
     
+    def from_lca_output(self, lca_output: Union[Any, Dict, str], product_data: Optional[Dict] = None,
+                        company_name: Optional[str] = None) -> LCAProductInfo:
+        """
+        Build product information directly from EnhancedLCAModel output
+
+        Fields are mapped deterministically, so no regex parsing is needed. The
+        LLM is only used to resolve the brand's parent company, and only when
+        company_name isn't given.
+
+        Args:
+            lca_output: LCAResult, the dict from json.loads(lca_result_to_json(...)), or that JSON string
+            product_data: Product dict given to the LCA model (name, brand, packaging for an LCAResult)
+            company_name: Known parent company of the brand
+
+        Returns:
+            LCAProductInfo
+        """
+        product_data = product_data or {}
+        if isinstance(lca_output, str):
+            lca_output = json.loads(lca_output)
+        
+        if isinstance(lca_output, dict):
+            product = lca_output.get("product_info", {})
+            results = lca_output.get("lca_results", {})
+            product_name = product.get("name") or product_data.get("product_name", "Unknown Product")
+            brand = product.get("brand") or product_data.get("brand", "Unknown Brand")
+            total_emissions = float(results.get("total_emissions_kg_co2e", 0.0))
+            eco_score = float(results.get("eco_score", 0.0))
+            confidence = float(results.get("confidence_level", 0.0)) * 100
+            packaging_type = (lca_output.get("packaging_analysis", {}).get("plastic_type")
+                              or product.get("packaging_type", "Unknown Packaging"))
+            ingredient_emissions = lca_output.get("ingredient_emissions", {})
+            stage_breakdown = lca_output.get("stage_breakdown_kg_co2e", {})
+        else:
+            product_name = product_data.get("product_name", "Unknown Product")
+            brand = product_data.get("brand", "Unknown Brand")
+            total_emissions = float(lca_output.total_emissions)
+            eco_score = float(lca_output.eco_score)
+            confidence = float(lca_output.confidence_scores.get("overall", 0.0)) * 100
+            packaging_type = (lca_output.plastic_type_info.get("plastic_type")
+                              or product_data.get("packaging_type", "Unknown Packaging"))
+            ingredient_emissions = lca_output.ingredient_emissions
+            stage_breakdown = lca_output.stage_breakdown
+        
+        def ingredient_emission(value) -> float:
+            if isinstance(value, dict):
+                return float(value.get("emission_kg_co2e", value.get("emission", 0.0)))
+            return float(value or 0.0)
+        
+        top_ingredients = sorted(
+            ingredient_emissions, key=lambda name: ingredient_emission(ingredient_emissions[name]), reverse=True
+        )[:10]
+        
+        return LCAProductInfo(
+            product_name=product_name,
+            brand=brand,
+            company_name=company_name or self._determine_company_name(product_name, brand),
+            total_emissions=round(total_emissions, 4),
+            eco_score=round(eco_score, 1),
+            confidence=round(confidence, 1),
+            packaging_type=packaging_type,
+            top_ingredients=top_ingredients,
+            stage_breakdown={stage: float(value) for stage, value in stage_breakdown.items()}
+        )
+    
     def _extract_product_name(self, text: str) -> str:
         """Extract product name from LCA text"""
         # Look for patterns like "LCA Results for Product Name" or "Product: Product Name"
@@ -198,8 +483,16 @@ class LCAResultParser:
     
     def _determine_company_name(self, product_name: str, brand: str) -> str:
         """
-        Use LLM to determine the actual company name from product and brand
+        Determine the actual company name from product and brand, using the
+        local brand registry first and the LLM only for unresolved brands
         """
+        registry = get_brand_registry()
+        known_brand = normalize_brand(brand) not in ("", "unknown", "unknown brand")
+        if known_brand:
+            company_name = registry.resolve_company(brand)
+            if company_name:
+                return company_name
+        
         prompt = f"""Given this product information:
 Product: {product_name}
 Brand: {brand}
@@ -225,11 +518,18 @@ Examples:
                 ],
                 model=self.model,
                 temperature=0.1,
-                max_tokens=50
+                max_tokens=50,
+                validate=is_text_reply
             )
             
             company_name = response.choices[0].message.content.strip()
-            return company_name if company_name else brand
+            if not is_company_name_reply(company_name):
+                print(f"⚠️ Ignoring company name reply for {brand}: {company_name[:60]!r}")
+                return brand
+            # The prompt asks for the brand itself when the model is uncertain; don't persist that
+            if known_brand and normalize_brand(company_name) != normalize_brand(brand):
+                registry.record_company(brand, company_name)
+            return company_name
         except Exception as e:
             print(f"Error determining company name: {e}")
             return brand
@@ -267,7 +567,8 @@ Materials should focus on: packaging materials, key ingredients, sourcing practi
                 ],
                 model=self.model,
                 temperature=0.2,
-                max_tokens=400
+                max_tokens=400,
+                validate=is_json_reply
             )
             
             content = response.choices[0].message.content
@@ -339,7 +640,7 @@ class TavilySearchClient:
                 query=query,
                 search_depth="advanced",
                 max_results=max_results,
-                include_raw_content=True
+                include_raw_content=False
             )
             
             results = []
@@ -349,8 +650,7 @@ class TavilySearchClient:
                     "url": result.get("url", ""),
                     "snippet": result.get("content", ""),
                     "source": self._extract_domain(result.get("url", "")),
-                    "score": result.get("score", 0.0),
-                    "raw_content": result.get("raw_content", "")
+                    "score": result.get("score", 0.0)
                 })
             return results
             
@@ -373,7 +673,7 @@ class NewsHunterAgent:
     
     def __init__(self, tavily_key: str, groq_key: str, groq_model: str = "llama-3.1-8b-instant"):
         self.search_client = TavilySearchClient(tavily_key)
-        self.groq_client = Groq(api_key=groq_key)
+        self.groq_client = get_llm_client(groq_key)
         self.model = groq_model
     
     def search_news(self, company_name: str, keywords: List[str]) -> List[Dict]:
@@ -392,18 +692,41 @@ class NewsHunterAgent:
             base_queries.append(f"{company_name} {keyword} sustainability")
             base_queries.append(f"{company_name} {keyword} environmental")
         
-        print(f"🔍 Searching news with {len(base_queries)} queries...")
+        queries = base_queries[:MAX_NEWS_QUERIES]
+        print(f"🔍 Searching news with {len(queries)} queries...")
         
+        # Run the queries in parallel under the shared Tavily rate limit and
+        # de-duplicate URLs as results arrive. Articles keep the position of
+        # their first (query, rank) so the result doesn't depend on timing.
         unique_articles_map = {}
-        for query in base_queries[:5]:
-            print(f"   Searching: {query}")
-            query_articles = self.search_client.search_news(query, max_results=5)
-            for article in query_articles:
-                if article.get('url'):
-                    unique_articles_map[article['url']] = article
-            time.sleep(0.5)
+        executor = ThreadPoolExecutor(max_workers=len(queries))
+        futures = {executor.submit(self._search_query, query): index for index, query in enumerate(queries)}
+        try:
+            for future in as_completed(futures, timeout=NEWS_QUERY_TIMEOUT):
+                query_index = futures[future]
+                for rank, article in enumerate(future.result()):
+                    url = article.get('url')
+                    if not url:
+                        continue
+                    position = (query_index, rank)
+                    if url not in unique_articles_map or position < unique_articles_map[url][0]:
+                        unique_articles_map[url] = (position, article)
+        except FuturesTimeout:
+            pending = sum(1 for future in futures if not future.done())
+            print(f"   ⏱️ {pending} news queries timed out after {NEWS_QUERY_TIMEOUT}s, continuing without them")
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
         
-        return list(unique_articles_map.values())[:15]
+        ordered = sorted(unique_articles_map.values(), key=lambda entry: entry[0])
+        articles = [article for _, article in ordered][:15]
+        # Prompts only get the passages most relevant to the company and keywords
+        return condense_articles(articles, [company_name] + keywords, NEWS_CONTEXT_TOKEN_BUDGET)
+    
+    def _search_query(self, query: str) -> List[Dict]:
+        """Run one news query once the shared Tavily rate limiter allows it"""
+        get_rate_limiter('tavily', TAVILY_RATE_LIMIT).acquire()
+        print(f"   Searching: {query}")
+        return self.search_client.search_news(query, max_results=5)
     
     def analyze_sentiment(self, articles: List[Dict]) -> tuple:
         """Analyze sentiment of collected articles using Groq."""
@@ -434,7 +757,8 @@ Respond with ONLY a JSON object in this exact format:
                 ],
                 model=self.model,
                 temperature=0.1,
-                max_tokens=200
+                max_tokens=200,
+                validate=is_json_reply
             )
             
             content = response.choices[0].message.content
@@ -477,7 +801,8 @@ Respond with ONLY a JSON object containing a list called "findings". Format:
                 ],
                 model=self.model,
                 temperature=0.1,
-                max_tokens=800
+                max_tokens=800,
+                validate=is_json_reply
             )
             
             content = response.choices[0].message.content
@@ -502,15 +827,18 @@ Respond with ONLY a JSON object containing a list called "findings". Format:
         findings = self.extract_key_findings(articles, keywords)
         print(f"   Extracted {len(findings)} key findings")
         
+        return self.build_output(articles, sentiment, score, findings), articles
+    
+    def build_output(self, articles: List[Dict], sentiment: str, score: float,
+                     findings: List[KeyFinding]) -> NewsHunterOutput:
+        """Assemble the news hunter output from the analysed articles"""
         source_articles = [
             SourceArticle(title=a['title'], url=a['url'], publication=a['publication']) for a in articles
         ]
-        
-        hunter_output = NewsHunterOutput(
+        return NewsHunterOutput(
             overall_sentiment=sentiment, sentiment_score=score,
             key_findings=findings, source_articles=source_articles
         )
-        return hunter_output, articles
 
 class CertificationCheckerAgent:
     """
@@ -519,8 +847,9 @@ class CertificationCheckerAgent:
     
     def __init__(self, tavily_key: str, groq_key: str, groq_model: str = "llama-3.1-8b-instant"):
         self.search_client = TavilySearchClient(tavily_key)
-        self.groq_client = Groq(api_key=groq_key)
+        self.groq_client = get_llm_client(groq_key)
         self.model = groq_model
+        self.evidence_store = get_certification_store()
         self.certification_keywords = {
             "Packaging": ["packaging", "fsc", "greenpro", "ecomark", "recyclable", "biodegradable"],
             "Cosmetic": ["cosmetic", "ayush", "cruelty free", "organic", "natural", "paraben free"],
@@ -536,28 +865,41 @@ class CertificationCheckerAgent:
                 return category
         return material_or_practice
 
-    def search_certifications(self, company_name: str, material_or_practice: str) -> List[Dict]:
-        """Search for certification information using Tavily general search."""
+    def certification_queries(self, company_name: str, material_or_practice: str) -> List[str]:
+        """Tavily queries used to look for a company's certifications for a material"""
         category = self._find_material_category(material_or_practice)
-        queries = [
+        return [
             f'"{company_name}" "{material_or_practice}" certification',
             f'"{company_name}" {category} sustainability report',
         ]
+
+    def search_certification_query(self, query: str) -> List[Dict]:
+        """Run one certification query once the shared Tavily rate limiter allows it"""
+        get_rate_limiter('tavily', TAVILY_RATE_LIMIT).acquire()
+        print(f"   Searching certification: {query}")
+        return self.search_client.search_general(query, max_results=5)
+
+    @staticmethod
+    def merge_search_results(result_lists: List[List[Dict]]) -> List[Dict]:
+        """Concatenate per-query results in query order, dropping repeated URLs"""
         results = []
         unique_urls = set()
-        for query in queries:
-            print(f"   Searching certification: {query}")
-            for result in self.search_client.search_general(query, max_results=5):
+        for query_results in result_lists:
+            for result in query_results:
                 if result.get("url") and result["url"] not in unique_urls:
                     results.append(result)
                     unique_urls.add(result["url"])
-            time.sleep(0.5)
         return results
+
+    def search_certifications(self, company_name: str, material_or_practice: str) -> List[Dict]:
+        """Search for certification information using Tavily general search."""
+        queries = self.certification_queries(company_name, material_or_practice)
+        return self.merge_search_results([self.search_certification_query(query) for query in queries])
     
     def analyze_certification_results(self, company_name: str, material_or_practice: str, search_results: List[Dict]) -> Dict:
         """Analyze search results to determine certification status using Groq."""
         if not search_results:
-            return {"found": False, "certification": "None Found", "summary": "No information found.", "credibility": "Low"}
+            return {"found": False, "certification": "None Found", "summary": NO_CERTIFICATION_INFO, "credibility": "Low"}
         
         combined_text = "\n\n".join([f"Title: {r['title']}\nSnippet: {r['snippet']}" for r in search_results[:10]])
         prompt = f"""Analyze these search results for {company_name} regarding {material_or_practice}.
@@ -580,7 +922,8 @@ Respond with ONLY a JSON object in this format:
                 ],
                 model=self.model,
                 temperature=0.1,
-                max_tokens=400
+                max_tokens=400,
+                validate=is_json_reply
             )
             
             content = response.choices[0].message.content
@@ -590,13 +933,36 @@ Respond with ONLY a JSON object in this format:
             raise ValueError("No JSON object found")
         except Exception as e:
             print(f"Error parsing certification JSON from Groq: {e}")
-            return {"found": False, "certification": "None Found", "summary": "Analysis error.", "credibility": "Low"}
+            return {"found": False, "certification": "None Found", "summary": "Analysis error.", "credibility": "Low",
+                    "error": True}
+
+    def stored_certification(self, company_name: str, material_or_practice: str) -> Optional[Dict]:
+        """Fresh outcome from the local evidence store, in analyze_certification_results' format"""
+        outcome = self.evidence_store.get_fresh(company_name, material_or_practice)
+        if outcome is not None:
+            print(f"   📚 Using stored certification evidence for {company_name} - {material_or_practice}")
+        return outcome
+
+    def record_certification(self, company_name: str, material_or_practice: str,
+                             analysis: Dict, search_results: List[Dict]):
+        """Store a live check's outcome, unless the analysis failed or the search returned nothing"""
+        if analysis.get("error") or not search_results:
+            return
+        self.evidence_store.record(company_name, material_or_practice, analysis, search_results)
 
     def check_certification(self, company_name: str, material_or_practice: str) -> CertificationCheckerOutput:
         print(f"🔍 Checking certifications for {company_name} - {material_or_practice}")
+        stored = self.stored_certification(company_name, material_or_practice)
+        if stored is not None:
+            return self.build_output(material_or_practice, stored)
         search_results = self.search_certifications(company_name, material_or_practice)
         print(f"   Found {len(search_results)} unique search results")
         analysis = self.analyze_certification_results(company_name, material_or_practice, search_results)
+        self.record_certification(company_name, material_or_practice, analysis, search_results)
+        return self.build_output(material_or_practice, analysis)
+
+    def build_output(self, material_or_practice: str, analysis: Dict) -> CertificationCheckerOutput:
+        """Convert a certification analysis dict into the checker output"""
         return CertificationCheckerOutput(
             material_or_practice=material_or_practice,
             certification_found=analysis.get("certification", "None Found"),
@@ -611,12 +977,14 @@ class SustainabilityIntelligenceSystem:
     Enhanced with LCA result processing
     """
     
-    def __init__(self, tavily_key: str, groq_key: str, groq_model: str = "llama-3.1-8b-instant"):
+    def __init__(self, tavily_key: str, groq_key: str, groq_model: str = "llama-3.1-8b-instant",
+                 combined_analysis: bool = COMBINED_NEWS_ANALYSIS):
         self.lca_parser = LCAResultParser(groq_key, groq_model)
         self.news_hunter = NewsHunterAgent(tavily_key, groq_key, groq_model)
         self.cert_checker = CertificationCheckerAgent(tavily_key, groq_key, groq_model)
-        self.groq_client = Groq(api_key=groq_key)
+        self.groq_client = get_llm_client(groq_key)
         self.model = groq_model
+        self.combined_analysis = combined_analysis
     
     def analyze_from_lca_results(self, lca_text: str) -> Dict:
         """
@@ -624,7 +992,20 @@ class SustainabilityIntelligenceSystem:
         """
         print("🔬 Parsing LCA results...")
         lca_info = self.lca_parser.parse_lca_text(lca_text)
-        
+        return self._analyze_with_lca_info(lca_info)
+    
+    def analyze_from_lca_output(self, lca_output: Union[Any, Dict, str], product_data: Optional[Dict] = None,
+                                company_name: Optional[str] = None) -> Dict:
+        """
+        Analyze company sustainability from structured LCA output
+        (LCAResult or lca_result_to_json output) without parsing LCA text
+        """
+        print("🔬 Reading structured LCA results...")
+        lca_info = self.lca_parser.from_lca_output(lca_output, product_data, company_name)
+        return self._analyze_with_lca_info(lca_info)
+    
+    def _analyze_with_lca_info(self, lca_info: LCAProductInfo) -> Dict:
+        """Run the company analysis for a product described by LCA results"""
         print(f"📋 Extracted Product Info:")
         print(f"   Product: {lca_info.product_name}")
         print(f"   Brand: {lca_info.brand}")
@@ -651,18 +1032,142 @@ class SustainabilityIntelligenceSystem:
     
     def analyze_company(self, company_name: str, keywords: List[str], 
                        materials: List[str], lca_context: Optional[LCAProductInfo] = None,
-                       product_context: str = "") -> Dict:
-        """Comprehensive analysis of a company's sustainability practices"""
+                       product_context: str = "", progress: Optional[ProgressCallback] = None) -> Dict:
+        """Comprehensive analysis of a company's sustainability practices (see analyze_company_async)"""
+        coroutine = self.analyze_company_async(
+            company_name, keywords, materials, lca_context=lca_context,
+            product_context=product_context, progress=progress
+        )
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coroutine)
+        # Called from code already running an event loop: use a private loop in a worker thread
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, coroutine).result()
+    
+    async def analyze_company_async(self, company_name: str, keywords: List[str],
+                                    materials: List[str], lca_context: Optional[LCAProductInfo] = None,
+                                    product_context: str = "",
+                                    progress: Optional[ProgressCallback] = None) -> Dict:
+        """
+        Comprehensive analysis of a company's sustainability practices, run as a
+        dependency graph of blocking stages on worker threads:
+
+            news_search -> news_sentiment, news_key_findings, evidence_summary
+            certification_search:<material> -> certification_analysis:<material>   (per material,
+                                                   skipped while the evidence store has a fresh outcome)
+            all of the above -> lca_correlation (only with lca_context)
+
+        With combined_analysis, news_search is followed by a single
+        news_combined_analysis call; the three news stages then only run for
+        fields whose combined output failed validation.
+
+        Independent stages run concurrently and each stage starts as soon as
+        its inputs are ready. Wall-clock seconds per stage are returned under
+        "stage_timings", and progress(stage, data) is called as milestones
+        complete ("news_found", "news_analyzed", "evidence_summary_ready",
+        "certification_checked", "summary_ready"). Stages that fell back after
+        an LLM error are listed under "failed_stages".
+        """
         print(f"🚀 Starting comprehensive analysis for {company_name}")
-        
-        # Get news analysis with raw articles
-        news_results, raw_articles = self.news_hunter.hunt_news(company_name, keywords)
-        
-        cert_results = [self.cert_checker.check_certification(company_name, m) for m in materials]
-        
-        # Generate evidence-based qualitative summary
-        print("📝 Generating evidence-based qualitative summary...")
-        evidence_summary = self._parse_analysis_with_evidence(raw_articles, company_name)
+        pipeline_start = time.perf_counter()
+        timings: Dict[str, float] = {}
+        failed_stages: List[str] = []
+        live_search_hits: List[str] = []
+
+        async def timed(name: str, awaitable):
+            start = time.perf_counter()
+            try:
+                return await awaitable
+            finally:
+                timings[name] = round(time.perf_counter() - start, 3)
+
+        def run(fn, *args):
+            return asyncio.to_thread(fn, *args)
+
+        def report(stage: str, data: Dict):
+            if progress is None:
+                return
+            try:
+                progress(stage, data)
+            except Exception as e:
+                print(f"⚠️ Progress callback failed for {stage}: {e}")
+
+        async def news_branch():
+            articles = await timed("news_search", run(self.news_hunter.search_news, company_name, keywords))
+            print(f"   Found {len(articles)} unique articles")
+            report("news_found", {"articles": len(articles)})
+            print("📝 Generating evidence-based qualitative summary...")
+            combined = {}
+            if self.combined_analysis:
+                combined = await timed("news_combined_analysis",
+                                       run(self._combined_news_analysis, articles, company_name, keywords))
+
+            async def field(name: str, stage_name: str, fn, *args):
+                # Use the combined call's validated field, else run the dedicated stage
+                if name in combined:
+                    return combined[name]
+                return await timed(stage_name, run(fn, *args))
+
+            async def news_analysis():
+                (sentiment, score), findings = await asyncio.gather(
+                    field("sentiment", "news_sentiment", self.news_hunter.analyze_sentiment, articles),
+                    field("findings", "news_key_findings", self.news_hunter.extract_key_findings, articles, keywords)
+                )
+                report("news_analyzed", {"sentiment": sentiment, "sentiment_score": score,
+                                         "key_findings": len(findings)})
+                return self.news_hunter.build_output(articles, sentiment, score, findings)
+
+            async def evidence_summary():
+                evidence = await field("evidence_summary", "evidence_summary",
+                                       self._parse_analysis_with_evidence, articles, company_name)
+                if evidence == EVIDENCE_SUMMARY_ERROR:
+                    failed_stages.append("evidence_summary")
+                report("evidence_summary_ready", {})
+                return evidence
+
+            news_output, evidence = await asyncio.gather(news_analysis(), evidence_summary())
+            return news_output, articles, evidence
+
+        async def certification_branch(material: str):
+            stored = await run(self.cert_checker.stored_certification, company_name, material)
+            if stored is not None:
+                cert_output = self.cert_checker.build_output(material, stored)
+                report("certification_checked", {"material": material, "status": cert_output.status,
+                                                 "certification": cert_output.certification_found,
+                                                 "source": "store"})
+                return cert_output
+
+            queries = self.cert_checker.certification_queries(company_name, material)
+            result_lists = await timed(
+                f"certification_search:{material}",
+                asyncio.gather(*[run(self.cert_checker.search_certification_query, query) for query in queries])
+            )
+            search_results = self.cert_checker.merge_search_results(result_lists)
+            if search_results:
+                live_search_hits.append(material)
+            analysis = await timed(
+                f"certification_analysis:{material}",
+                run(self.cert_checker.analyze_certification_results, company_name, material, search_results)
+            )
+            if analysis.get("error"):
+                failed_stages.append(f"certification_analysis:{material}")
+            await run(self.cert_checker.record_certification, company_name, material, analysis, search_results)
+            cert_output = self.cert_checker.build_output(material, analysis)
+            report("certification_checked", {"material": material, "status": cert_output.status,
+                                             "certification": cert_output.certification_found,
+                                             "source": "live"})
+            return cert_output
+
+        (news_results, raw_articles, evidence_summary), cert_results = await asyncio.gather(
+            news_branch(),
+            asyncio.gather(*[certification_branch(material) for material in materials])
+        )
+        cert_results = list(cert_results)
+        if not raw_articles and not live_search_hits:
+            # Nothing came back from any live search: most likely Tavily failing, not a real result
+            failed_stages.append("news_search")
         
         analysis = {
             "company_name": company_name,
@@ -671,16 +1176,21 @@ class SustainabilityIntelligenceSystem:
             "news_analysis": asdict(news_results),
             "certification_analysis": [asdict(cert) for cert in cert_results],
             "executive_summary": self._generate_summary(news_results, cert_results),
-            "evidence_based_summary": evidence_summary
+            "evidence_based_summary": evidence_summary,
+            "failed_stages": failed_stages
         }
         
         # Add LCA context if provided
         if lca_context:
             analysis["lca_context"] = asdict(lca_context)
-            analysis["lca_sustainability_correlation"] = self._correlate_lca_with_sustainability(
-                lca_context, news_results, cert_results
+            analysis["lca_sustainability_correlation"] = await timed(
+                "lca_correlation",
+                run(self._correlate_lca_with_sustainability, lca_context, news_results, cert_results)
             )
         
+        timings["total"] = round(time.perf_counter() - pipeline_start, 3)
+        analysis["stage_timings"] = timings
+        report("summary_ready", {"certification_rate": analysis["executive_summary"]["certification_rate"]})
         return analysis
     
     def _correlate_lca_with_sustainability(self, lca_info: LCAProductInfo, 
@@ -721,7 +1231,8 @@ Provide correlation analysis in JSON format:
                 ],
                 model=self.model,
                 temperature=0.2,
-                max_tokens=600
+                max_tokens=600,
+                validate=is_json_reply
             )
             
             content = response.choices[0].message.content
@@ -745,26 +1256,11 @@ Provide correlation analysis in JSON format:
         combined_content = ""
         
         for result in search_results:
+            if not self._is_evidence_source(result):
+                continue
             title = result.get("title", "")
             snippet = result.get("content", "")
             link = result.get("url", "")
-
-            skip_domains = [
-                "ndtv.com", "republicworld.com", "news18.com", "indiatoday.in", "opindia.com",
-                "zeenews.india.com", "timesofindia.indiatimes.com", "hindustantimes.com",
-            ]
-            if any(skip in link for skip in skip_domains):
-                continue
-
-            ban_keywords = [
-                "modi", "bjp", "congress", "election", "parliament", "arrest", "raid",
-                "court", "police", "scam", "graft", "investigation", "protest", "riots",
-                "boycott", "controversy", "ban", "sedition", "misleading ad"
-            ]
-            snippet_text = (title + " " + snippet).lower()
-            if any(word in snippet_text for word in ban_keywords):
-                continue
-
             combined_content += f"Title: {title}\nSnippet: {snippet}\nLink: {link}\n\n"
 
         if not combined_content.strip():
@@ -791,14 +1287,134 @@ Provide correlation analysis in JSON format:
                 ],
                 model=self.model,
                 temperature=0.1,
-                max_tokens=1000
+                max_tokens=1000,
+                validate=is_text_reply
             )
             
             content = response.choices[0].message.content
             return content or "No specific sustainability-related insights could be extracted."
         except Exception as e:
             print(f"Error generating evidence summary: {e}")
-            return "Could not generate evidence-based summary due to an error."
+            return EVIDENCE_SUMMARY_ERROR
+
+    @staticmethod
+    def _is_evidence_source(result: Dict) -> bool:
+        """Whether a search result may be cited in the evidence summary (no political/general news)"""
+        link = result.get("url", "")
+        if any(skip in link for skip in EVIDENCE_SKIP_DOMAINS):
+            return False
+        # Only the title and short snippet: full-page passages mention unrelated topics far more often
+        snippet_text = (result.get("title", "") + " " + result.get("snippet", result.get("content", ""))).lower()
+        return not any(word in snippet_text for word in EVIDENCE_BAN_KEYWORDS)
+
+    def _combined_news_analysis(self, articles: List[Dict], brand_name: str, keywords: List[str]) -> Dict:
+        """
+        Sentiment, key findings and evidence summary from a single Groq call
+
+        The articles go to the model once with a JSON schema covering all
+        three results, and each field is validated on its own so that a bad
+        field only costs a retry of that field.
+
+        Returns:
+            Dict holding whichever of "sentiment" ((label, score)), "findings"
+            (List[KeyFinding]) and "evidence_summary" (str) passed validation
+        """
+        if not articles:
+            return {}
+        
+        # Sentiment and themes use the top 10 articles; evidence uses every non-political source
+        evidence_ids = [i for i, article in enumerate(articles, 1) if self._is_evidence_source(article)]
+        selected = [
+            (i, article) for i, article in enumerate(articles, 1) if i <= 10 or i in evidence_ids
+        ]
+        corpus = "\n\n".join(
+            f"[{i}] Title: {article['title']}\nLink: {article.get('url', '')}\n"
+            f"Content: {article.get('content', article.get('snippet', ''))}"
+            for i, article in selected
+        )
+        
+        evidence_instructions = (
+            f'"evidence_summary": bullet points ("- ... (URL: https://...)") using ONLY articles '
+            f'{evidence_ids}, covering sustainability certifications (Indian and global), environmental '
+            f'claims (packaging, ingredients, carbon neutrality, plastic use), green initiatives, renewable '
+            f'energy, eco-labels and water conservation. Do NOT mention anything political, legal, '
+            f'regulatory, or unrelated to environmental sustainability. Cite the source URL for each point.'
+        ) if evidence_ids else '"evidence_summary": null'
+        
+        prompt = f"""Analyze these news articles about {brand_name}'s sustainability practices.
+
+Articles:
+{corpus}
+
+Respond with ONLY a JSON object with exactly these keys:
+{{
+  "sentiment": "Positive" | "Neutral" | "Negative",
+  "score": number between 0-100,
+  "findings": [
+    {{"theme": "Theme Name", "summary": "Brief summary.", "source_count": 1}}
+  ],
+  "evidence_summary": "- point (URL: https://...)\n- point (URL: https://...)"
+}}
+
+- "sentiment"/"score": overall sustainability sentiment of articles 1-10.
+- "findings": up to 5 key sustainability themes from articles 1-10. Focus on: {', '.join(keywords)}.
+- {evidence_instructions}
+"""
+        try:
+            response = self.groq_client.chat.completions.create(
+                messages=[
+                    {"role": "system", "content": "You are an expert sustainability analyst. Focus only on environmental and sustainability topics. Always respond with valid JSON."},
+                    {"role": "user", "content": prompt}
+                ],
+                model=self.model,
+                temperature=0.1,
+                max_tokens=2000,
+                response_format={"type": "json_object"},
+                validate=is_json_reply
+            )
+            content = response.choices[0].message.content
+            json_match = re.search(r'\{.*\}', content or "", re.DOTALL)
+            if not json_match:
+                raise ValueError("No JSON object found")
+            data = json.loads(json_match.group())
+        except Exception as e:
+            print(f"Error in combined news analysis, using per-field calls. Error: {e}")
+            return {}
+        
+        results = {}
+        
+        sentiment = str(data.get("sentiment", "")).strip().title()
+        try:
+            score = float(data.get("score"))
+        except (TypeError, ValueError):
+            score = None
+        if sentiment in SENTIMENT_LABELS and score is not None and 0 <= score <= 100:
+            results["sentiment"] = (sentiment, score)
+        
+        findings = data.get("findings")
+        if isinstance(findings, list) and all(
+            isinstance(f, dict) and isinstance(f.get("theme"), str) and isinstance(f.get("summary"), str)
+            for f in findings
+        ):
+            try:
+                results["findings"] = [
+                    KeyFinding(theme=f["theme"], summary=f["summary"], source_count=int(f.get("source_count", 1)))
+                    for f in findings[:5] if f["theme"].strip()
+                ]
+            except (TypeError, ValueError):
+                pass
+        
+        evidence = data.get("evidence_summary")
+        if isinstance(evidence, list) and all(isinstance(point, str) for point in evidence):
+            evidence = "\n".join(point if point.lstrip().startswith("-") else f"- {point}" for point in evidence)
+        if evidence_ids and isinstance(evidence, str) and evidence.strip():
+            results["evidence_summary"] = evidence.strip()
+        
+        expected = ("sentiment", "findings", "evidence_summary") if evidence_ids else ("sentiment", "findings")
+        failed = [name for name in expected if name not in results]
+        if failed:
+            print(f"   Combined analysis fields failing validation: {failed}")
+        return results
 
     def _generate_summary(self, news_results: NewsHunterOutput, cert_results: List[CertificationCheckerOutput]) -> Dict:
         """Generate quantitative executive summary"""
@@ -813,7 +1429,8 @@ Provide correlation analysis in JSON format:
             "certifications_checked": total_certs_checked,
             "certification_rate": (verified_certs / total_certs_checked * 100) if total_certs_checked > 0 else 0
         }
-    def analyze_from_company_product(self, company_name: str, product_name: str) -> Dict:
+    def analyze_from_company_product(self, company_name: str, product_name: str,
+                                     progress: Optional[ProgressCallback] = None) -> Dict:
         """
         Analyze company sustainability based on company name and product name
         """
@@ -833,13 +1450,27 @@ Provide correlation analysis in JSON format:
             analysis_params.company_name,
             analysis_params.keywords,
             analysis_params.materials,
-            product_context=analysis_params.product_context
+            product_context=analysis_params.product_context,
+            progress=progress
         )
     def _generate_analysis_params_from_product(self, company_name: str, product_name: str) -> CompanyAnalysisParams:
         """
         Generate appropriate keywords and materials for sustainability analysis
-        based on company and product name
+        based on company and product name (reusing the brand registry's stored
+        parameters for the company's products in the same catalog category)
         """
+        registry = get_brand_registry()
+        category = registry.product_category(product_name)
+        stored_params = registry.analysis_params(company_name, category) if category else None
+        if stored_params:
+            keywords, materials, product_context = stored_params
+            return CompanyAnalysisParams(
+                company_name=company_name,
+                keywords=keywords,
+                materials=materials,
+                product_context=product_context or f"{product_name} sustainability analysis"
+            )
+        
         prompt = f"""Based on this company and product information, generate sustainability analysis parameters:
 
     Company: {company_name}
@@ -866,19 +1497,24 @@ Provide correlation analysis in JSON format:
                 ],
                 model=self.model,
                 temperature=0.2,
-                max_tokens=400
+                max_tokens=400,
+                validate=is_json_reply
             )
             
             content = response.choices[0].message.content
             json_match = re.search(r'\{.*\}', content, re.DOTALL)
             if json_match:
                 data = json.loads(json_match.group())
-                return CompanyAnalysisParams(
+                params = CompanyAnalysisParams(
                     company_name=company_name,
                     keywords=data.get("keywords", ["sustainability", "environmental", "packaging", "emissions"]),
                     materials=data.get("materials", ["Packaging", "Ingredients", "Manufacturing", "Sourcing"]),
                     product_context=data.get("product_context", f"{product_name} sustainability analysis")
                 )
+                if category and data.get("keywords") and data.get("materials"):
+                    registry.record_analysis_params(company_name, category, params.keywords,
+                                                    params.materials, data.get("product_context"))
+                return params
             else:
                 raise ValueError("No JSON found in response")
                 
@@ -912,6 +1548,47 @@ Provide correlation analysis in JSON format:
                 materials=["Packaging", "Ingredients", "Manufacturing", "Sourcing"],
                 product_context=f"{product_name} sustainability analysis"
             )
+
+def get_company_analysis_cache():
+    """Persistent cache of company analyses keyed by company and product context"""
+    return get_cache('company_analysis', COMPANY_ANALYSIS_STALE_TTL)
+
+def is_cacheable_analysis(analysis: Dict) -> bool:
+    """
+    Whether a company analysis is complete enough to cache
+
+    Rejects analyses with failed stages (LLM fallbacks, or no live search
+    returning anything, which is what a Tavily outage looks like) and ones
+    without any articles or certification information.
+    """
+    if not isinstance(analysis, dict) or analysis.get("failed_stages"):
+        return False
+    no_articles = not analysis.get("news_analysis", {}).get("source_articles")
+    no_certification_info = all(
+        cert.get("summary") == NO_CERTIFICATION_INFO for cert in analysis.get("certification_analysis", [])
+    )
+    return not (no_articles and no_certification_info)
+
+def cached_company_analysis(company_name: str, product_name: str, analyze) -> Tuple[Dict, str]:
+    """
+    Resolve a company analysis through the stale-while-revalidate cache
+
+    Degraded results (see is_cacheable_analysis) are returned but not
+    stored, and never replace a previously cached analysis.
+
+    Args:
+        company_name: Company or brand name
+        product_name: Product context ("" for the generic analysis)
+        analyze: Zero-argument function running the full analysis on a miss or refresh
+
+    Returns:
+        Tuple of (analysis dict, cache status: 'fresh', 'stale' or 'miss')
+    """
+    key = f"{normalize_cache_key(company_name)}|{normalize_cache_key(product_name)}"
+    return get_company_analysis_cache().get_or_compute_stale(
+        key, analyze, fresh_ttl=COMPANY_ANALYSIS_FRESH_TTL, validate=is_cacheable_analysis
+    )
+
 def main():
     """Example usage of the Enhanced Sustainability Intelligence System"""
     tavily_key = os.getenv("TAVILY_API_KEY")
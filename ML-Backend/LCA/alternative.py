@@ -10,6 +10,8 @@ from collections import Counter
 import os
 from dotenv import load_dotenv
 
+from LCA.size_units import add_size_columns_from_strings, catalog_size_value, parse_size, size_compatibility_mask
+
 load_dotenv()
 
 class EcoFriendlyAlternativesFinder:
@@ -183,6 +185,9 @@ class EcoFriendlyAlternativesFinder:
         # Create processed product names for better matching
         self.df['processed_name'] = self.df['product_name'].apply(self._process_product_name)
         
+        # Parse sizes once into typed columns (size_value_ml / size_value_g / size_unit)
+        add_size_columns_from_strings(self.df, 'size')
+        
         print("Dataset preprocessing completed successfully!")
         print(f"Eco score range: {self.df['eco_score'].min():.2f} - {self.df['eco_score'].max():.2f}")
     
@@ -247,28 +252,11 @@ class EcoFriendlyAlternativesFinder:
         Returns:
             Tuple of (numeric_value, unit)
         """
-        if pd.isna(size_str) or size_str == 'nan' or size_str == '':
+        if pd.isna(size_str):
             return (0.0, '')
         
-        # Extract number and unit
-        match = re.search(r'(\d+(?:\.\d+)?)\s*(ml|oz|g|kg|l|gm|gram|grams|liter|liters)', str(size_str).lower())
-        if match:
-            value = float(match.group(1))
-            unit = match.group(2)
-            
-            # Normalize units to ml equivalent for comparison
-            if unit in ['l', 'liter', 'liters']:
-                value *= 1000
-            elif unit in ['oz']:
-                value *= 29.5735  # fl oz to ml
-            elif unit in ['kg']:
-                value *= 1000
-            elif unit in ['gram', 'grams']:
-                unit = 'g'
-            
-            return (value, unit)
-        
-        return (0.0, '')
+        value, unit = parse_size(str(size_str))
+        return (value, unit.value)
     
     def _calculate_ingredient_similarity(self, user_ingredients: List[str], csv_ingredients: List[str]) -> float:
         """
@@ -302,20 +290,19 @@ class EcoFriendlyAlternativesFinder:
         
         return matches / total_user_ingredients if total_user_ingredients > 0 else 0.0
     
-    def _calculate_size_compatibility(self, user_size: str, csv_size: str, tolerance: float = 0.4) -> bool:
+    def _calculate_size_compatibility(self, user_size: str, csv_value: float, tolerance: float = 0.4) -> bool:
         """
         Check if sizes are compatible within tolerance
         
         Args:
             user_size: User's product size
-            csv_size: CSV product size
+            csv_value: CSV product size, pre-parsed to ml or g (0.0 if unknown)
             tolerance: Acceptable size difference ratio (default 40%)
             
         Returns:
             True if sizes are compatible
         """
         user_value, user_unit = self._extract_size_info(user_size)
-        csv_value, csv_unit = self._extract_size_info(csv_size)
         
         if user_value == 0.0 or csv_value == 0.0:
             return True  # If we can't determine size, don't filter out
@@ -405,7 +392,7 @@ class EcoFriendlyAlternativesFinder:
         # Size compatibility
         scores['size_compatible'] = self._calculate_size_compatibility(
             user_product.get('weight', ''),
-            str(row['size'])
+            catalog_size_value(row)
         )
         comprehensive_eco = self._calculate_comprehensive_eco_score(row, user_product)
         scores['comprehensive_eco_score'] = comprehensive_eco['comprehensive_eco_score']
@@ -583,6 +570,12 @@ class EcoFriendlyAlternativesFinder:
 
         print(f"Category filter: '{user_category}' -> {category_mask.sum()} products")
         
+        # Drop size-incompatible rows in one vectorized pass before scoring
+        user_size_value, _ = self._extract_size_info(user_product.get('weight', ''))
+        eligible_products = eligible_products[
+            size_compatibility_mask(eligible_products, user_size_value, tolerance=0.4)
+        ]
+        
         # Calculate scores for all eligible products
         alternatives = []
         
@@ -635,19 +628,32 @@ class EcoFriendlyAlternativesFinder:
         Returns:
             Dictionary with search results and alternatives
         """
-        product_name = user_product.get('product_name', '')
-        
-        # Get user's product eco score (from input or estimate)
-        user_eco_score = user_product.get('eco_score', 3.0)
-        
         # Find alternatives
         alternatives = self.find_alternatives(
-            user_product, 
+            user_product,
             num_alternatives=num_alternatives,
             min_similarity=0.25,  # Slightly lower threshold for more options
             eco_boost=True
         )
-        
+
+        return self.format_alternatives_result(user_product, alternatives)
+
+    def format_alternatives_result(self, user_product: Dict, alternatives: List[Dict]) -> Dict:
+        """
+        Build the response dictionary for a user product and its alternatives
+
+        Args:
+            user_product: Dictionary containing user's product information
+            alternatives: Alternatives from find_alternatives or a precomputed table
+
+        Returns:
+            Dictionary with search results and alternatives
+        """
+        product_name = user_product.get('product_name', '')
+
+        # Get user's product eco score (from input or estimate)
+        user_eco_score = user_product.get('eco_score', 3.0)
+
         # Prepare result
         result = {
             'user_product': {
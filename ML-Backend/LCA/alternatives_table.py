@@ -0,0 +1,367 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from LCA.alternative import EcoFriendlyAlternativesFinder
+from LCA.size_units import SIZE_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+# Number of alternatives stored per catalog product
+DEFAULT_TOP_N = 5
+
+# Eco score that /api/get-alternatives assigns to every user product
+DEFAULT_USER_ECO_SCORE = 3.0
+
+# Columns derived by EcoFriendlyAlternativesFinder that don't need hashing
+DERIVED_COLUMNS = ['processed_ingredients', 'processed_name'] + SIZE_COLUMNS
+
+# User product fields that find_alternatives scores on besides name/brand/category;
+# precomputed entries are only served when these equal the catalog row's values.
+# manufacturing_loc only counts when the catalog has that column.
+SCORED_INPUT_FIELDS = ('ingredient_list', 'weight', 'packaging_type', 'manufacturing_loc')
+
+# Bumped whenever stored entries stop being comparable (e.g. the digest gains a field)
+SCHEMA_VERSION = 2
+
+
+def _json_default(value):
+    """Convert numpy scalars/arrays left in alternative dictionaries to JSON types"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, set):
+        return sorted(value)
+    return str(value)
+
+
+class AlternativesTable:
+    """
+    Materialized top-N eco-friendly alternatives for every catalog product.
+
+    EcoFriendlyAlternativesFinder only compares a catalog product against
+    products of the same category (plus the dataset-wide maximum eco score
+    used for the eco bonus), so the table is rebuilt per category: when
+    merged_dataset.csv changes, only categories whose rows changed are
+    re-scored.
+    """
+
+    def __init__(self, db_path: str, top_n: int = DEFAULT_TOP_N,
+                 user_eco_score: float = DEFAULT_USER_ECO_SCORE):
+        """
+        Open (or create) the on-disk alternatives table
+
+        Args:
+            db_path: Path to the SQLite file holding the table
+            top_n: Number of alternatives precomputed per product
+            user_eco_score: Eco score assumed for the catalog product when scoring
+        """
+        self.db_path = db_path
+        self.top_n = top_n
+        self.user_eco_score = float(user_eco_score)
+        self._lock = threading.Lock()
+
+        db_dir = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(db_dir, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._drop_outdated_schema()
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS alternatives (
+                product_key TEXT PRIMARY KEY,
+                category_key TEXT NOT NULL,
+                input_digest TEXT NOT NULL,
+                alternatives TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_alternatives_category
+                ON alternatives (category_key);
+            CREATE TABLE IF NOT EXISTS category_digests (
+                category_key TEXT PRIMARY KEY,
+                digest TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+        """)
+        self._set_meta('schema_version', str(SCHEMA_VERSION))
+        self._conn.commit()
+
+    def _drop_outdated_schema(self):
+        """Drop tables written by an older SCHEMA_VERSION (forces a full rebuild)"""
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(alternatives)")]
+        if not columns:
+            return
+        version = None
+        if self._conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'meta'").fetchone():
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+            version = row[0] if row else None
+        if 'input_digest' not in columns or version != str(SCHEMA_VERSION):
+            self._conn.executescript("""
+                DROP TABLE IF EXISTS alternatives;
+                DROP TABLE IF EXISTS category_digests;
+                DROP TABLE IF EXISTS meta;
+            """)
+
+    @staticmethod
+    def _normalize(value) -> str:
+        """Lowercase and collapse whitespace for key building"""
+        if value is None or (isinstance(value, float) and pd.isna(value)):
+            return ''
+        return ' '.join(str(value).lower().split())
+
+    @classmethod
+    def product_key(cls, product_name: str, brand: str, category: str) -> str:
+        """Key identifying a catalog product by normalized name, brand and category"""
+        return '|'.join(cls._normalize(v) for v in (product_name, brand, category))
+
+    @staticmethod
+    def scored_fields(df: pd.DataFrame) -> List[str]:
+        """Input fields find_alternatives scores on for this catalog"""
+        return [field for field in SCORED_INPUT_FIELDS
+                if field != 'manufacturing_loc' or 'manufacturing_loc' in df.columns]
+
+    @staticmethod
+    def input_digest(user_product: Dict, fields: List[str]) -> str:
+        """
+        Digest of the scored input fields other than name, brand and category
+
+        Values are compared as find_alternatives reads them (string form,
+        case and whitespace aside), so a missing value only matches a
+        missing value.
+        """
+        values = [' '.join(str(user_product.get(field)).lower().split()) for field in fields]
+        return hashlib.sha1('\x1f'.join(values).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def dataset_fingerprint(dataset_path: str) -> str:
+        """Cheap change detector for the dataset file (size + mtime)"""
+        stat = os.stat(dataset_path)
+        return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str):
+        self._conn.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, value)
+        )
+
+    def is_stale(self, dataset_path: str) -> bool:
+        """
+        Check whether the table was built from a different version of the dataset
+
+        Args:
+            dataset_path: Path to merged_dataset.csv
+
+        Returns:
+            True if the table is empty or the dataset changed since the last build
+        """
+        try:
+            current = self.dataset_fingerprint(dataset_path)
+        except OSError:
+            return True
+        with self._lock:
+            return self._get_meta('dataset_fingerprint') != current
+
+    def _global_digest(self, finder: EcoFriendlyAlternativesFinder) -> str:
+        """Digest of the settings/dataset-wide values every entry depends on"""
+        payload = json.dumps({
+            'top_n': self.top_n,
+            'user_eco_score': self.user_eco_score,
+            'max_eco_score': float(finder.df['eco_score'].max()),
+            'scored_fields': self.scored_fields(finder.df),
+        }, sort_keys=True)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def _category_digests(self, df: pd.DataFrame) -> Dict[str, str]:
+        """Hash every category's rows so changed categories can be found"""
+        hash_columns = [col for col in df.columns if col not in DERIVED_COLUMNS]
+        row_hashes = pd.util.hash_pandas_object(
+            df[hash_columns].astype(str), index=False
+        )
+        category_keys = df['category'].map(self._normalize)
+
+        digests = {}
+        for category_key, hashes in row_hashes.groupby(category_keys):
+            digest = hashlib.sha1()
+            for value in sorted(hashes.tolist()):
+                digest.update(str(value).encode('ascii'))
+            digests[category_key] = digest.hexdigest()
+        return digests
+
+    def _catalog_user_product(self, row: pd.Series) -> Dict:
+        """Build the user product dictionary the API would send for a catalog row"""
+        return {
+            'product_name': row['product_name'],
+            'brand': row['brand'],
+            'category': row['category'],
+            'weight': row['size'],
+            'eco_score': self.user_eco_score,
+            'packaging_type': row.get('packaging_type', ''),
+            'ingredient_list': row['ingredients'],
+            'manufacturing_loc': row.get('manufacturing_loc', ''),
+        }
+
+    def build(self, finder: EcoFriendlyAlternativesFinder, dataset_path: str = None,
+              full: bool = False) -> Dict:
+        """
+        Precompute alternatives for every catalog product, re-scoring only
+        categories that changed since the previous build
+
+        Args:
+            finder: Alternatives finder loaded from the current dataset
+            dataset_path: Dataset file the finder was loaded from (for staleness checks)
+            full: Force re-scoring of every category
+
+        Returns:
+            Dictionary with build statistics
+        """
+        start = time.time()
+        df = finder.df
+        fields = self.scored_fields(df)
+        new_digests = self._category_digests(df)
+        global_digest = self._global_digest(finder)
+
+        with self._lock:
+            if full or self._get_meta('global_digest') != global_digest:
+                old_digests = {}
+            else:
+                old_digests = dict(self._conn.execute(
+                    "SELECT category_key, digest FROM category_digests"
+                ).fetchall())
+
+        changed = [key for key, digest in new_digests.items() if old_digests.get(key) != digest]
+        removed = [key for key in old_digests if key not in new_digests]
+
+        # Score changed categories outside the lock so lookups keep being served
+        category_keys = df['category'].map(self._normalize)
+        rebuilt_rows: List[Tuple[str, str, str]] = []
+        for category_key in changed:
+            seen = set()
+            for _, row in df[category_keys == category_key].iterrows():
+                key = self.product_key(row['product_name'], row['brand'], row['category'])
+                if key in seen:
+                    continue
+                seen.add(key)
+                user_product = self._catalog_user_product(row)
+                alternatives = finder.find_alternatives(
+                    user_product,
+                    num_alternatives=self.top_n,
+                    min_similarity=0.25,  # Same threshold as search_and_find_alternatives
+                    eco_boost=True
+                )
+                rebuilt_rows.append(
+                    (key, category_key, self.input_digest(user_product, fields),
+                     json.dumps(alternatives, default=_json_default))
+                )
+
+        with self._lock:
+            if not old_digests:
+                self._conn.execute("DELETE FROM alternatives")
+                self._conn.execute("DELETE FROM category_digests")
+            for category_key in changed + removed:
+                self._conn.execute(
+                    "DELETE FROM alternatives WHERE category_key = ?", (category_key,)
+                )
+                self._conn.execute(
+                    "DELETE FROM category_digests WHERE category_key = ?", (category_key,)
+                )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO alternatives (product_key, category_key, input_digest, alternatives) "
+                "VALUES (?, ?, ?, ?)",
+                rebuilt_rows
+            )
+            self._conn.executemany(
+                "INSERT INTO category_digests (category_key, digest) VALUES (?, ?)",
+                [(key, new_digests[key]) for key in changed]
+            )
+            self._set_meta('global_digest', global_digest)
+            self._set_meta('scored_fields', json.dumps(fields))
+            if dataset_path:
+                self._set_meta('dataset_fingerprint', self.dataset_fingerprint(dataset_path))
+            self._conn.commit()
+
+        stats = {
+            'categories_total': len(new_digests),
+            'categories_rebuilt': len(changed),
+            'categories_removed': len(removed),
+            'products_rebuilt': len(rebuilt_rows),
+            'seconds': round(time.time() - start, 2)
+        }
+        logger.info(f"Alternatives table build: {stats}")
+        return stats
+
+    def lookup(self, user_product: Dict, num_alternatives: int) -> Optional[List[Dict]]:
+        """
+        Return precomputed alternatives if the input is a catalog product
+
+        The product must match a catalog row on name, brand and category and
+        also carry that row's ingredients, size, packaging and manufacturing
+        location; any other input is scored live.
+
+        Args:
+            user_product: User's product information
+            num_alternatives: Number of alternatives requested
+
+        Returns:
+            List of alternatives, or None when live scoring is needed
+        """
+        if num_alternatives > self.top_n:
+            return None
+        if float(user_product.get('eco_score', DEFAULT_USER_ECO_SCORE)) != self.user_eco_score:
+            return None
+
+        key = self.product_key(
+            user_product.get('product_name', ''),
+            user_product.get('brand', ''),
+            user_product.get('category', '')
+        )
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT input_digest, alternatives FROM alternatives WHERE product_key = ?", (key,)
+            ).fetchone()
+            fields = self._get_meta('scored_fields')
+        if row is None or fields is None or row[0] != self.input_digest(user_product, json.loads(fields)):
+            return None
+        return json.loads(row[1])[:num_alternatives]
+
+    def close(self):
+        """Close the underlying database connection"""
+        with self._lock:
+            self._conn.close()
+
+
+def main():
+    """
+    Precompute job: build or incrementally refresh the alternatives table
+    """
+    parser = argparse.ArgumentParser(description="Precompute eco-friendly alternatives for the catalog")
+    parser.add_argument('csv_file_path', help="Path to merged_dataset.csv")
+    parser.add_argument('--db-path', help="Output SQLite file (default: next to the CSV)")
+    parser.add_argument('--top-n', type=int, default=DEFAULT_TOP_N)
+    parser.add_argument('--full', action='store_true', help="Re-score every category")
+    args = parser.parse_args()
+
+    db_path = args.db_path or os.path.splitext(args.csv_file_path)[0] + "_alternatives.sqlite3"
+    finder = EcoFriendlyAlternativesFinder(csv_file_path=args.csv_file_path)
+    table = AlternativesTable(db_path, top_n=args.top_n)
+    table.build(finder, dataset_path=args.csv_file_path, full=args.full)
+    table.close()
+
+
+if __name__ == "__main__":
+    main()
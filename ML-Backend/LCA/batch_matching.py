@@ -0,0 +1,49 @@
+from typing import List
+
+import numpy as np
+from fuzzywuzzy import fuzz
+
+try:
+    from rapidfuzz import fuzz as rapid_fuzz
+    from rapidfuzz import process as rapid_process
+except ImportError:
+    rapid_fuzz = None
+    rapid_process = None
+
+# Number of user products scored against the catalog per matrix
+DEFAULT_CHUNK_SIZE = 32
+
+
+def ratio_matrix(queries: List[str], choices: List[str]) -> np.ndarray:
+    """
+    fuzz.ratio between every query and every choice, scaled to 0-1
+
+    Uses rapidfuzz's multi-threaded cdist when installed and falls back to
+    fuzzywuzzy otherwise. Scores are rounded to whole percentages like
+    fuzzywuzzy's, and empty strings score 0 as they do in fuzzywuzzy.
+
+    Args:
+        queries: Strings to match (rows)
+        choices: Strings to match against (columns)
+
+    Returns:
+        Array of shape (len(queries), len(choices))
+    """
+    if not queries or not choices:
+        return np.zeros((len(queries), len(choices)))
+
+    if rapid_process is not None:
+        matrix = np.round(rapid_process.cdist(
+            queries, choices, scorer=rapid_fuzz.ratio, dtype=np.float32, workers=-1
+        )).astype(np.float64)
+    else:
+        matrix = np.array(
+            [[fuzz.ratio(query, choice) for choice in choices] for query in queries],
+            dtype=np.float64
+        )
+
+    empty_queries = np.array([not q for q in queries])
+    empty_choices = np.array([not c for c in choices])
+    matrix[empty_queries, :] = 0.0
+    matrix[:, empty_choices] = 0.0
+    return matrix / 100.0
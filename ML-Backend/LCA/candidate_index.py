@@ -0,0 +1,271 @@
+import re
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Length of the name-token prefixes used as blocking keys
+NAME_PREFIX_LENGTH = 4
+
+# Default cap on the number of rows scored per query
+DEFAULT_MAX_CANDIDATES = 300
+
+# Blocking key weights used to rank candidates before the cap is applied.
+# Name prefixes are additionally scaled by their inverse bucket frequency so
+# rare tokens outrank ones shared by most of the catalog.
+NAME_PREFIX_WEIGHT = 1.0
+BRAND_WEIGHT = 2.0
+CATEGORY_WEIGHT = 0.5
+
+NAME_STOPWORDS = {'for', 'with', 'and', 'the', 'of', 'in', 'by', 'new'}
+
+
+def normalize_key(value) -> str:
+    """Lowercase, drop punctuation and collapse whitespace"""
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return ''
+    return ' '.join(re.findall(r'[a-z0-9]+', str(value).lower()))
+
+
+def brand_key(brand) -> str:
+    """Blocking key for a brand ("L'Oréal Paris" and "loreal paris" collide)"""
+    key = normalize_key(brand).replace(' ', '')
+    if not key or key == 'nan' or key.startswith('unknown'):
+        return ''
+    return key
+
+
+def category_key(category) -> str:
+    """Blocking key for a category"""
+    key = normalize_key(category)
+    if not key or key == 'nan' or key.startswith('unknown'):
+        return ''
+    return key
+
+
+def exact_name_key(product_name) -> str:
+    """Key for exact-name lookups: lowercase with whitespace collapsed"""
+    if product_name is None or (isinstance(product_name, float) and pd.isna(product_name)):
+        return ''
+    return ' '.join(str(product_name).lower().split())
+
+
+def group_positions(keys: pd.Series) -> Dict[str, np.ndarray]:
+    """Group row positions by key, skipping empty keys"""
+    positions = pd.Series(np.arange(len(keys)), index=keys.values)
+    return {
+        key: group.to_numpy(dtype=np.int64)
+        for key, group in positions.groupby(level=0, sort=False)
+        if key
+    }
+
+
+def build_name_index(product_names: pd.Series) -> Dict[str, np.ndarray]:
+    """
+    Hash index from exact-name key to the row positions carrying that name
+
+    Args:
+        product_names: Catalog product_name column
+
+    Returns:
+        Dictionary mapping exact_name_key values to sorted row positions
+    """
+    return group_positions(product_names.map(exact_name_key))
+
+
+def name_prefixes(product_name) -> List[str]:
+    """Distinct token prefixes of a product name used as blocking keys"""
+    prefixes = []
+    for token in normalize_key(product_name).split():
+        if len(token) < 3 or token.isdigit() or token in NAME_STOPWORDS:
+            continue
+        prefix = token[:NAME_PREFIX_LENGTH]
+        if prefix not in prefixes:
+            prefixes.append(prefix)
+    return prefixes
+
+
+class CandidateIndex:
+    """
+    Blocking index over a catalog DataFrame.
+
+    Rows are bucketed by normalized brand, product-name token prefixes and
+    category. A query collects the buckets its own keys hit, ranks rows by
+    weighted hit count (rare name prefixes weigh more) and returns at most
+    max_candidates row positions, so fuzzy scoring only runs on a small
+    candidate set.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        """
+        Build the index
+
+        Args:
+            df: Catalog DataFrame with product_name, brand and category columns
+        """
+        self.size = len(df)
+        self.brand_buckets = group_positions(df['brand'].map(brand_key))
+        self.category_buckets = group_positions(df['category'].map(category_key))
+
+        prefix_positions = defaultdict(list)
+        for position, name in enumerate(df['product_name'].tolist()):
+            for prefix in name_prefixes(name):
+                prefix_positions[prefix].append(position)
+        self.name_buckets = {
+            prefix: np.asarray(positions, dtype=np.int64)
+            for prefix, positions in prefix_positions.items()
+        }
+
+    def candidates(self, user_product: Dict,
+                   max_candidates: int = DEFAULT_MAX_CANDIDATES) -> Optional[np.ndarray]:
+        """
+        Find the catalog rows worth scoring for a product
+
+        Args:
+            user_product: User's product information
+            max_candidates: Maximum number of row positions returned
+
+        Returns:
+            Sorted array of row positions, or None if none of the product's
+            blocking keys hit a bucket (callers should fall back to a full scan)
+        """
+        hits = []
+        weights = []
+
+        for prefix in name_prefixes(user_product.get('product_name', '')):
+            bucket = self.name_buckets.get(prefix)
+            if bucket is not None:
+                hits.append(bucket)
+                weights.append(NAME_PREFIX_WEIGHT * np.log1p(self.size / len(bucket)))
+
+        bucket = self.brand_buckets.get(brand_key(user_product.get('brand', '')))
+        if bucket is not None:
+            hits.append(bucket)
+            weights.append(BRAND_WEIGHT)
+
+        bucket = self.category_buckets.get(category_key(user_product.get('category', '')))
+        if bucket is not None:
+            hits.append(bucket)
+            weights.append(CATEGORY_WEIGHT)
+
+        if not hits:
+            # A misspelled name with an unknown brand can still fuzzy match, so scan everything
+            return None
+
+        scores = np.bincount(
+            np.concatenate(hits),
+            weights=np.concatenate([np.full(len(h), w) for h, w in zip(hits, weights)]),
+            minlength=self.size
+        )
+        matched = np.flatnonzero(scores)
+        if len(matched) > max_candidates:
+            top = np.argpartition(-scores[matched], max_candidates - 1)[:max_candidates]
+            matched = matched[top]
+
+        # Keep catalog order so ties resolve exactly like a full scan
+        return np.sort(matched)
+
+
+class BlockedSearchMixin:
+    """
+    Candidate blocking for catalog searchers.
+
+    Expects df, use_blocking, max_candidates, candidate_index (a
+    CandidateIndex over df) and enhanced_fuzzy_search(user_product,
+    min_overall_score, use_blocking=...).
+    """
+
+    def _blocking_positions(self, user_product: Dict, use_blocking: Optional[bool] = None) -> Optional[np.ndarray]:
+        """
+        Row positions worth scoring for a product according to the blocking index
+        
+        Args:
+            user_product: User's product information
+            use_blocking: Override the instance's use_blocking setting
+            
+        Returns:
+            Sorted array of row positions, or None to scan the whole catalog
+            (blocking is off or none of the product's keys hit a bucket)
+        """
+        if use_blocking is None:
+            use_blocking = self.use_blocking
+        if not use_blocking:
+            return None
+        return self.candidate_index.candidates(user_product, self.max_candidates)
+    
+    def _blocking_candidates(self, user_product: Dict, use_blocking: Optional[bool] = None) -> pd.DataFrame:
+        """
+        Rows worth scoring for a product according to the blocking index
+        
+        Args:
+            user_product: User's product information
+            use_blocking: Override the instance's use_blocking setting
+            
+        Returns:
+            Candidate rows (the full DataFrame if blocking is off or not applicable)
+        """
+        positions = self._blocking_positions(user_product, use_blocking)
+        if positions is None:
+            return self.df
+        return self.df.iloc[positions]
+    
+    def measure_blocking_recall(self, user_products: List[Dict], min_overall_score: float = 0.5) -> Dict:
+        """
+        Compare blocked fuzzy search against the full scan
+        
+        Args:
+            user_products: Sample queries (e.g., recent barcode/URL lookups)
+            min_overall_score: Threshold passed to enhanced_fuzzy_search
+            
+        Returns:
+            Dictionary with recall, agreement rate, misses and average timings
+        """
+        full_matches = 0
+        recalled = 0
+        agreed = 0
+        misses = []
+        full_time = 0.0
+        blocked_time = 0.0
+        
+        for user_product in user_products:
+            start = time.perf_counter()
+            full = self.enhanced_fuzzy_search(user_product, min_overall_score, use_blocking=False)
+            full_time += time.perf_counter() - start
+            
+            start = time.perf_counter()
+            blocked = self.enhanced_fuzzy_search(user_product, min_overall_score, use_blocking=True)
+            blocked_time += time.perf_counter() - start
+            
+            full_key = self._match_key(full)
+            same = full_key == self._match_key(blocked)
+            agreed += same
+            if full is not None:
+                full_matches += 1
+                if same:
+                    recalled += 1
+                else:
+                    misses.append(user_product.get('product_name', ''))
+        
+        queries = len(user_products)
+        report = {
+            'queries': queries,
+            'full_scan_matches': full_matches,
+            'recall': recalled / full_matches if full_matches else 1.0,
+            'agreement': agreed / queries if queries else 1.0,
+            'misses': misses,
+            'full_scan_ms_avg': 1000 * full_time / queries if queries else 0.0,
+            'blocked_ms_avg': 1000 * blocked_time / queries if queries else 0.0
+        }
+        print(f"Blocking recall: {report['recall']:.1%} over {full_matches} matched queries "
+              f"({report['blocked_ms_avg']:.1f} ms vs {report['full_scan_ms_avg']:.1f} ms full scan)")
+        return report
+    
+    @staticmethod
+    def _match_key(match: Optional[Dict]) -> Optional[Tuple]:
+        """Identify a search result for recall comparisons"""
+        if match is None:
+            return None
+        return (match.get('product_name'), match.get('brand'),
+                match.get('search_scores', {}).get('overall_score'))
@@ -5,20 +5,39 @@ from fuzzywuzzy import process
 import requests
 import json
 import re
-from typing import Dict, List, Optional, Union, Tuple
+from typing import Dict, Iterator, List, Optional, Union, Tuple
 from collections import Counter
 import os
+import threading
+import time
 from dotenv import load_dotenv
+
+from cache_store import get_cache, normalize_cache_key
+from rate_limit import get_rate_limiter
+from LCA.batch_matching import DEFAULT_CHUNK_SIZE, ratio_matrix
+from LCA.candidate_index import DEFAULT_MAX_CANDIDATES, BlockedSearchMixin, CandidateIndex, build_name_index, exact_name_key
+from LCA.size_units import SIZE_COLUMNS, add_size_columns_from_value_unit, catalog_size_value, parse_size, size_compatibility_mask
 load_dotenv()
 os.environ['TAVILY_API_KEY']=os.getenv('TAVILY_API_KEY')
-class CosmeticsSearcher:
-    def __init__(self, csv_file_path: str, tavily_api_key: str = os.environ['TAVILY_API_KEY']):
+
+# Lifetimes of cached Tavily responses (seconds); searches with no results expire sooner
+TAVILY_CACHE_TTL = float(os.getenv('TAVILY_CACHE_TTL', 7 * 24 * 3600))
+TAVILY_NEGATIVE_CACHE_TTL = float(os.getenv('TAVILY_NEGATIVE_CACHE_TTL', 6 * 3600))
+
+# Tavily requests per second shared by every searcher in the process
+TAVILY_RATE_LIMIT = float(os.getenv('TAVILY_RATE_LIMIT', 5))
+
+class CosmeticsSearcher(BlockedSearchMixin):
+    def __init__(self, csv_file_path: str, tavily_api_key: str = os.environ['TAVILY_API_KEY'],
+                 use_blocking: bool = True, max_candidates: int = DEFAULT_MAX_CANDIDATES):
         """
         Initialize the cosmetics searcher with CSV data and optional Tavily API key
         
         Args:
             csv_file_path: Path to the cosmetics CSV file
             tavily_api_key: API key for Tavily search (optional)
+            use_blocking: Score only blocking-index candidates in fuzzy search
+            max_candidates: Maximum number of candidates scored per fuzzy search
         """
         self.df = pd.read_csv(csv_file_path)
         self.tavily_api_key = tavily_api_key
@@ -31,6 +50,20 @@ class CosmeticsSearcher:
         
         # Preprocess ingredients for faster matching
         self.df['processed_ingredients'] = self.df['ingredients'].apply(self._process_ingredients)
+        
+        # Parse sizes once into typed columns (size_value_ml / size_value_g / size_unit)
+        add_size_columns_from_value_unit(self.df, 'weight_value', 'weight_unit')
+        
+        # Blocking index so fuzzy search only scores a small candidate set
+        self.use_blocking = use_blocking
+        self.max_candidates = max_candidates
+        self.candidate_index = CandidateIndex(self.df)
+        
+        # Exact-name hash index for direct_search
+        self.name_index = build_name_index(self.df['product_name'])
+        
+        # Catalog arrays for batch matching, built on first use
+        self._batch_arrays = None
     
     def _process_ingredients(self, ingredients_str: str) -> List[str]:
         """
@@ -60,38 +93,6 @@ class CosmeticsSearcher:
         
         return cleaned_ingredients
     
-    def _extract_size_info(self, weight_value, weight_unit=None) -> Tuple[float, str]:
-        """
-        Extract numeric value and unit from weight_value and weight_unit columns
-        
-        Args:
-            weight_value: Numeric weight value
-            weight_unit: Unit string (ml, oz, g, etc.)
-            
-        Returns:
-            Tuple of (numeric_value, unit)
-        """
-        if pd.isna(weight_value) or weight_value == 'nan':
-            return (0.0, '')
-        
-        try:
-            value = float(weight_value)
-        except (ValueError, TypeError):
-            return (0.0, '')
-        
-        unit = str(weight_unit).lower() if weight_unit and not pd.isna(weight_unit) else ''
-        
-        # Normalize units to ml equivalent for comparison
-        if unit in ['l']:
-            value *= 1000
-        elif unit in ['oz']:
-            value *= 29.5735  # fl oz to ml
-        elif unit in ['kg']:
-            value *= 1000
-        
-        return (value, unit)
-
-    
     def _calculate_ingredient_similarity(self, user_ingredients: List[str], csv_ingredients: List[str]) -> float:
         """
         Calculate similarity between two ingredient lists
@@ -131,36 +132,21 @@ class CosmeticsSearcher:
             size_str: Size string (e.g., "250ml", "8.5oz")
             
         Returns:
-            Tuple of (numeric_value, unit)
+            Tuple of (numeric_value normalized to ml or g, unit)
         """
-        if pd.isna(size_str) or size_str == 'nan':
+        if pd.isna(size_str):
             return (0.0, '')
         
-        # Extract number and unit
-        match = re.search(r'(\d+(?:\.\d+)?)\s*(ml|oz|g|kg|l|gm)', str(size_str).lower())
-        if match:
-            value = float(match.group(1))
-            unit = match.group(2)
-            
-            # Normalize units to ml equivalent for comparison
-            if unit in ['l']:
-                value *= 1000
-            elif unit in ['oz']:
-                value *= 29.5735  # fl oz to ml
-            elif unit in ['kg']:
-                value *= 1000
-            
-            return (value, unit)
-        
-        return (0.0, '')
-    def _calculate_size_compatibility(self, user_size: str, csv_weight_value, csv_weight_unit, tolerance: float = 0.3) -> bool:
+        value, unit = parse_size(str(size_str))
+        return (value, unit.value)
+
+    def _calculate_size_compatibility(self, user_size: str, csv_value: float, tolerance: float = 0.3) -> bool:
         """
         Check if sizes are compatible within tolerance
         
         Args:
             user_size: User's product size (string like "250ml")
-            csv_weight_value: CSV weight value (numeric)
-            csv_weight_unit: CSV weight unit (string)
+            csv_value: CSV size, pre-parsed to ml or g (0.0 if unknown)
             tolerance: Acceptable size difference ratio (default 30%)
             
         Returns:
@@ -168,7 +154,6 @@ class CosmeticsSearcher:
         """
         # Extract user size info from string format
         user_value, user_unit = self._extract_size_info_from_string(user_size)
-        csv_value, csv_unit = self._extract_size_info(csv_weight_value, csv_weight_unit)
         
         if user_value == 0.0 or csv_value == 0.0:
             return True  # If we can't determine size, don't filter out
@@ -221,11 +206,10 @@ class CosmeticsSearcher:
         if user_category and csv_category:
             scores['category_score'] = fuzz.ratio(user_category, csv_category) / 100.0
         
-        # Size compatibility - Updated for new dataset structure
+        # Size compatibility - uses the size parsed at load time
         scores['size_compatible'] = self._calculate_size_compatibility(
             user_product.get('weight', ''),
-            row['weight_value'],
-            row['weight_unit']
+            catalog_size_value(row)
         )
         
         # Calculate weighted overall score
@@ -255,13 +239,11 @@ class CosmeticsSearcher:
         Returns:
             Dictionary with product details or None if not found
         """
-        product_name = user_product.get('product_name', '').lower()
-        
-        # First try exact name match
-        mask = self.df['product_name'].str.lower() == product_name
-        exact_matches = self.df[mask]
+        # First try exact name match via the hash index
+        positions = self.name_index.get(exact_name_key(user_product.get('product_name', '')))
         
-        if not exact_matches.empty:
+        if positions is not None:
+            exact_matches = self.df.iloc[positions]
             # Among exact name matches, find the best overall match
             best_match = None
             best_score = 0.0
@@ -272,7 +254,7 @@ class CosmeticsSearcher:
                 # For exact matches, prioritize size compatibility and ingredient similarity
                 if scores['size_compatible'] and scores['ingredient_score'] > best_score:
                     best_score = scores['ingredient_score']
-                    best_match = row.copy()
+                    best_match = row.drop(labels=SIZE_COLUMNS)
                     best_match['search_scores'] = scores
             
             if best_match is not None:
@@ -280,13 +262,47 @@ class CosmeticsSearcher:
         
         return None
     
-    def enhanced_fuzzy_search(self, user_product: Dict, min_overall_score: float = 0.6) -> Optional[Dict]:
+    @staticmethod
+    def _is_acceptable_match(scores: Dict, min_overall_score: float) -> bool:
+        """
+        Acceptance rules for fuzzy matches (shared by single and batch search)
+        
+        Args:
+            scores: Score dictionary from _calculate_overall_score
+            min_overall_score: Minimum overall similarity score required
+            
+        Returns:
+            True if the candidate is an acceptable match
+        """
+        # Adjust scoring criteria:
+        # 1. If ingredients match >50%, lower name threshold
+        # 2. If brand and category match well, be more lenient
+        
+        # High ingredient similarity can compensate for lower name similarity
+        if scores['ingredient_score'] >= 0.5 and scores['name_score'] >= 0.4:
+            return True
+        
+        # High name similarity with decent ingredient match
+        if scores['name_score'] >= 0.7 and scores['ingredient_score'] >= 0.3:
+            return True
+        
+        # Exact brand and category match with moderate name similarity
+        if (scores['brand_score'] >= 0.9 and scores['category_score'] >= 0.8 and 
+                scores['name_score'] >= 0.5):
+            return True
+        
+        # High overall score
+        return scores['overall_score'] >= min_overall_score
+    
+    def enhanced_fuzzy_search(self, user_product: Dict, min_overall_score: float = 0.6,
+                              use_blocking: Optional[bool] = None) -> Optional[Dict]:
         """
         Enhanced fuzzy search with multi-criteria matching
         
         Args:
             user_product: User's product information
             min_overall_score: Minimum overall similarity score required
+            use_blocking: Override the instance's use_blocking setting (False forces a full scan)
             
         Returns:
             Dictionary with product details or None if not found
@@ -294,40 +310,24 @@ class CosmeticsSearcher:
         best_match = None
         best_overall_score = 0.0
         
-        # Calculate scores for all products
-        for idx, row in self.df.iterrows():
+        # Drop size-incompatible rows in one vectorized pass before scoring
+        candidates = self._blocking_candidates(user_product, use_blocking)
+        user_size_value, _ = self._extract_size_info_from_string(user_product.get('weight', ''))
+        candidates = candidates[size_compatibility_mask(candidates, user_size_value, tolerance=0.3)]
+        
+        # Calculate scores for the remaining products
+        for idx, row in candidates.iterrows():
             scores = self._calculate_overall_score(row, user_product)
             
             # Skip if size is incompatible
             if not scores['size_compatible']:
                 continue
             
-            # Adjust scoring criteria:
-            # 1. If ingredients match >50%, lower name threshold
-            # 2. If brand and category match well, be more lenient
-            
-            acceptable = False
-            
-            # High ingredient similarity can compensate for lower name similarity
-            if scores['ingredient_score'] >= 0.5 and scores['name_score'] >= 0.4:
-                acceptable = True
-            
-            # High name similarity with decent ingredient match
-            elif scores['name_score'] >= 0.7 and scores['ingredient_score'] >= 0.3:
-                acceptable = True
-            
-            # Exact brand and category match with moderate name similarity
-            elif (scores['brand_score'] >= 0.9 and scores['category_score'] >= 0.8 and 
-                  scores['name_score'] >= 0.5):
-                acceptable = True
-            
-            # High overall score
-            elif scores['overall_score'] >= min_overall_score:
-                acceptable = True
+            acceptable = self._is_acceptable_match(scores, min_overall_score)
             
             if acceptable and scores['overall_score'] > best_overall_score:
                 best_overall_score = scores['overall_score']
-                best_match = row.copy()
+                best_match = row.drop(labels=SIZE_COLUMNS)
                 best_match['search_scores'] = scores
         
         if best_match is not None:
@@ -376,10 +376,21 @@ class CosmeticsSearcher:
                 "max_results": 5
             }
             
-            response = requests.post(url, json=payload, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
+            def fetch():
+                get_rate_limiter('tavily', TAVILY_RATE_LIMIT).acquire()
+                response = requests.post(url, json=payload, timeout=10)
+                response.raise_for_status()
+                data = response.json()
+                # Searches that found nothing are cached as negative entries
+                return data if data.get('results') or data.get('answer') else None
+            
+            # Serve repeated queries from the persistent cache; concurrent identical
+            # lookups share a single API call
+            cache = get_cache('tavily_search', TAVILY_CACHE_TTL, TAVILY_NEGATIVE_CACHE_TTL)
+            data = cache.get_or_compute(normalize_cache_key(query), fetch)
+            if data is None:
+                print(f"No web results for '{query}'")
+                return None
             
             # Extract information from search results
             result_dict = self._extract_product_info_from_tavily(data, user_product)
@@ -473,57 +484,86 @@ class CosmeticsSearcher:
         return result
     
 
-    def search_product(self, user_product: Dict) -> str:
+    def _new_search_result(self, user_product: Dict) -> Tuple[Dict, Dict]:
         """
-        Main search function with enhanced multi-criteria matching
+        Empty search result for a product plus its user-specific fields
         
         Args:
             user_product: Dictionary containing user's product information
             
         Returns:
-            JSON string with search results and method used
+            Tuple of (search_result, user_specific_fields)
         """
-        product_name = user_product.get('product_name', '')
-        
         # Define CSV columns to identify user-specific fields
         csv_columns = set(['product_name', 'brand', 'category', 'ingredients', 
                       'manufacturing location', 'weight_value', 'weight_unit'])
         
         # Extract user-specific fields (fields not in CSV)
         user_specific_fields = {k: v for k, v in user_product.items() if k not in csv_columns}
-
         
         search_result = {
-        'search_query': product_name,
-        'search_method': None,
-        'found': False,
-        'product_details': None,
-        'user_input': user_product,
-        'match_confidence': 'low',
-        **user_specific_fields
-    }
-        
-        # Method 1: Enhanced direct search
-        print(f"Searching for '{product_name}' using enhanced direct search...")
-        result = self.direct_search(user_product)
+            'search_query': user_product.get('product_name', ''),
+            'search_method': None,
+            'found': False,
+            'product_details': None,
+            'user_input': user_product,
+            'match_confidence': 'low',
+            **user_specific_fields
+        }
+        return search_result, user_specific_fields
+    
+    def _attach_match(self, search_result: Dict, user_specific_fields: Dict, result: Dict,
+                      search_method: str, high_confidence_score: Optional[float]):
+        """
+        Record a catalog/web match in a search result
         
-        if result:
+        Args:
+            search_result: Result built by _new_search_result
+            user_specific_fields: User-specific fields to copy into the product details
+            result: Matched product details
+            search_method: Name of the method that found the match
+            high_confidence_score: Overall score above which confidence is 'high'
+                (None for web results, which are always 'medium')
+        """
+        confidence = 'medium'
+        if high_confidence_score is not None:
             scores = result.get('search_scores', {})
-            confidence = 'high' if scores.get('overall_score', 0) > 0.8 else 'medium'
+            if scores.get('overall_score', 0) > high_confidence_score:
+                confidence = 'high'
             
             # Add URL field if not present
             if 'url' not in result:
                 result['url'] = result.get('title-href', '')
+        
+        # Add ALL user-specific information to product details
+        result.update(user_specific_fields)
+        
+        search_result.update({
+            'search_method': search_method,
+            'found': True,
+            'product_details': result,
+            'match_confidence': confidence
+        })
+    
+    def search_product(self, user_product: Dict) -> str:
+        """
+        Main search function with enhanced multi-criteria matching
+        
+        Args:
+            user_product: Dictionary containing user's product information
             
-            # Add ALL user-specific information to product details
-            result.update(user_specific_fields)
-            
-            search_result.update({
-                'search_method': 'enhanced_direct_search',
-                'found': True,
-                'product_details': result,
-                'match_confidence': confidence
-            })
+        Returns:
+            JSON string with search results and method used
+        """
+        product_name = user_product.get('product_name', '')
+        search_result, user_specific_fields = self._new_search_result(user_product)
+        
+        # Method 1: Enhanced direct search
+        print(f"Searching for '{product_name}' using enhanced direct search...")
+        result = self.direct_search(user_product)
+        
+        if result:
+            self._attach_match(search_result, user_specific_fields, result, 'enhanced_direct_search', 0.8)
             return json.dumps(search_result, indent=2)
         
         # Method 2: Enhanced fuzzy search
@@ -531,22 +571,7 @@ class CosmeticsSearcher:
         result = self.enhanced_fuzzy_search(user_product, min_overall_score=0.5)
         
         if result:
-            scores = result.get('search_scores', {})
-            confidence = 'high' if scores.get('overall_score', 0) > 0.7 else 'medium'
-            
-            # Add URL field if not present
-            if 'url' not in result:
-                result['url'] = result.get('title-href', '')
-            
-            # Add ALL user-specific information to product details
-            result.update(user_specific_fields)
-            
-            search_result.update({
-                'search_method': 'enhanced_fuzzy_search',
-                'found': True,
-                'product_details': result,
-                'match_confidence': confidence
-            })
+            self._attach_match(search_result, user_specific_fields, result, 'enhanced_fuzzy_search', 0.7)
             return json.dumps(search_result, indent=2)
         
         # Method 3: Tavily web search
@@ -554,15 +579,7 @@ class CosmeticsSearcher:
         result = self.tavily_search(user_product)
         
         if result:
-            # Add ALL user-specific information to product details
-            result.update(user_specific_fields)
-            
-            search_result.update({
-                'search_method': 'tavily_web_search',
-                'found': True,
-                'product_details': result,
-                'match_confidence': 'medium'
-            })
+            self._attach_match(search_result, user_specific_fields, result, 'tavily_web_search', None)
             return json.dumps(search_result, indent=2)
         
         # No results found
@@ -571,6 +588,310 @@ class CosmeticsSearcher:
         search_result['search_method'] = 'no_suitable_results'
         return json.dumps(search_result, indent=2)
 
+    def _batch_catalog_arrays(self) -> Dict:
+        """Catalog columns prepared once for matrix scoring"""
+        if self._batch_arrays is None:
+            brand_codes, brands = pd.factorize(self.df['brand'].astype(str).str.lower())
+            category_codes, categories = pd.factorize(self.df['category'].astype(str).str.lower())
+            sizes = self.df['size_value_ml'].fillna(self.df['size_value_g']).fillna(0.0).to_numpy()
+            self._batch_arrays = {
+                'names': self.df['product_name'].astype(str).str.lower().tolist(),
+                'brand_codes': brand_codes,
+                'brands': list(brands),
+                'category_codes': category_codes,
+                'categories': list(categories),
+                'sizes': sizes,
+            }
+        return self._batch_arrays
+
+    def _batch_fuzzy_matches(self, user_products: List[Dict], min_overall_score: float,
+                             use_blocking: Optional[bool] = None) -> List[Optional[Dict]]:
+        """
+        enhanced_fuzzy_search for several products at once
+        
+        Name, brand and category scores are computed as (products x catalog)
+        matrices. Each product only considers the rows its blocking
+        candidates allow, exactly as enhanced_fuzzy_search does, so batch and
+        single searches return the same match. Ingredient similarity, the only
+        per-row Python loop, is only computed for rows whose upper-bound score
+        can still beat the current best match.
+        
+        Args:
+            user_products: User products to match
+            min_overall_score: Minimum overall similarity score required
+            use_blocking: Override the instance's use_blocking setting (False forces a full scan)
+            
+        Returns:
+            List aligned with user_products holding match dictionaries or None
+        """
+        arrays = self._batch_catalog_arrays()
+        
+        name_scores = ratio_matrix(
+            [str(p.get('product_name', '')).lower() for p in user_products], arrays['names']
+        )
+        brand_scores = ratio_matrix(
+            [str(p.get('brand', '')).lower() for p in user_products], arrays['brands']
+        )[:, arrays['brand_codes']]
+        category_scores = ratio_matrix(
+            [str(p.get('category', '')).lower() for p in user_products], arrays['categories']
+        )[:, arrays['category_codes']]
+        partial_scores = 0.3 * name_scores + 0.15 * brand_scores + 0.15 * category_scores
+        
+        matches = []
+        for i, user_product in enumerate(user_products):
+            user_size, _ = self._extract_size_info_from_string(user_product.get('weight', ''))
+            size_ok = np.ones(len(self.df), dtype=bool)
+            if user_size:
+                sizes = arrays['sizes']
+                size_ok = (sizes == 0.0) | (np.abs(user_size - sizes) / user_size <= 0.3)
+            blocked = self._blocking_positions(user_product, use_blocking)
+            if blocked is not None:
+                allowed = np.zeros(len(self.df), dtype=bool)
+                allowed[blocked] = True
+                size_ok &= allowed
+            
+            user_ingredients = self._process_ingredients(user_product.get('ingredient_list', ''))
+            max_ingredient_bonus = 0.4 if user_ingredients else 0.0
+            
+            # Rows that could pass any acceptance rule given a perfect ingredient score
+            upper_bounds = partial_scores[i] + max_ingredient_bonus + 1e-9
+            possible = size_ok & ((name_scores[i] >= 0.4) | (upper_bounds >= min_overall_score))
+            positions = np.flatnonzero(possible)
+            positions = positions[np.argsort(-upper_bounds[positions], kind='stable')]
+            
+            best_position = None
+            best_scores = None
+            for position in positions:
+                if best_scores is not None and upper_bounds[position] < best_scores['overall_score']:
+                    break  # No remaining row can beat the current best
+                
+                ingredient_score = 0.0
+                if user_ingredients:
+                    ingredient_score = self._calculate_ingredient_similarity(
+                        user_ingredients, self.df['processed_ingredients'].iat[position]
+                    )
+                scores = {
+                    'name_score': float(name_scores[i, position]),
+                    'ingredient_score': ingredient_score,
+                    'brand_score': float(brand_scores[i, position]),
+                    'category_score': float(category_scores[i, position]),
+                    'size_compatible': True,
+                    'overall_score': 0.0
+                }
+                # Same weights and summation order as _calculate_overall_score
+                scores['overall_score'] = (
+                    scores['name_score'] * 0.3 +
+                    scores['ingredient_score'] * 0.4 +
+                    scores['brand_score'] * 0.15 +
+                    scores['category_score'] * 0.15
+                )
+                if not self._is_acceptable_match(scores, min_overall_score):
+                    continue
+                # Ties go to the earlier catalog row, as in a sequential scan
+                if (best_scores is None or scores['overall_score'] > best_scores['overall_score'] or
+                        (scores['overall_score'] == best_scores['overall_score'] and position < best_position)):
+                    best_position = position
+                    best_scores = scores
+            
+            if best_position is None:
+                matches.append(None)
+            else:
+                best_match = self.df.iloc[best_position].drop(labels=SIZE_COLUMNS)
+                best_match['search_scores'] = best_scores
+                matches.append(best_match.to_dict())
+        return matches
+
+    def search_products_batch(self, user_products: List[Dict], min_overall_score: float = 0.5,
+                              chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Dict]:
+        """
+        Match many products against the catalog (e.g., a partner SKU spreadsheet)
+        
+        Applies the search_product pipeline (direct search, then fuzzy search)
+        without the per-product web search fallback. Fuzzy matching scores the
+        whole catalog with matrices, chunk by chunk, and results are yielded
+        as each chunk completes.
+        
+        Args:
+            user_products: List of dictionaries with user product information
+            min_overall_score: Minimum overall score for fuzzy matches
+            chunk_size: Number of products scored per matrix
+            
+        Yields:
+            Search result dictionaries (same shape as search_product's JSON) with
+            an added 'batch_index' giving the product's position in the input
+        """
+        for start in range(0, len(user_products), chunk_size):
+            chunk = user_products[start:start + chunk_size]
+            results = {}
+            fuzzy_pending = []
+            
+            for offset, user_product in enumerate(chunk):
+                search_result, user_specific_fields = self._new_search_result(user_product)
+                search_result['batch_index'] = start + offset
+                results[offset] = (search_result, user_specific_fields)
+                
+                match = self.direct_search(user_product)
+                if match:
+                    self._attach_match(search_result, user_specific_fields, match, 'enhanced_direct_search', 0.8)
+                else:
+                    fuzzy_pending.append(offset)
+            
+            if fuzzy_pending:
+                fuzzy_matches = self._batch_fuzzy_matches(
+                    [chunk[offset] for offset in fuzzy_pending], min_overall_score
+                )
+                for offset, match in zip(fuzzy_pending, fuzzy_matches):
+                    search_result, user_specific_fields = results[offset]
+                    if match:
+                        self._attach_match(search_result, user_specific_fields, match, 'enhanced_fuzzy_search', 0.7)
+                    else:
+                        search_result['search_method'] = 'no_suitable_results'
+            
+            for offset in range(len(chunk)):
+                yield results[offset][0]
+
+    def check_batch_agreement(self, user_products: List[Dict], min_overall_score: float = 0.5) -> Dict:
+        """
+        Compare search_products_batch against the single-product pipeline
+        
+        The single pipeline here is direct search then enhanced_fuzzy_search
+        (no web search, as in the batch path).
+        
+        Args:
+            user_products: Sample queries
+            min_overall_score: Threshold passed to both searches
+            
+        Returns:
+            Dictionary with the agreement rate and the names of disagreeing queries
+        """
+        mismatches = []
+        batch_results = self.search_products_batch(user_products, min_overall_score=min_overall_score)
+        for user_product, batch_result in zip(user_products, batch_results):
+            single = self.direct_search(user_product)
+            if single is None:
+                single = self.enhanced_fuzzy_search(user_product, min_overall_score)
+            if self._match_key(single) != self._match_key(batch_result.get('product_details')):
+                mismatches.append(user_product.get('product_name', ''))
+        
+        queries = len(user_products)
+        report = {
+            'queries': queries,
+            'agreement': (queries - len(mismatches)) / queries if queries else 1.0,
+            'mismatches': mismatches
+        }
+        print(f"Batch/single agreement: {report['agreement']:.1%} over {queries} queries")
+        return report
+
+
+class SharedCosmeticsSearcher:
+    """
+    Long-lived CosmeticsSearcher shared by all requests in the process.
+
+    The dataset is loaded (and its derived columns built) once. When the
+    dataset file changes on disk, a new searcher is built in the background
+    and swapped in with a single reference assignment, so requests already
+    holding the previous instance finish against it undisturbed.
+    """
+
+    def __init__(self, csv_file_path: str, tavily_api_key: str = None,
+                 check_interval: float = 30.0, searcher_cls=CosmeticsSearcher):
+        """
+        Load the dataset and build the initial searcher
+
+        Args:
+            csv_file_path: Path to the cosmetics CSV file
+            tavily_api_key: API key for Tavily search (optional)
+            check_interval: Minimum seconds between dataset change checks
+            searcher_cls: CosmeticsSearcher (sub)class to instantiate
+        """
+        self.csv_file_path = csv_file_path
+        self.tavily_api_key = tavily_api_key
+        self.check_interval = check_interval
+        self.searcher_cls = searcher_cls
+
+        self._reload_lock = threading.Lock()
+        self._last_check = time.monotonic()
+        self.reload_count = 0
+        self.last_loaded = None
+
+        # Initial load runs synchronously so startup fails loudly on a bad dataset
+        self._searcher, self._fingerprint = self._build()
+
+    def _dataset_fingerprint(self) -> str:
+        """Cheap change detector for the dataset file (size + mtime)"""
+        stat = os.stat(self.csv_file_path)
+        return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+    def _build(self) -> Tuple[CosmeticsSearcher, str]:
+        """Construct a fresh searcher along with the fingerprint it was built from"""
+        fingerprint = self._dataset_fingerprint()
+        searcher = self.searcher_cls(
+            csv_file_path=self.csv_file_path,
+            tavily_api_key=self.tavily_api_key
+        )
+        self.last_loaded = time.time()
+        return searcher, fingerprint
+
+    def reload(self) -> bool:
+        """
+        Rebuild the searcher from the dataset file and swap it in
+
+        Returns:
+            True if a new searcher was installed, False if a reload was already
+            running or the rebuild failed (the previous searcher stays active)
+        """
+        if not self._reload_lock.acquire(blocking=False):
+            return False
+        try:
+            searcher, fingerprint = self._build()
+            self._searcher = searcher
+            self._fingerprint = fingerprint
+            self.reload_count += 1
+            print(f"Reloaded cosmetics dataset ({len(searcher.df)} products)")
+            return True
+        except Exception as e:
+            print(f"Failed to reload cosmetics dataset, keeping previous version: {e}")
+            return False
+        finally:
+            self._reload_lock.release()
+
+    def _check_for_changes(self):
+        """Start a background reload if the dataset file changed since the last load"""
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+
+        try:
+            changed = self._dataset_fingerprint() != self._fingerprint
+        except OSError:
+            return  # File temporarily missing (e.g. being replaced); keep serving
+
+        if changed and not self._reload_lock.locked():
+            threading.Thread(target=self.reload, daemon=True).start()
+
+    def get(self) -> CosmeticsSearcher:
+        """
+        Return the current searcher, scheduling a reload if the dataset changed
+
+        Returns:
+            CosmeticsSearcher instance to use for this request
+        """
+        self._check_for_changes()
+        return self._searcher
+
+    def search_product(self, user_product: Dict) -> str:
+        """
+        Search using the current searcher (see CosmeticsSearcher.search_product)
+
+        Args:
+            user_product: Dictionary containing user's product information
+
+        Returns:
+            JSON string with search results and method used
+        """
+        return self.get().search_product(user_product)
+
 
 def main():
     """
@@ -665,6 +986,11 @@ def main():
                 print(f"Overall score: {scores.get('overall_score', 0):.2%}")
         else:
             print("\nNo suitable match found. This prevents showing irrelevant products.")
+    
+    # Batch matching must pick the same products as one-at-a-time search
+    report = searcher.check_batch_agreement(test_products)
+    if report['mismatches']:
+        print(f"Batch and single search disagree for: {', '.join(report['mismatches'])}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
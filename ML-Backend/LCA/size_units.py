@@ -0,0 +1,128 @@
+import re
+from enum import Enum
+from functools import lru_cache
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class SizeUnit(str, Enum):
+    """Dimension a product size was normalized to"""
+    ML = 'ml'
+    G = 'g'
+    UNKNOWN = ''
+
+
+# Raw unit -> (normalized unit, multiplier to reach ml / g)
+UNIT_CONVERSIONS = {
+    'ml': (SizeUnit.ML, 1.0),
+    'l': (SizeUnit.ML, 1000.0),
+    'liter': (SizeUnit.ML, 1000.0),
+    'liters': (SizeUnit.ML, 1000.0),
+    'oz': (SizeUnit.ML, 29.5735),  # fl oz to ml
+    'g': (SizeUnit.G, 1.0),
+    'gm': (SizeUnit.G, 1.0),
+    'gram': (SizeUnit.G, 1.0),
+    'grams': (SizeUnit.G, 1.0),
+    'kg': (SizeUnit.G, 1000.0),
+}
+
+SIZE_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*(ml|oz|g|kg|l|gm|gram|grams|liter|liters)')
+
+# Columns added to catalog DataFrames by the loaders below
+SIZE_COLUMNS = ['size_value_ml', 'size_value_g', 'size_unit']
+
+
+@lru_cache(maxsize=4096)
+def parse_size(size_str: str) -> Tuple[float, SizeUnit]:
+    """
+    Extract a normalized numeric size from a string
+
+    Args:
+        size_str: Size string (e.g., "250ml", "8.5oz", "1 kg")
+
+    Returns:
+        Tuple of (value in ml or g, unit); (0.0, SizeUnit.UNKNOWN) if not parseable
+    """
+    if size_str is None or size_str == 'nan' or size_str == '':
+        return (0.0, SizeUnit.UNKNOWN)
+
+    match = SIZE_PATTERN.search(str(size_str).lower())
+    if not match:
+        return (0.0, SizeUnit.UNKNOWN)
+
+    unit, factor = UNIT_CONVERSIONS[match.group(2)]
+    return (float(match.group(1)) * factor, unit)
+
+
+def _assign_size_columns(df: pd.DataFrame, values: pd.Series, raw_units: pd.Series):
+    """Convert raw values/units into the typed size columns in place"""
+    conversions = raw_units.map(UNIT_CONVERSIONS)
+    known = conversions.notna() & values.notna()
+    units = conversions.map(lambda c: c[0] if isinstance(c, tuple) else SizeUnit.UNKNOWN)
+    factors = conversions.map(lambda c: c[1] if isinstance(c, tuple) else np.nan).astype(float)
+    normalized = values * factors
+
+    df['size_unit'] = units.where(known, SizeUnit.UNKNOWN)
+    df['size_value_ml'] = normalized.where(known & (units == SizeUnit.ML))
+    df['size_value_g'] = normalized.where(known & (units == SizeUnit.G))
+
+
+def add_size_columns_from_strings(df: pd.DataFrame, size_column: str):
+    """
+    Parse a free-text size column (e.g., "250ml") once into typed size columns
+
+    Args:
+        df: Catalog DataFrame, modified in place
+        size_column: Column holding size strings
+    """
+    extracted = df[size_column].astype(str).str.lower().str.extract(SIZE_PATTERN)
+    values = pd.to_numeric(extracted[0], errors='coerce')
+    _assign_size_columns(df, values, extracted[1])
+
+
+def add_size_columns_from_value_unit(df: pd.DataFrame, value_column: str, unit_column: str):
+    """
+    Convert separate numeric value / unit columns once into typed size columns
+
+    Args:
+        df: Catalog DataFrame, modified in place
+        value_column: Column holding the numeric size (e.g., weight_value)
+        unit_column: Column holding the unit (e.g., weight_unit)
+    """
+    values = pd.to_numeric(df[value_column], errors='coerce')
+    raw_units = df[unit_column].astype(str).str.lower().str.strip()
+    _assign_size_columns(df, values, raw_units)
+
+
+def catalog_size_value(row: pd.Series) -> float:
+    """Normalized size of a catalog row in ml or g, 0.0 if unknown"""
+    for column in ('size_value_ml', 'size_value_g'):
+        value = row.get(column)
+        if value is not None and not pd.isna(value):
+            return float(value)
+    return 0.0
+
+
+def size_compatibility_mask(df: pd.DataFrame, user_value: float, tolerance: float) -> pd.Series:
+    """
+    Vectorized size compatibility check against every catalog row
+
+    Rows whose size can't be determined stay compatible, as does every row
+    when the user's size is unknown.
+
+    Args:
+        df: Catalog DataFrame with typed size columns
+        user_value: User's size normalized to ml or g (0.0 if unknown)
+        tolerance: Acceptable size difference ratio
+
+    Returns:
+        Boolean Series aligned with df
+    """
+    if not user_value:
+        return pd.Series(True, index=df.index)
+
+    sizes = df['size_value_ml'].fillna(df['size_value_g'])
+    unknown = sizes.isna() | (sizes == 0.0)
+    return unknown | ((sizes - user_value).abs() / user_value <= tolerance)
@@ -0,0 +1,396 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+# Directory holding the on-disk caches (override with ECOLENS_CACHE_DIR)
+CACHE_DIR = os.getenv(
+    "ECOLENS_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+)
+
+# Returned by SQLiteTTLCache.get when there is no fresh entry
+MISS = object()
+
+# Writes between size-cap checks for caches with max_entries
+SIZE_CHECK_INTERVAL = 64
+
+
+def normalize_cache_key(text: str) -> str:
+    """Lowercase and collapse whitespace so trivially different queries share an entry"""
+    return ' '.join(str(text or '').lower().split())
+
+
+class _Call:
+    """In-flight call shared by SingleFlight callers"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls with the same key into one execution.
+
+    The first caller runs the function; callers arriving while it runs wait
+    for it and receive the same result (or exception).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self.shared = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """
+        Run fn once per key at a time
+
+        Args:
+            key: Identity of the call
+            fn: Zero-argument function producing the result
+
+        Returns:
+            fn's result, possibly computed by another thread
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+
+class SQLiteTTLCache:
+    """
+    Small persistent key/value cache with per-entry expiry.
+
+    Values are stored as JSON. Misses can be cached as negative entries
+    (with their own, usually shorter, TTL) so repeated lookups for unknown
+    items don't hit the upstream service every time. With max_entries set,
+    the oldest entries are evicted once the cache grows past the cap.
+    """
+
+    def __init__(self, db_path: str, default_ttl: float, negative_ttl: float = None,
+                 max_entries: Optional[int] = None):
+        """
+        Open (or create) the cache file
+
+        Args:
+            db_path: Path to the SQLite file
+            default_ttl: Lifetime of positive entries in seconds
+            negative_ttl: Lifetime of negative entries in seconds (defaults to default_ttl)
+            max_entries: Maximum number of stored entries (None for no cap)
+        """
+        self.db_path = db_path
+        self.default_ttl = default_ttl
+        self.negative_ttl = negative_ttl if negative_ttl is not None else default_ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self._refreshing = set()
+        self._stats = {'hits': 0, 'negative_hits': 0, 'misses': 0, 'writes': 0, 'errors': 0,
+                       'stale_hits': 0, 'refreshes': 0, 'evictions': 0, 'rejected': 0}
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                value TEXT,
+                negative INTEGER NOT NULL DEFAULT 0,
+                expires_at REAL NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    def _lookup(self, key: str) -> Any:
+        """Fresh entry for key (None if negative, MISS if absent) without touching stats"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, negative FROM cache WHERE key = ? AND expires_at > ?",
+                (key, time.time())
+            ).fetchone()
+        if row is None:
+            return MISS
+        return None if row[1] else json.loads(row[0])
+
+    def _lookup_with_age(self, key: str):
+        """Unexpired entry for key and its age in seconds, or (MISS, None)"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, negative, created_at FROM cache WHERE key = ? AND expires_at > ?",
+                (key, now)
+            ).fetchone()
+        if row is None:
+            return MISS, None
+        return (None if row[1] else json.loads(row[0])), now - row[2]
+
+    def get(self, key: str) -> Any:
+        """
+        Look up a fresh entry
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Stored value, None for a negative entry, or MISS
+        """
+        value = self._lookup(key)
+        with self._lock:
+            if value is MISS:
+                self._stats['misses'] += 1
+            elif value is None:
+                self._stats['negative_hits'] += 1
+            else:
+                self._stats['hits'] += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl: float = None):
+        """Store a value (None is stored as a negative entry)"""
+        negative = value is None
+        if ttl is None:
+            ttl = self.negative_ttl if negative else self.default_ttl
+        now = time.time()
+        payload = None if negative else json.dumps(value)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, negative, expires_at, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, payload, int(negative), now + ttl, now)
+            )
+            self._conn.commit()
+            self._stats['writes'] += 1
+            check_size = self.max_entries is not None and self._stats['writes'] % SIZE_CHECK_INTERVAL == 0
+        if check_size:
+            self.enforce_size_cap()
+
+    def enforce_size_cap(self) -> int:
+        """
+        Drop expired entries, then the oldest ones beyond max_entries
+
+        Returns:
+            Number of entries evicted for the size cap
+        """
+        self.purge_expired()
+        if self.max_entries is None:
+            return 0
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+            excess = count - self.max_entries
+            if excess <= 0:
+                return 0
+            self._conn.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY created_at LIMIT ?)",
+                (excess,)
+            )
+            self._conn.commit()
+            self._stats['evictions'] += excess
+            return excess
+
+    def delete(self, key: str):
+        """Drop an entry"""
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def purge_expired(self) -> int:
+        """Delete expired entries, returning how many were removed"""
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+            self._conn.commit()
+            return cursor.rowcount
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any],
+                       ttl: float = None, negative_ttl: float = None,
+                       validate: Callable[[Any], bool] = None) -> Any:
+        """
+        Return the cached value, computing and storing it on a miss
+
+        Concurrent misses for the same key share one compute() call. A None
+        result is cached as a negative entry; exceptions and results
+        rejected by validate are not cached.
+
+        Args:
+            key: Cache key
+            compute: Zero-argument function producing the value
+            ttl: Lifetime override for a positive result
+            negative_ttl: Lifetime override for a None result
+            validate: Optional check a computed result must pass to be stored
+
+        Returns:
+            Cached or freshly computed value
+        """
+        value = self.get(key)
+        if value is not MISS:
+            return value
+
+        def load():
+            # Another caller may have filled the entry since our lookup
+            cached = self._lookup(key)
+            if cached is not MISS:
+                return cached
+            return self._compute_and_store(key, compute, ttl, negative_ttl, validate)
+
+        return self._flight.do(key, load)
+
+    def get_or_compute_stale(self, key: str, compute: Callable[[], Any], fresh_ttl: float,
+                             ttl: float = None, negative_ttl: float = None,
+                             validate: Callable[[Any], bool] = None):
+        """
+        Stale-while-revalidate lookup
+
+        Entries younger than fresh_ttl are returned as they are. Older but
+        unexpired entries are returned immediately while one background
+        thread recomputes them; if that refresh fails, or its result is
+        rejected by validate, the stale entry is kept. Misses are computed
+        inline, with concurrent misses sharing one compute() call; a
+        rejected result is returned but not stored.
+
+        Args:
+            key: Cache key
+            compute: Zero-argument function producing the value
+            fresh_ttl: Age in seconds after which an entry is refreshed
+            ttl: How long a positive entry may be served at all (defaults to default_ttl)
+            negative_ttl: Same for a None result (defaults to negative_ttl)
+            validate: Optional check a computed result must pass to be stored
+
+        Returns:
+            Tuple of (value, status) where status is 'fresh', 'stale' or 'miss'
+        """
+        value, age = self._lookup_with_age(key)
+        if value is not MISS:
+            with self._lock:
+                if age < fresh_ttl:
+                    self._stats['negative_hits' if value is None else 'hits'] += 1
+                    return value, 'fresh'
+                self._stats['stale_hits'] += 1
+            self._refresh_in_background(key, compute, ttl, negative_ttl, validate)
+            return value, 'stale'
+
+        with self._lock:
+            self._stats['misses'] += 1
+
+        def load():
+            # Another caller may have filled the entry since our lookup
+            cached, _ = self._lookup_with_age(key)
+            if cached is not MISS:
+                return cached
+            return self._compute_and_store(key, compute, ttl, negative_ttl, validate)
+
+        return self._flight.do(key, load), 'miss'
+
+    def _compute_and_store(self, key: str, compute: Callable[[], Any],
+                           ttl: float = None, negative_ttl: float = None,
+                           validate: Callable[[Any], bool] = None) -> Any:
+        """Run compute() and store its result unless validate rejects it, counting failures"""
+        try:
+            result = compute()
+        except Exception:
+            with self._lock:
+                self._stats['errors'] += 1
+            raise
+        if validate is not None and not validate(result):
+            print(f"⚠️ Not caching rejected result for {key}")
+            with self._lock:
+                self._stats['rejected'] += 1
+            return result
+        self.set(key, result, ttl if result is not None else negative_ttl)
+        return result
+
+    def _refresh_in_background(self, key: str, compute: Callable[[], Any],
+                               ttl: float = None, negative_ttl: float = None,
+                               validate: Callable[[Any], bool] = None):
+        """Start a refresh thread for key unless one is already running"""
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+            self._stats['refreshes'] += 1
+
+        def refresh():
+            try:
+                self._compute_and_store(key, compute, ttl, negative_ttl, validate)
+            except Exception as e:
+                print(f"⚠️ Background refresh failed for {key}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, name=f"cache-refresh:{key}", daemon=True).start()
+
+    def stats(self) -> Dict:
+        """Hit/miss counters for this process plus the number of stored entries"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        served = stats['hits'] + stats['negative_hits'] + stats['stale_hits']
+        lookups = served + stats['misses']
+        stats['coalesced'] = self._flight.shared
+        stats['hit_rate'] = round(served / lookups, 4) if lookups else 0.0
+        return stats
+
+    def close(self):
+        """Close the underlying database connection"""
+        with self._lock:
+            self._conn.close()
+
+
+_caches: Dict[str, SQLiteTTLCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(name: str, default_ttl: float, negative_ttl: float = None,
+              cache_dir: Optional[str] = None, max_entries: Optional[int] = None) -> SQLiteTTLCache:
+    """
+    Process-wide cache instance for a name (one SQLite file per cache)
+
+    Args:
+        name: Cache name, also used as the file name
+        default_ttl: Lifetime of positive entries in seconds
+        negative_ttl: Lifetime of negative entries in seconds
+        cache_dir: Directory for the cache file (defaults to CACHE_DIR)
+        max_entries: Maximum number of stored entries (None for no cap)
+
+    Returns:
+        Shared SQLiteTTLCache
+    """
+    with _caches_lock:
+        cache = _caches.get(name)
+        if cache is None:
+            db_path = os.path.join(cache_dir or CACHE_DIR, f"{name}.sqlite3")
+            cache = SQLiteTTLCache(db_path, default_ttl, negative_ttl, max_entries)
+            _caches[name] = cache
+        return cache
+
+
+def all_cache_stats() -> Dict[str, Dict]:
+    """Stats for every cache opened in this process"""
+    with _caches_lock:
+        caches = dict(_caches)
+    return {name: cache.stats() for name, cache in caches.items()}
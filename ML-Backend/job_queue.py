@@ -0,0 +1,291 @@
+"""
+Persistent background jobs.
+
+Long-running work (e.g. company analyses) is stored as a job in SQLite and
+executed on a bounded thread pool, so clients can poll its progress events
+and result instead of holding a request open. Unfinished jobs survive a
+restart; a job that keeps taking the process down with it is failed after
+MAX_JOB_ATTEMPTS runs.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from cache_store import CACHE_DIR
+
+# Jobs executed at once unless overridden
+DEFAULT_JOB_WORKERS = 2
+
+# Runs a job may start before it is failed instead of resumed after a restart
+MAX_JOB_ATTEMPTS = int(os.getenv('MAX_JOB_ATTEMPTS', 3))
+
+# Job states
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+FINISHED_STATES = (SUCCEEDED, FAILED)
+
+# handler(params, report) -> JSON-serialisable result; report(stage, data) records progress
+JobHandler = Callable[[Dict, Callable[[str, Optional[Dict]], None]], Any]
+
+
+class JobQueue:
+    """
+    Persistent background job queue.
+
+    Jobs, their progress events and results are stored in SQLite and run on
+    a bounded thread pool. Jobs that were queued or running when the process
+    stopped are queued again by start(), so handlers must be safe to re-run.
+    A running job that has already used max_attempts runs is failed instead,
+    since it most likely crashed the process itself.
+    """
+
+    def __init__(self, db_path: str, max_workers: int = DEFAULT_JOB_WORKERS,
+                 max_attempts: int = MAX_JOB_ATTEMPTS):
+        """
+        Open (or create) the job database
+
+        Args:
+            db_path: Path to the SQLite file
+            max_workers: Maximum number of jobs running at once
+            max_attempts: Runs a job may start before start() fails it
+        """
+        self.db_path = db_path
+        self.max_workers = max_workers
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._handlers: Dict[str, JobHandler] = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                params TEXT NOT NULL,
+                status TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS job_events (
+                job_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                stage TEXT NOT NULL,
+                data TEXT,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (job_id, seq)
+            )
+        """)
+        self._conn.commit()
+
+    def register(self, kind: str, handler: JobHandler):
+        """Register the function that runs jobs of a kind (before start())"""
+        self._handlers[kind] = handler
+
+    def start(self) -> int:
+        """
+        Queue every unfinished job left from a previous run
+
+        Jobs that were running when the process stopped and have already
+        started max_attempts times are failed rather than queued again.
+
+        Returns:
+            Number of jobs resumed
+        """
+        now = time.time()
+        with self._lock:
+            gave_up = self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE status = ? AND attempts >= ?",
+                (FAILED, f"Interrupted on each of its {self.max_attempts} attempts", now,
+                 RUNNING, self.max_attempts)
+            ).rowcount
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE status = ?",
+                (QUEUED, now, RUNNING)
+            )
+            self._conn.commit()
+            job_ids = [row[0] for row in self._conn.execute(
+                "SELECT id FROM jobs WHERE status = ? ORDER BY created_at", (QUEUED,)
+            )]
+        if gave_up:
+            print(f"⚠️ Failed {gave_up} job(s) interrupted {self.max_attempts} times")
+        for job_id in job_ids:
+            self._executor.submit(self._run, job_id)
+        return len(job_ids)
+
+    def submit(self, kind: str, params: Dict) -> str:
+        """
+        Store a job and queue it for execution
+
+        Args:
+            kind: Registered job kind
+            params: JSON-serialisable handler parameters
+
+        Returns:
+            Job id
+        """
+        if kind not in self._handlers:
+            raise ValueError(f"No handler registered for job kind '{kind}'")
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, params, status, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, kind, json.dumps(params), QUEUED, now, now)
+            )
+            self._conn.commit()
+        self._executor.submit(self._run, job_id)
+        return job_id
+
+    def _set_status(self, job_id: str, status: str, result: Any = None, error: str = None):
+        """Update a job's state (caller does not hold the lock)"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, updated_at = ?, "
+                "attempts = attempts + ? WHERE id = ?",
+                (status, None if result is None else json.dumps(result, default=str), error,
+                 time.time(), 1 if status == RUNNING else 0, job_id)
+            )
+            self._conn.commit()
+
+    def _run(self, job_id: str):
+        """Execute one job on a worker thread"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT kind, params, status FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None or row[2] != QUEUED:
+            return
+        kind, params = row[0], json.loads(row[1])
+        handler = self._handlers.get(kind)
+        if handler is None:
+            self._set_status(job_id, FAILED, error=f"No handler registered for job kind '{kind}'")
+            return
+
+        self._set_status(job_id, RUNNING)
+        self.report(job_id, 'started')
+        try:
+            result = handler(params, lambda stage, data=None: self.report(job_id, stage, data))
+        except Exception as e:
+            print(f"❌ Job {job_id} ({kind}) failed: {e}")
+            self._set_status(job_id, FAILED, error=str(e))
+            return
+        self._set_status(job_id, SUCCEEDED, result=result)
+
+    def report(self, job_id: str, stage: str, data: Optional[Dict] = None):
+        """
+        Record a progress event for a running job
+
+        Events reported after the job has finished (e.g. from work the
+        handler left running in the background) are ignored.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None or row[0] != RUNNING:
+                return
+            seq = self._conn.execute(
+                "SELECT COALESCE(MAX(seq), 0) + 1 FROM job_events WHERE job_id = ?", (job_id,)
+            ).fetchone()[0]
+            self._conn.execute(
+                "INSERT INTO job_events (job_id, seq, stage, data, created_at) VALUES (?, ?, ?, ?, ?)",
+                (job_id, seq, stage, json.dumps(data or {}, default=str), time.time())
+            )
+            self._conn.commit()
+
+    def get(self, job_id: str, include_result: bool = True) -> Optional[Dict]:
+        """
+        Current state of a job
+
+        Args:
+            job_id: Job id
+            include_result: Whether to decode and include the result
+
+        Returns:
+            Job dict or None if the id is unknown
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, kind, params, status, result, error, attempts, created_at, updated_at "
+                "FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        job = {
+            'job_id': row[0],
+            'kind': row[1],
+            'params': json.loads(row[2]),
+            'status': row[3],
+            'error': row[5],
+            'attempts': row[6],
+            'created_at': row[7],
+            'updated_at': row[8],
+        }
+        if include_result:
+            job['result'] = json.loads(row[4]) if row[4] else None
+        return job
+
+    def events(self, job_id: str, after_seq: int = 0) -> List[Dict]:
+        """Progress events of a job with a sequence number above after_seq"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, stage, data, created_at FROM job_events "
+                "WHERE job_id = ? AND seq > ? ORDER BY seq",
+                (job_id, after_seq)
+            ).fetchall()
+        return [
+            {'seq': seq, 'stage': stage, 'data': json.loads(data) if data else {}, 'created_at': created_at}
+            for seq, stage, data, created_at in rows
+        ]
+
+    def stats(self) -> Dict:
+        """Number of stored jobs per state"""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        stats = {status: 0 for status in (QUEUED, RUNNING, SUCCEEDED, FAILED)}
+        stats.update(dict(rows))
+        stats['max_workers'] = self.max_workers
+        return stats
+
+    def shutdown(self, wait: bool = False):
+        """Stop accepting work; unfinished jobs are resumed by the next start()"""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+_queues: Dict[str, JobQueue] = {}
+_queues_lock = threading.Lock()
+
+
+def get_job_queue(name: str, max_workers: int = DEFAULT_JOB_WORKERS,
+                  data_dir: Optional[str] = None) -> JobQueue:
+    """
+    Process-wide job queue for a name (one SQLite file per queue)
+
+    Args:
+        name: Queue name, also used as the file name
+        max_workers: Maximum number of jobs running at once
+        data_dir: Directory for the queue file (defaults to the cache directory)
+
+    Returns:
+        Shared JobQueue (the first caller's max_workers wins)
+    """
+    with _queues_lock:
+        queue = _queues.get(name)
+        if queue is None:
+            db_path = os.path.join(data_dir or CACHE_DIR, f"{name}.jobs.sqlite3")
+            queue = JobQueue(db_path, max_workers)
+            _queues[name] = queue
+        return queue
@@ -1,4 +1,4 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form,Query
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form,Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 from typing import Dict, List, Optional, Union
@@ -8,6 +8,8 @@ import logging
 from datetime import datetime
 import os
 import tempfile
+import threading
+import io
 import uuid
 import requests
 import tempfile
@@ -17,20 +19,25 @@ import pandas as pd
 # Import your existing classes
 from LCA.file1 import EnhancedLCAModel, LCAResult
 from LCA.alternative import EcoFriendlyAlternativesFinder
+from LCA.alternatives_table import AlternativesTable
 from LCA.comparison import ProductComparisonLCA
-from ocr.extraction_json import extract_label_from_image
+from ocr.extraction_json import MAX_IMAGE_BYTES, extract_label_from_bytes, extract_label_from_image
+from multipart.multipart import MultipartParser, parse_options_header
 import sys
 import os
-from Agents.satellite_analyst_1 import SustainabilityIntelligenceSystem
+from Agents.satellite_analyst_1 import SustainabilityIntelligenceSystem, cached_company_analysis
+from Agents.brand_registry import get_brand_registry, seed_brand_registry
 from dotenv import load_dotenv
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 import shutil
 from groq import Groq
-from ocr.url import ProductNameExtractor, get_product_name
+from ocr.url import ExtractorPool, ProductNameExtractor, TIER_STATS, cached_product_name
 from urllib.parse import urlparse
-from LCA.product_matching import CosmeticsSearcher
-from ocr.barcode import lookup_upc_product
-from ocr.url import get_product_name
+from LCA.product_matching import SharedCosmeticsSearcher
+from cache_store import all_cache_stats
+from job_queue import FINISHED_STATES, get_job_queue
+from rate_limit import all_rate_limiter_stats
+from ocr.barcode import get_barcode_store, lookup_upc_product, seed_barcode_store
 load_dotenv()
 
 # Configure logging
@@ -53,15 +60,39 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Dataset paths
+MERGED_DATASET_PATH = os.getenv("MERGED_DATASET_PATH", "/Users/prishabirla/Desktop/ADT/final/ocr/merged_dataset.csv")
+ALTERNATIVES_TABLE_PATH = os.getenv(
+    "ALTERNATIVES_TABLE_PATH",
+    os.path.splitext(MERGED_DATASET_PATH)[0] + "_alternatives.sqlite3"
+)
+
+# Warm Selenium browsers kept for URL extraction
+EXTRACTOR_POOL_SIZE = int(os.getenv("EXTRACTOR_POOL_SIZE", "2"))
+EXTRACTOR_FAST_LOAD = os.getenv("EXTRACTOR_FAST_LOAD", "1") == "1"
+
+# Maximum number of products accepted by the batch matching endpoints
+MAX_BATCH_PRODUCTS = int(os.getenv("MAX_BATCH_PRODUCTS", "20000"))
+
+# Company analyses run at once by the background job queue
+ANALYSIS_JOB_WORKERS = int(os.getenv("ANALYSIS_JOB_WORKERS", "2"))
+# Seconds between job progress checks and between keep-alive comments on the SSE stream
+JOB_EVENT_POLL_SECONDS = 0.5
+JOB_KEEPALIVE_SECONDS = 15
+
 # Global instances
 lca_model = None
 alternatives_finder = None
+alternatives_table = None
+alternatives_refresh_lock = threading.Lock()
+cosmetics_searcher = None
 sustainability_system = None
 comparison_system = None
 whisper_model = None
 tts_engine = None
 groq_client = None
 product_extractor = None
+analysis_jobs = None
 conversation_sessions = {}
 audio_files_storage = {}
 
@@ -69,7 +100,7 @@ audio_files_storage = {}
 # Initialize models on startup
 @app.on_event("startup")
 async def startup_event():
-    global lca_model, alternatives_finder, sustainability_system, comparison_system, whisper_model, tts_engine, groq_client, product_extractor
+    global lca_model, alternatives_finder, alternatives_table, cosmetics_searcher, sustainability_system, comparison_system, whisper_model, tts_engine, groq_client, product_extractor, analysis_jobs
     try:
         logger.info("Starting system initialization...")
         
@@ -100,12 +131,50 @@ async def startup_event():
         try:
             logger.info("Initializing Alternatives Finder...")
             alternatives_finder = EcoFriendlyAlternativesFinder(
-                csv_file_path="/Users/prishabirla/Desktop/ADT/final/ocr/merged_dataset.csv"
+                csv_file_path=MERGED_DATASET_PATH
             )
             logger.info("✅ Alternatives Finder initialized successfully")
         except Exception as e:
             logger.error(f"❌ Failed to initialize Alternatives Finder: {e}")
             alternatives_finder = None
+
+        # Initialize precomputed alternatives table (depends on Alternatives Finder)
+        try:
+            if alternatives_finder:
+                logger.info("Initializing Alternatives Table...")
+                alternatives_table = AlternativesTable(ALTERNATIVES_TABLE_PATH)
+                if alternatives_table.is_stale(MERGED_DATASET_PATH):
+                    start_alternatives_table_refresh(reload_finder=False)
+                logger.info("✅ Alternatives Table initialized successfully")
+        except Exception as e:
+            logger.error(f"❌ Failed to initialize Alternatives Table: {e}")
+            alternatives_table = None
+
+        # Initialize shared Cosmetics Searcher (used by barcode/URL lookups)
+        try:
+            logger.info("Initializing Cosmetics Searcher...")
+            cosmetics_searcher = SharedCosmeticsSearcher(
+                csv_file_path=MERGED_DATASET_PATH,
+                tavily_api_key=os.environ.get('TAVILY_API_KEY')
+            )
+            logger.info("✅ Cosmetics Searcher initialized successfully")
+        except Exception as e:
+            logger.error(f"❌ Failed to initialize Cosmetics Searcher: {e}")
+            cosmetics_searcher = None
+
+        # Seed the local barcode store so catalog barcodes never hit UPCItemDB
+        try:
+            seeded = seed_barcode_store(MERGED_DATASET_PATH)
+            logger.info(f"✅ Barcode store seeded with {seeded} catalog barcodes")
+        except Exception as e:
+            logger.warning(f"❌ Failed to seed barcode store: {e}")
+
+        # Seed the brand -> company registry so catalog brands skip LLM resolution
+        try:
+            seeded = seed_brand_registry(MERGED_DATASET_PATH)
+            logger.info(f"✅ Brand registry seeded with {seeded} catalog brands")
+        except Exception as e:
+            logger.warning(f"❌ Failed to seed brand registry: {e}")
         
         # Initialize Groq client
         try:
@@ -161,6 +230,16 @@ async def startup_event():
             logger.error(f"❌ Failed to initialize Sustainability Intelligence System: {e}")
             sustainability_system = None
 
+        # Initialize the persistent job queue for background company analyses
+        try:
+            analysis_jobs = get_job_queue("company_analysis", max_workers=ANALYSIS_JOB_WORKERS)
+            analysis_jobs.register("company_analysis", run_company_analysis_job)
+            resumed = analysis_jobs.start()
+            logger.info(f"✅ Analysis job queue ready ({resumed} unfinished jobs resumed)")
+        except Exception as e:
+            logger.error(f"❌ Failed to initialize analysis job queue: {e}")
+            analysis_jobs = None
+
         # Initialize Whisper model
         try:
             logger.info("Loading Whisper model...")
@@ -188,11 +267,13 @@ async def startup_event():
             logger.warning(f"❌ Failed to initialize TTS engine: {e}")
             tts_engine = None
 
-        # Initialize Product Name Extractor
+        # Initialize Product Name Extractor pool (warm headless browsers)
         try:
             logger.info("Initializing Product Name Extractor...")
-            product_extractor = ProductNameExtractor(headless=True)
-            logger.info("✅ Product Name Extractor initialized successfully")
+            product_extractor = ExtractorPool(
+                size=EXTRACTOR_POOL_SIZE, headless=True, fast_load=EXTRACTOR_FAST_LOAD
+            )
+            logger.info(f"✅ Product Name Extractor initialized successfully ({EXTRACTOR_POOL_SIZE} browsers)")
         except Exception as e:
             logger.warning(f"❌ Failed to initialize Product Name Extractor: {e}")
             product_extractor = None
@@ -205,10 +286,13 @@ async def startup_event():
         logger.info(f"Comparison System: {'✅ Ready' if comparison_system else '❌ Failed'}")
         logger.info(f"Sustainability System: {'✅ Ready' if sustainability_system else '❌ Failed'}")
         logger.info(f"Alternatives Finder: {'✅ Ready' if alternatives_finder else '❌ Failed'}")
+        logger.info(f"Alternatives Table: {'✅ Ready' if alternatives_table else '❌ Failed'}")
+        logger.info(f"Cosmetics Searcher: {'✅ Ready' if cosmetics_searcher else '❌ Failed'}")
         logger.info(f"Groq Client: {'✅ Ready' if groq_client else '❌ Failed'}")
         logger.info(f"Whisper Model: {'✅ Ready' if whisper_model else '❌ Failed'}")
         logger.info(f"TTS Engine: {'✅ Ready' if tts_engine else '❌ Failed'}")
         logger.info(f"Product Extractor: {'✅ Ready' if product_extractor else '❌ Failed'}")
+        logger.info(f"Analysis Job Queue: {'✅ Ready' if analysis_jobs else '❌ Failed'}")
         logger.info("="*50)
         
     except Exception as e:
@@ -216,6 +300,53 @@ async def startup_event():
         import traceback
         logger.error(f"Traceback: {traceback.format_exc()}")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release long-lived resources"""
+    if product_extractor:
+        product_extractor.close()
+    if analysis_jobs:
+        analysis_jobs.shutdown()
+
+def extract_name_uncached(url: str, method: str = "scrape") -> Optional[str]:
+    """Extract a product name with a pooled browser, or a one-off browser if the pool is unavailable"""
+    if not product_extractor:
+        # Not get_product_name(): it hides transient failures, which must not be cached
+        with ProductNameExtractor(headless=True) as extractor:
+            return extractor.extract_product_name(url, method=method)
+    return product_extractor.extract_product_name(url, method=method)
+
+def extract_name_with_pool(url: str, method: str = "scrape") -> Optional[str]:
+    """Extract a product name, serving repeat (canonically equal) URLs from the URL cache"""
+    return cached_product_name(url, extract_name_uncached, method=method)
+
+def refresh_alternatives_table(reload_finder: bool = True):
+    """Reload the alternatives finder if needed and incrementally rebuild the table"""
+    global alternatives_finder
+    if not alternatives_refresh_lock.acquire(blocking=False):
+        return  # A refresh is already running
+    try:
+        if reload_finder:
+            logger.info("Dataset changed, reloading Alternatives Finder...")
+            alternatives_finder = EcoFriendlyAlternativesFinder(csv_file_path=MERGED_DATASET_PATH)
+        logger.info("Building alternatives table...")
+        stats = alternatives_table.build(alternatives_finder, dataset_path=MERGED_DATASET_PATH)
+        logger.info(f"✅ Alternatives table ready: {stats}")
+    except Exception as e:
+        logger.error(f"❌ Failed to refresh alternatives table: {e}")
+    finally:
+        alternatives_refresh_lock.release()
+
+def start_alternatives_table_refresh(reload_finder: bool = True):
+    """Run refresh_alternatives_table in the background unless one is already running"""
+    if alternatives_refresh_lock.locked():
+        return
+    threading.Thread(
+        target=refresh_alternatives_table,
+        kwargs={"reload_finder": reload_finder},
+        daemon=True
+    ).start()
+
 # Pydantic models for request/response
 class ProductInput(BaseModel):
     product_name: str = Field(..., description="Name of the product")
@@ -240,6 +371,10 @@ class ProductURLResponse(BaseModel):
     extraction_method: str
     message: str
 
+class CompanyAnalysisJobInput(BaseModel):
+    company_name: str
+    product_name: str = ""
+
 class CompareProductsInput(BaseModel):
     product1: ProductInput
     product2: ProductInput
@@ -300,6 +435,17 @@ class ChatResponse(BaseModel):
     session_id: str
     audio_url: Optional[str] = None
 
+class BatchProductItem(BaseModel):
+    product_name: str = Field(..., description="Name of the product")
+    brand: str = Field(default="Unknown", description="Brand name")
+    category: str = Field(default="Unknown", description="Product category")
+    weight: str = Field(default="Unknown", description="Product weight/volume")
+    ingredient_list: str = Field(default="", description="Comma-separated list of ingredients")
+
+class BatchMatchInput(BaseModel):
+    products: List[BatchProductItem]
+    min_overall_score: float = Field(default=0.5, description="Minimum overall score for fuzzy matches")
+
 def build_api_knowledge_context():
     """Build comprehensive context about available API functionalities"""
     api_knowledge = {
@@ -537,27 +683,145 @@ async def startup_status():
     return {
         "lca_model": lca_model is not None,
         "alternatives_finder": alternatives_finder is not None,
+        "alternatives_table": alternatives_table is not None,
+        "cosmetics_searcher": cosmetics_searcher is not None,
         "comparison_system": comparison_system is not None,
         "sustainability_system": sustainability_system is not None,
         "groq_client": groq_client is not None,
         "product_extractor": product_extractor is not None,  # Add this line
+        "product_extractor_pool": product_extractor.get_stats() if product_extractor else None,
+        "analysis_jobs": analysis_jobs.stats() if analysis_jobs else None,
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/api/cache-stats")
+async def cache_stats():
+    """Hit rates and sizes of the persistent lookup caches"""
+    return {
+        "caches": all_cache_stats(),
+        "barcode_store": get_barcode_store().get_stats(),
+        "brand_registry": get_brand_registry().get_stats(),
+        "certification_store": sustainability_system.cert_checker.evidence_store.get_stats() if sustainability_system else None,
+        "rate_limiters": all_rate_limiter_stats(),
+        "llm_client": sustainability_system.groq_client.stats() if sustainability_system else None,
         "timestamp": datetime.now().isoformat()
     }
+
+@app.get("/api/url-extraction-stats")
+async def url_extraction_stats():
+    """Per-domain success rates of the static and browser URL extraction tiers"""
+    return {
+        "domains": TIER_STATS.snapshot(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+def parse_label_result(raw_result: str) -> Dict:
+    """Convert the vision model's raw JSON string to a dict for clean API output"""
+    try:
+        return json.loads(raw_result)
+    except json.JSONDecodeError:
+        # If Groq returns something non-JSON, return as plain text
+        return {"raw_output": raw_result}
+
+async def read_multipart_files(request: Request, max_file_bytes: int, max_files: int = 2) -> Dict[str, bytes]:
+    """
+    Stream a multipart/form-data body into in-memory buffers
+
+    Unlike UploadFile (which spools parts over 1MB to a temporary file),
+    nothing touches disk; reading stops as soon as a part exceeds
+    max_file_bytes.
+
+    Returns:
+        Dictionary mapping form field names to the bytes of their file parts
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise HTTPException(status_code=400, detail="Expected a multipart/form-data body")
+
+    content_length = int(request.headers.get("content-length") or 0)
+    if content_length > max_files * max_file_bytes + 64 * 1024:
+        raise HTTPException(status_code=413, detail=f"Upload exceeds {max_file_bytes} bytes per image")
+
+    files: Dict[str, bytes] = {}
+    state = {"headers": {}, "field": b"", "value": b"", "buffer": bytearray(), "error": None}
+
+    def on_part_begin():
+        state["headers"] = {}
+        state["buffer"] = bytearray()
+
+    def on_header_field(data, start, end):
+        state["field"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        state["value"] += data[start:end]
+
+    def on_header_end():
+        state["headers"][state["field"].lower()] = state["value"]
+        state["field"] = state["value"] = b""
+
+    def on_part_data(data, start, end):
+        if state["error"]:
+            return
+        state["buffer"].extend(data[start:end])
+        if len(state["buffer"]) > max_file_bytes:
+            state["error"] = (413, f"Upload exceeds {max_file_bytes} bytes per image")
+
+    def on_part_end():
+        _, disposition = parse_options_header(state["headers"].get(b"content-disposition", b""))
+        if b"filename" not in disposition:
+            return  # Plain form fields are ignored
+        if len(files) >= max_files:
+            state["error"] = (400, f"At most {max_files} files are accepted")
+            return
+        name = disposition.get(b"name", b"").decode("latin-1")
+        files[name] = bytes(state["buffer"])
+
+    parser = MultipartParser(params[b"boundary"], {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+    async for chunk in request.stream():
+        parser.write(chunk)
+        if state["error"]:
+            raise HTTPException(status_code=state["error"][0], detail=state["error"][1])
+    parser.finalize()
+    if state["error"]:
+        raise HTTPException(status_code=state["error"][0], detail=state["error"][1])
+    return files
+
 @app.post("/extract-picture")
 def extract_label(request: ImagePathRequest):
     try:
-        # Call your updated extraction function with two image paths
+        # Call your updated extraction function with two image paths (remote ones are fetched concurrently)
         raw_result = extract_label_from_image(request.image_path1, request.image_path2)
+        return parse_label_result(raw_result)
 
-        # Convert raw JSON string to dict for clean API output
-        try:
-            parsed_result = json.loads(raw_result)
-        except json.JSONDecodeError:
-            # If Groq returns something non-JSON, return as plain text
-            parsed_result = {"raw_output": raw_result}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        return parsed_result
+@app.post("/extract-picture/upload")
+async def extract_label_upload(request: Request):
+    """
+    Extract label details from two images uploaded as multipart/form-data
+    (file fields image1 and image2). Images are kept in memory and sent to
+    the vision API straight from those buffers.
+    """
+    try:
+        files = await read_multipart_files(request, MAX_IMAGE_BYTES)
+        if "image1" not in files or "image2" not in files:
+            raise HTTPException(status_code=400, detail="Upload two files as image1 and image2")
+        if not files["image1"] or not files["image2"]:
+            raise HTTPException(status_code=400, detail="Uploaded image is empty")
 
+        raw_result = await asyncio.to_thread(extract_label_from_bytes, files["image1"], files["image2"])
+        return parse_label_result(raw_result)
+
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
@@ -567,8 +831,8 @@ async def get_product_by_barcode(barcode: str):
     Get product information by barcode and match with cosmetics database
     """
     try:
-        # Step 1: Get product info from UPC API
-        barcode_data = lookup_upc_product(barcode)
+        # Step 1: Get product info (local barcode store, then UPC API off the event loop)
+        barcode_data = await asyncio.to_thread(lookup_upc_product, barcode)
         if not barcode_data or "error" in barcode_data:
             return {
                 "success": False,
@@ -586,10 +850,8 @@ async def get_product_by_barcode(barcode: str):
 
         # Step 2: Search in cosmetics database
         try:
-            cosmetics_searcher = CosmeticsSearcher(
-                csv_file_path="/Users/prishabirla/Desktop/ADT/final/ocr/merged_dataset.csv",
-                tavily_api_key=os.environ.get('TAVILY_API_KEY')
-            )
+            if cosmetics_searcher is None:
+                raise RuntimeError("Cosmetics searcher not initialized")
             
             # Create product dict for matching
             user_product = {
@@ -666,8 +928,8 @@ async def get_product_by_url(url: str):
     Get product information from URL and match with cosmetics database
     """
     try:
-        # Step 1: Extract product name from URL
-        product_name = get_product_name(url)
+        # Step 1: Extract product name from URL (pooled browser, off the event loop)
+        product_name = await asyncio.to_thread(extract_name_with_pool, url)
         if not product_name:
             return {
                 "success": False,
@@ -677,10 +939,8 @@ async def get_product_by_url(url: str):
 
         # Step 2: Search in cosmetics database
         try:
-            cosmetics_searcher = CosmeticsSearcher(
-                csv_file_path="/Users/prishabirla/Desktop/ADT/final/ocr/merged_dataset.csv",
-                tavily_api_key=os.environ.get('TAVILY_API_KEY')
-            )
+            if cosmetics_searcher is None:
+                raise RuntimeError("Cosmetics searcher not initialized")
             
             # Create product dict for matching
             user_product = {
@@ -761,6 +1021,92 @@ async def get_product_by_url(url: str):
         }
 
 
+def stream_batch_matches(user_products: List[Dict], min_overall_score: float):
+    """Yield catalog matches for a batch of products as NDJSON lines"""
+    searcher = cosmetics_searcher.get()
+    for result in searcher.search_products_batch(user_products, min_overall_score=min_overall_score):
+        yield json.dumps(result, default=str) + "\n"
+
+def check_batch_size(count: int):
+    """Reject empty or oversized batches before any matching work starts"""
+    if count == 0:
+        raise HTTPException(status_code=400, detail="No products provided")
+    if count > MAX_BATCH_PRODUCTS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {count} products (max {MAX_BATCH_PRODUCTS})"
+        )
+
+@app.post("/api/match-products/batch")
+async def match_products_batch(batch_input: BatchMatchInput):
+    """
+    Match many products against the cosmetics database.
+    Streams one JSON search result per line (NDJSON) in input order.
+    """
+    try:
+        if cosmetics_searcher is None:
+            raise HTTPException(status_code=500, detail="Cosmetics searcher not initialized")
+        check_batch_size(len(batch_input.products))
+        
+        user_products = [product.model_dump() for product in batch_input.products]
+        logger.info(f"Batch matching {len(user_products)} products")
+        return StreamingResponse(
+            stream_batch_matches(user_products, batch_input.min_overall_score),
+            media_type="application/x-ndjson"
+        )
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in batch matching: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to match products: {str(e)}")
+
+@app.post("/api/match-products/batch-csv")
+async def match_products_batch_csv(file: UploadFile = File(...), min_overall_score: float = Form(0.5)):
+    """
+    Match a partner SKU spreadsheet (CSV) against the cosmetics database.
+    Requires a product_name column; brand, category, weight/size and
+    ingredient_list/ingredients columns are used when present.
+    Streams one JSON search result per line (NDJSON) in row order.
+    """
+    try:
+        if cosmetics_searcher is None:
+            raise HTTPException(status_code=500, detail="Cosmetics searcher not initialized")
+        
+        contents = await file.read()
+        sku_df = pd.read_csv(io.BytesIO(contents), dtype=str).fillna('')
+        sku_df.columns = sku_df.columns.str.strip().str.lower()
+        if 'product_name' not in sku_df.columns:
+            raise HTTPException(status_code=400, detail="CSV must contain a product_name column")
+        check_batch_size(len(sku_df))
+        
+        def column(*candidates, default=''):
+            for candidate in candidates:
+                if candidate in sku_df.columns:
+                    return sku_df[candidate].str.strip()
+            return pd.Series(default, index=sku_df.index)
+        
+        user_products = pd.DataFrame({
+            'product_name': column('product_name'),
+            'brand': column('brand', default='Unknown'),
+            'category': column('category', default='Unknown'),
+            'weight': column('weight', 'size', default='Unknown'),
+            'ingredient_list': column('ingredient_list', 'ingredients'),
+        }).to_dict('records')
+        
+        logger.info(f"Batch matching {len(user_products)} products from {file.filename}")
+        return StreamingResponse(
+            stream_batch_matches(user_products, min_overall_score),
+            media_type="application/x-ndjson"
+        )
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in CSV batch matching: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to match products: {str(e)}")
+
+
 @app.post("/api/extract-product-name", response_model=ProductURLResponse)
 async def extract_product_name_from_url(url_input: ProductURLInput):
     """
@@ -780,16 +1126,12 @@ async def extract_product_name_from_url(url_input: ProductURLInput):
         
         logger.info(f"Extracting product name from {domain} using method: {url_input.extraction_method}")
         
-        if not product_extractor:
-            # Fallback to simple function if extractor not initialized
-            product_name = get_product_name(url_input.product_url)
-        else:
-            # Use the initialized extractor with context manager pattern
-            with product_extractor as extractor:
-                product_name = extractor.extract_product_name(
-                    url_input.product_url, 
-                    method=url_input.extraction_method
-                )
+        # Pooled browsers let concurrent requests extract in parallel
+        product_name = await asyncio.to_thread(
+            extract_name_with_pool,
+            url_input.product_url,
+            url_input.extraction_method
+        )
         
         if product_name:
             return ProductURLResponse(
@@ -884,11 +1226,23 @@ async def get_alternatives(product_input: ProductInput, num_alternatives: int =
             'manufacturing_loc': product_input.manufacturing_loc
         }
         
-        logger.info(f"Finding alternatives for product: {product_input.product_name}")
-        result = alternatives_finder.search_and_find_alternatives(
-            user_product, 
-            num_alternatives=num_alternatives
-        )
+        # Serve catalog products from the precomputed table, live scoring otherwise
+        alternatives = None
+        if alternatives_table:
+            if alternatives_table.is_stale(MERGED_DATASET_PATH):
+                start_alternatives_table_refresh()
+            else:
+                alternatives = alternatives_table.lookup(user_product, num_alternatives)
+
+        if alternatives is not None:
+            logger.info(f"Serving precomputed alternatives for product: {product_input.product_name}")
+            result = alternatives_finder.format_alternatives_result(user_product, alternatives)
+        else:
+            logger.info(f"Finding alternatives for product: {product_input.product_name}")
+            result = alternatives_finder.search_and_find_alternatives(
+                user_product, 
+                num_alternatives=num_alternatives
+            )
         
         return AlternativesResponse(
             success=True,
@@ -902,6 +1256,87 @@ async def get_alternatives(product_input: ProductInput, num_alternatives: int =
         logger.error(f"Error finding alternatives: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to find alternatives: {str(e)}")
 
+def run_company_analysis(company_name: str, product_name: str = "", progress=None):
+    """
+    Run (or fetch from cache) the sustainability analysis for a company
+
+    Returns:
+        Tuple of (analysis dict, cache status)
+    """
+    def run_analysis():
+        if product_name:
+            # Analyze with product context
+            return sustainability_system.analyze_from_company_product(company_name, product_name, progress=progress)
+        # Analyze with default parameters
+        default_keywords = ["sustainability", "environmental", "packaging", "emissions"]
+        default_materials = ["Packaging", "Ingredients", "Manufacturing", "Sourcing"]
+        return sustainability_system.analyze_company(
+            company_name, default_keywords, default_materials, progress=progress
+        )
+    
+    # Fresh results come straight from the cache; stale ones are served while a refresh runs
+    analysis_results, cache_status = cached_company_analysis(company_name, product_name, run_analysis)
+    logger.info(f"Company analysis for {company_name} served from cache status: {cache_status}")
+    if cache_status == "miss":
+        logger.info(f"Company analysis stage timings for {company_name}: {analysis_results.get('stage_timings', {})}")
+    return analysis_results, cache_status
+
+def build_company_info_response(company_name: str, analysis_results: Dict) -> CompanyInfoResponse:
+    """Summarise a company analysis into the company-info API response"""
+    # Extract key information for API response
+    news_analysis = analysis_results.get("news_analysis", {})
+    cert_analysis = analysis_results.get("certification_analysis", [])
+    executive_summary = analysis_results.get("executive_summary", {})
+    evidence_summary = analysis_results.get("evidence_based_summary", "No evidence-based summary available.")
+    
+    # Calculate overall sustainability score
+    sentiment_score = news_analysis.get("sentiment_score", 50.0)
+    cert_rate = executive_summary.get("certification_rate", 0.0)
+    sustainability_score = (sentiment_score * 0.7 + cert_rate * 0.3)  # Weighted score
+    
+    # Extract certifications found
+    verified_certs = []
+    for cert in cert_analysis:
+        if cert.get("status") == "Verified":
+            cert_found = cert.get("certification_found", "Unknown")
+            # Handle case where certification_found is a list
+            if isinstance(cert_found, list):
+                verified_certs.extend([str(c) for c in cert_found])
+            else:
+                verified_certs.append(str(cert_found))
+    verified_certs = list(set([cert for cert in verified_certs if cert and cert != "Unknown"]))
+
+    return CompanyInfoResponse(
+        success=True,
+        company_name=company_name,
+        analysis_summary=executive_summary,
+        news_analysis=news_analysis,
+        certification_analysis=cert_analysis,
+        evidence_based_summary=evidence_summary,
+        sustainability_score=round(sustainability_score, 1),
+        certifications=verified_certs,  # Now guaranteed to be a list of strings
+        message=f"Successfully retrieved real-time sustainability analysis for {company_name}"
+    )
+
+def run_company_analysis_job(params: Dict, report) -> Dict:
+    """Job queue handler for background company analyses"""
+    if not sustainability_system:
+        raise RuntimeError("Sustainability system not initialized")
+    company_name = params["company_name"]
+    reported_stages = set()
+
+    def progress(stage, data=None):
+        reported_stages.add(stage)
+        report(stage, data)
+
+    analysis_results, cache_status = run_company_analysis(
+        company_name, params.get("product_name", ""), progress=progress
+    )
+    # Cache hits, and misses that waited on another job's analysis, never ran the pipeline here
+    if "summary_ready" not in reported_stages:
+        report("summary_ready", {"cache_status": cache_status})
+    return build_company_info_response(company_name, analysis_results).model_dump()
+
 # Route 3: Get Company Sustainability Info
 @app.get("/api/company-info/{company_name}", response_model=CompanyInfoResponse)
 async def get_company_info(company_name: str, product_name: str = ""):
@@ -916,57 +1351,78 @@ async def get_company_info(company_name: str, product_name: str = ""):
             return await get_company_info_fallback(company_name)
         
         logger.info(f"Fetching comprehensive sustainability analysis for: {company_name}")
-        
-        if product_name:
-            # Analyze with product context
-            analysis_results = sustainability_system.analyze_from_company_product(company_name, product_name)
-        else:
-            # Analyze with default parameters
-            default_keywords = ["sustainability", "environmental", "packaging", "emissions"]
-            default_materials = ["Packaging", "Ingredients", "Manufacturing", "Sourcing"]
-            analysis_results = sustainability_system.analyze_company(company_name, default_keywords, default_materials)
-        
-        # Extract key information for API response
-        news_analysis = analysis_results.get("news_analysis", {})
-        cert_analysis = analysis_results.get("certification_analysis", [])
-        executive_summary = analysis_results.get("executive_summary", {})
-        evidence_summary = analysis_results.get("evidence_based_summary", "No evidence-based summary available.")
-        
-        # Calculate overall sustainability score
-        sentiment_score = news_analysis.get("sentiment_score", 50.0)
-        cert_rate = executive_summary.get("certification_rate", 0.0)
-        sustainability_score = (sentiment_score * 0.7 + cert_rate * 0.3)  # Weighted score
-        
-        # Extract certifications found
-        verified_certs = []
-        for cert in cert_analysis:
-            if cert.get("status") == "Verified":
-                cert_found = cert.get("certification_found", "Unknown")
-                # Handle case where certification_found is a list
-                if isinstance(cert_found, list):
-                    verified_certs.extend([str(c) for c in cert_found])
-                else:
-                    verified_certs.append(str(cert_found))
-        verified_certs = list(set([cert for cert in verified_certs if cert and cert != "Unknown"]))
-
-        
-        return CompanyInfoResponse(
-            success=True,
-            company_name=company_name,
-            analysis_summary=executive_summary,
-            news_analysis=news_analysis,
-            certification_analysis=cert_analysis,
-            evidence_based_summary=evidence_summary,
-            sustainability_score=round(sustainability_score, 1),
-            certifications=verified_certs,  # Now guaranteed to be a list of strings
-            message=f"Successfully retrieved real-time sustainability analysis for {company_name}"
-            )
+        analysis_results, _ = await asyncio.to_thread(run_company_analysis, company_name, product_name)
+        return build_company_info_response(company_name, analysis_results)
         
     except Exception as e:
         logger.error(f"Error fetching company sustainability analysis: {e}")
         # Fallback to mock data on error
         return await get_company_info_fallback(company_name)
 
+@app.post("/api/company-info/jobs")
+async def submit_company_info_job(job_input: CompanyAnalysisJobInput):
+    """
+    Queue a company sustainability analysis and return its job id immediately.
+    Poll /api/company-info/jobs/{job_id} or stream /api/company-info/jobs/{job_id}/events.
+    """
+    try:
+        if not analysis_jobs or not sustainability_system:
+            raise HTTPException(status_code=500, detail="Company analysis jobs not available")
+        
+        job_id = await asyncio.to_thread(analysis_jobs.submit, "company_analysis", job_input.model_dump())
+        logger.info(f"Queued company analysis job {job_id} for: {job_input.company_name}")
+        return {"success": True, "job_id": job_id, "status": "queued"}
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error queuing company analysis job: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to queue analysis: {str(e)}")
+
+@app.get("/api/company-info/jobs/{job_id}")
+async def get_company_info_job(job_id: str):
+    """Status, progress events and (when finished) the result of an analysis job"""
+    if not analysis_jobs:
+        raise HTTPException(status_code=500, detail="Company analysis jobs not available")
+    job = await asyncio.to_thread(analysis_jobs.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    job["events"] = await asyncio.to_thread(analysis_jobs.events, job_id)
+    return job
+
+async def stream_job_events(job_id: str):
+    """Yield a job's progress events as Server-Sent Events until it finishes"""
+    last_seq = 0
+    idle = 0.0
+    while True:
+        job = await asyncio.to_thread(analysis_jobs.get, job_id, False)
+        events = await asyncio.to_thread(analysis_jobs.events, job_id, last_seq)
+        for event in events:
+            last_seq = event["seq"]
+            yield f"id: {event['seq']}\nevent: progress\ndata: {json.dumps(event, default=str)}\n\n"
+        if job["status"] in FINISHED_STATES:
+            final = await asyncio.to_thread(analysis_jobs.get, job_id)
+            yield f"event: {job['status']}\ndata: {json.dumps(final, default=str)}\n\n"
+            return
+        idle = 0.0 if events else idle + JOB_EVENT_POLL_SECONDS
+        if idle >= JOB_KEEPALIVE_SECONDS:
+            idle = 0.0
+            yield ": keep-alive\n\n"
+        await asyncio.sleep(JOB_EVENT_POLL_SECONDS)
+
+@app.get("/api/company-info/jobs/{job_id}/events")
+async def stream_company_info_job(job_id: str):
+    """Stream stage-level progress of an analysis job (Server-Sent Events)"""
+    if not analysis_jobs:
+        raise HTTPException(status_code=500, detail="Company analysis jobs not available")
+    if await asyncio.to_thread(analysis_jobs.get, job_id, False) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return StreamingResponse(
+        stream_job_events(job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
+
 
 # Route 4: Compare Two Products
 @app.post("/api/compare-products", response_model=CompareResponse)
@@ -1,72 +1,168 @@
 import json
 import os
 import re
+import sys
+import threading
 from typing import Dict, Optional, List
 from dotenv import load_dotenv
+import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
+
+# Make sibling ocr modules and shared ML-Backend modules importable from any working directory
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, os.pardir))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+if CURRENT_DIR not in sys.path:
+    sys.path.append(CURRENT_DIR)
 
 # Import your existing classes
 from product_matching import CosmeticsSearcher  # Your product matching module
+from cache_store import get_cache
+from rate_limit import DEFAULT_ITEM_TIMEOUT, DEFAULT_MAX_WORKERS, get_rate_limiter, map_ordered
 
 load_dotenv()
 
-class EnhancedBarcodeProductPipeline:
-    def __init__(self, csv_file_path: str, tavily_api_key: str = None):
+UPC_API_URL = os.getenv("UPC_API_URL", "https://api.upcitemdb.com/prod/trial/lookup")
+
+# Lifetimes of stored UPCItemDB answers (seconds); "not found" answers expire sooner
+UPC_CACHE_TTL = float(os.getenv("UPC_CACHE_TTL", 90 * 24 * 3600))
+UPC_NEGATIVE_CACHE_TTL = float(os.getenv("UPC_NEGATIVE_CACHE_TTL", 24 * 3600))
+
+# UPCItemDB requests per second (the trial plan allows 6 per minute)
+UPC_RATE_LIMIT = float(os.getenv("UPC_RATE_LIMIT", 0.1))
+# Seconds a lookup may wait for the UPCItemDB rate limit before giving up
+UPC_RATE_WAIT_TIMEOUT = float(os.getenv("UPC_RATE_WAIT_TIMEOUT", 30))
+
+# Catalog columns that may hold a product's barcode
+CATALOG_BARCODE_COLUMNS = ['barcode', 'upc', 'ean', 'gtin']
+
+
+class RateLimitWaitTimeout(Exception):
+    """The UPCItemDB rate limit had no free slot within UPC_RATE_WAIT_TIMEOUT"""
+
+
+def normalize_barcode(barcode: str) -> str:
+    """Zero-pad a numeric barcode to GTIN-14 so UPC-A and EAN-13 forms of a code share a key"""
+    code = str(barcode).strip()
+    return code.zfill(14) if len(code) <= 14 else code
+
+
+def extract_weight_from_text(text: str):
+    """Extract weight like 400ml, 200 g, 1.5kg, etc. from a string."""
+    if not text:
+        return None
+    match = re.search(r"(\d+(?:\.\d+)?\s*(?:ml|g|kg|l))", text.lower().replace("-", " "))
+    return match.group(1) if match else None
+
+
+class BarcodeStore:
+    """
+    Local barcode -> product store in front of the UPCItemDB trial API.
+
+    Barcodes seeded from the catalog are answered from memory and never
+    reach the API. Other codes go through a persistent SQLite cache: found
+    products are kept for UPC_CACHE_TTL, "not found" answers for
+    UPC_NEGATIVE_CACHE_TTL, and concurrent lookups of the same code share
+    one request. Timeouts, rate limiting and other transient errors are not
+    cached.
+    """
+
+    def __init__(self, api_url: str = UPC_API_URL, cache_name: str = 'upc_lookup'):
         """
-        Initialize the enhanced barcode pipeline
-        
         Args:
-            csv_file_path: Path to the cosmetics CSV file
-            tavily_api_key: API key for Tavily search (optional)
+            api_url: UPCItemDB lookup endpoint
+            cache_name: Name of the persistent cache (see cache_store.get_cache)
         """
-        self.csv_file_path = csv_file_path
-        self.tavily_api_key = tavily_api_key or os.getenv('TAVILY_API_KEY')
-        self.upc_api_url = os.getenv("UPC_API_URL", "https://api.upcitemdb.com/prod/trial/lookup")
-        
-        # Initialize the cosmetics searcher with enhanced ingredient extraction
-        self.cosmetics_searcher = EnhancedCosmeticsSearcher(csv_file_path, self.tavily_api_key)
-    
-    def extract_weight_from_text(self, text: str):
-        """Extract weight like 400ml, 200 g, 1.5kg, etc. from a string."""
-        if not text:
-            return None
-        match = re.search(r"(\d+(?:\.\d+)?\s*(?:ml|g|kg|l))", text.lower().replace("-", " "))
-        return match.group(1) if match else None
+        self.api_url = api_url
+        self.cache = get_cache(cache_name, UPC_CACHE_TTL, UPC_NEGATIVE_CACHE_TTL)
+        self._catalog: Dict[str, Dict] = {}
+        self._stats = {'catalog_hits': 0, 'api_calls': 0}
+        self._lock = threading.Lock()
 
-    def lookup_upc_product(self, barcode: str):
+        # Keep-alive connections to the API across lookups
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=8))
+        self.session.headers.update({"Content-Type": "application/json"})
+
+    @staticmethod
+    def _catalog_weight(row: pd.Series) -> Optional[str]:
+        """Weight string for a catalog row (weight_value + weight_unit, else size)"""
+        value, unit = row.get('weight_value'), row.get('weight_unit')
+        if pd.notna(value) and pd.notna(unit) and str(value).strip() not in ('', '0'):
+            return f"{str(value).strip()}{str(unit).strip()}"
+        size = row.get('size')
+        return str(size).strip() if pd.notna(size) and str(size).strip() else None
+
+    def seed_from_catalog(self, csv_file_path: str) -> int:
         """
-        Look up a product by UPC code using UPCItemDB trial API.
-        Returns a dictionary with product details or None if not found.
+        Load every barcode in the catalog CSV into the in-memory store
+
+        Args:
+            csv_file_path: Path to the catalog (merged_dataset.csv)
+
+        Returns:
+            Number of barcodes loaded
         """
-        if not barcode or not barcode.isdigit():
-            return {"error": "Invalid barcode format"}
+        wanted = set(CATALOG_BARCODE_COLUMNS) | {'product_name', 'brand', 'weight_value', 'weight_unit', 'size'}
+        # Read as strings so long codes keep their digits and leading zeros
+        df = pd.read_csv(csv_file_path, usecols=lambda col: col.lower() in wanted, dtype=str)
+        df.columns = [col.lower() for col in df.columns]
+        barcode_columns = [col for col in CATALOG_BARCODE_COLUMNS if col in df.columns]
 
-        try:
-            response = requests.get(
-                self.upc_api_url,
-                params={"upc": barcode},
-                headers={"Content-Type": "application/json"},
-                timeout=10
-            )
-            response.raise_for_status()
-        except requests.Timeout:
-            return {"error": "API request timed out"}
-        except requests.RequestException as e:
-            return {"error": f"Error calling UPCItemDB: {e}"}
+        catalog = {}
+        for _, row in df.iterrows():
+            product = {
+                "product_name": row.get('product_name') if pd.notna(row.get('product_name')) else None,
+                "brand": row.get('brand') if pd.notna(row.get('brand')) else None,
+                "weight": self._catalog_weight(row),
+                "description": None,
+                "image_url": None
+            }
+            if not product["product_name"]:
+                continue
+            for col in barcode_columns:
+                code = str(row[col]).strip() if pd.notna(row[col]) else ''
+                if code.endswith('.0'):
+                    code = code[:-2]
+                if code.isdigit():
+                    catalog.setdefault(normalize_barcode(code), product)
 
-        try:
-            data = response.json()
-        except ValueError:
-            return {"error": "Could not parse API response as JSON"}
+        with self._lock:
+            self._catalog = catalog
+        print(f"Barcode store seeded with {len(catalog)} catalog barcodes")
+        return len(catalog)
+
+    def _fetch(self, barcode: str) -> Optional[Dict]:
+        """
+        Query UPCItemDB for a barcode
 
+        Returns:
+            Product dictionary, or None if the API has no product for the code.
+            Transient failures raise so they are not cached.
+
+        Raises:
+            RateLimitWaitTimeout: No request slot within UPC_RATE_WAIT_TIMEOUT
+        """
+        if not get_rate_limiter('upcitemdb', UPC_RATE_LIMIT).acquire(timeout=UPC_RATE_WAIT_TIMEOUT):
+            raise RateLimitWaitTimeout(f"No UPCItemDB request slot within {UPC_RATE_WAIT_TIMEOUT:.0f}s")
+        with self._lock:
+            self._stats['api_calls'] += 1
+        response = self.session.get(self.api_url, params={"upc": barcode}, timeout=10)
+        if response.status_code in (400, 404):
+            return None  # Invalid or unknown code
+        response.raise_for_status()
+
+        data = response.json()
         if data.get("code") != "OK" or not data.get("items"):
-            return {"error": "No product found or error in API response"}
+            return None
 
         item = data["items"][0]
         title = item.get("title", "")
         description = item.get("description", "")
         brand = item.get("brand", "")
-        weight = self.extract_weight_from_text(title) or self.extract_weight_from_text(description)
+        weight = extract_weight_from_text(title) or extract_weight_from_text(description)
 
         return {
             "product_name": title or None,
@@ -76,6 +172,100 @@ class EnhancedBarcodeProductPipeline:
             "image_url": item.get("images", [None])[0] if item.get("images") else None
         }
 
+    def lookup(self, barcode: str) -> Dict:
+        """
+        Look up a product by UPC/EAN code
+
+        Args:
+            barcode: Numeric barcode
+
+        Returns:
+            Dictionary with product details, or with an "error" key
+        """
+        if not barcode or not barcode.isdigit():
+            return {"error": "Invalid barcode format"}
+
+        key = normalize_barcode(barcode)
+        with self._lock:
+            product = self._catalog.get(key)
+            if product is not None:
+                self._stats['catalog_hits'] += 1
+                return dict(product)
+
+        try:
+            product = self.cache.get_or_compute(key, lambda: self._fetch(barcode))
+        except RateLimitWaitTimeout:
+            return {"error": "UPCItemDB rate limit reached, try again later"}
+        except requests.Timeout:
+            return {"error": "API request timed out"}
+        except ValueError:
+            return {"error": "Could not parse API response as JSON"}
+        except requests.RequestException as e:
+            return {"error": f"Error calling UPCItemDB: {e}"}
+
+        if product is None:
+            return {"error": "No product found or error in API response"}
+        return product
+
+    def get_stats(self) -> Dict:
+        """Catalog hits, API calls and size of the in-memory catalog"""
+        with self._lock:
+            return {**self._stats, 'catalog_barcodes': len(self._catalog)}
+
+
+_barcode_store = None
+_barcode_store_lock = threading.Lock()
+
+
+def get_barcode_store() -> BarcodeStore:
+    """Process-wide BarcodeStore"""
+    global _barcode_store
+    with _barcode_store_lock:
+        if _barcode_store is None:
+            _barcode_store = BarcodeStore()
+        return _barcode_store
+
+
+def seed_barcode_store(csv_file_path: str) -> int:
+    """Seed the shared BarcodeStore from the catalog CSV (see BarcodeStore.seed_from_catalog)"""
+    return get_barcode_store().seed_from_catalog(csv_file_path)
+
+
+def lookup_upc_product(barcode: str) -> Dict:
+    """
+    Look up a product by UPC code through the shared BarcodeStore.
+    Returns a dictionary with product details or an "error" key.
+    """
+    return get_barcode_store().lookup(barcode)
+
+
+class EnhancedBarcodeProductPipeline:
+    def __init__(self, csv_file_path: str, tavily_api_key: str = None):
+        """
+        Initialize the enhanced barcode pipeline
+        
+        Args:
+            csv_file_path: Path to the cosmetics CSV file
+            tavily_api_key: API key for Tavily search (optional)
+        """
+        self.csv_file_path = csv_file_path
+        self.tavily_api_key = tavily_api_key or os.getenv('TAVILY_API_KEY')
+        self.upc_api_url = UPC_API_URL
+        
+        # Initialize the cosmetics searcher with enhanced ingredient extraction
+        self.cosmetics_searcher = EnhancedCosmeticsSearcher(csv_file_path, self.tavily_api_key)
+    
+    def extract_weight_from_text(self, text: str):
+        """Extract weight like 400ml, 200 g, 1.5kg, etc. from a string."""
+        return extract_weight_from_text(text)
+
+    def lookup_upc_product(self, barcode: str):
+        """
+        Look up a product by UPC code (catalog, local cache, then UPCItemDB trial API).
+        Returns a dictionary with product details or an "error" key.
+        """
+        return lookup_upc_product(barcode)
+
     def process_barcode_to_product_details(self, 
                                          barcode: str,
                                          additional_info: Dict = None) -> Dict:
@@ -407,26 +597,54 @@ class EnhancedBarcodeProductPipeline:
         
         return 'Unknown'
 
-    def batch_process_barcodes(self, barcodes_with_info: list) -> list:
-        """Process multiple barcodes at once"""
-        results = []
-        
-        for item in barcodes_with_info:
+    def batch_process_barcodes(self, barcodes_with_info: list,
+                               max_workers: int = DEFAULT_MAX_WORKERS,
+                               item_timeout: float = DEFAULT_ITEM_TIMEOUT) -> list:
+        """
+        Process multiple barcodes concurrently
+
+        UPCItemDB and Tavily calls are throttled by their shared rate
+        limiters, so more workers never exceed the upstream limits.
+
+        Args:
+            barcodes_with_info: Barcode strings or dicts with a 'barcode' key plus additional info
+            max_workers: Maximum number of barcodes processed at once
+            item_timeout: Seconds allowed per barcode
+
+        Returns:
+            Results in the same order as the input
+        """
+        def process(item):
             if isinstance(item, str):
-                result = self.process_barcode_to_product_details(item)
+                return self.process_barcode_to_product_details(item)
             elif isinstance(item, dict) and 'barcode' in item:
-                barcode = item.pop('barcode')
-                additional_info = item
-                result = self.process_barcode_to_product_details(barcode, additional_info)
-            else:
-                result = {
-                    "error": "Invalid input format",
-                    "success": False
-                }
-            
-            results.append(result)
-        
-        return results
+                additional_info = dict(item)
+                barcode = additional_info.pop('barcode')
+                return self.process_barcode_to_product_details(barcode, additional_info)
+            return {
+                "error": "Invalid input format",
+                "success": False
+            }
+
+        def barcode_of(item):
+            return item.get('barcode') if isinstance(item, dict) else item
+
+        return map_ordered(
+            process,
+            barcodes_with_info,
+            max_workers=max_workers,
+            item_timeout=item_timeout,
+            on_timeout=lambda item: {
+                "error": f"Timed out after {item_timeout}s",
+                "barcode": barcode_of(item),
+                "success": False
+            },
+            on_error=lambda item, e: {
+                "error": f"Pipeline error: {str(e)}",
+                "barcode": barcode_of(item),
+                "success": False
+            }
+        )
 
 
 class EnhancedCosmeticsSearcher(CosmeticsSearcher):
@@ -1,27 +1,139 @@
 import requests
 import base64
+import hashlib
+import io
 import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, ImageOps
+from requests.adapters import HTTPAdapter
+
+# Ensure shared ML-Backend modules are importable when running from the ocr directory
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, os.pardir))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from cache_store import get_cache
 
 # Load API key
 GROQ_API_KEY = "your-key"
 if not GROQ_API_KEY:
     raise ValueError("Please set GROQ_API_KEY in your environment.")
 
+VISION_MODEL = "meta-llama/llama-4-scout-17b-16e-instruct"
+
+# Longest image side sent to the vision model; label text stays legible well below phone-camera resolution
+MAX_IMAGE_SIDE = int(os.getenv("LABEL_MAX_IMAGE_SIDE", 1568))
+JPEG_QUALITY = int(os.getenv("LABEL_JPEG_QUALITY", 85))
+
+# Largest image accepted from a URL, file or upload (bytes)
+MAX_IMAGE_BYTES = int(os.getenv("LABEL_MAX_IMAGE_BYTES", 15 * 1024 * 1024))
+
+# Lifetime of cached extraction results (seconds)
+LABEL_CACHE_TTL = float(os.getenv("LABEL_CACHE_TTL", 30 * 24 * 3600))
+
+# Bump when the prompt changes so cached results from the old prompt are not reused
+PROMPT_VERSION = 1
+
+# Keep-alive connections reused across remote image downloads
+_image_session = requests.Session()
+_image_session.mount("http://", HTTPAdapter(pool_connections=10, pool_maxsize=10))
+_image_session.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=10))
+
+def load_image_bytes(image_path, max_bytes=MAX_IMAGE_BYTES):
+    """Read raw image bytes from a local path or an http(s) URL, refusing images over max_bytes"""
+    if image_path.startswith("http://") or image_path.startswith("https://"):
+        with _image_session.get(image_path, timeout=15, stream=True) as resp:
+            resp.raise_for_status()
+            if int(resp.headers.get("Content-Length") or 0) > max_bytes:
+                raise ValueError(f"Image at {image_path} exceeds {max_bytes} bytes")
+            buffer = bytearray()
+            for chunk in resp.iter_content(chunk_size=64 * 1024):
+                buffer.extend(chunk)
+                if len(buffer) > max_bytes:
+                    raise ValueError(f"Image at {image_path} exceeds {max_bytes} bytes")
+            return bytes(buffer)
+
+    if os.path.getsize(image_path) > max_bytes:
+        raise ValueError(f"Image {image_path} exceeds {max_bytes} bytes")
+    with open(image_path, "rb") as f:
+        return f.read()
+
+def load_image_pair(image_path1, image_path2):
+    """Read both label images, downloading remote ones concurrently"""
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        future_1 = executor.submit(load_image_bytes, image_path1)
+        future_2 = executor.submit(load_image_bytes, image_path2)
+        return future_1.result(), future_2.result()
+
+def preprocess_image(raw_bytes):
+    """
+    Shrink an image to what the vision model needs
+
+    Applies the EXIF orientation, then re-encodes as RGB JPEG without
+    metadata, with the longest side capped at MAX_IMAGE_SIDE. Bytes Pillow
+    cannot decode are returned unchanged.
+    """
+    try:
+        image = Image.open(io.BytesIO(raw_bytes))
+        image = ImageOps.exif_transpose(image)
+        if image.mode in ("RGBA", "LA", "P"):
+            image = image.convert("RGBA")
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image, mask=image.split()[-1])
+            image = background
+        elif image.mode != "RGB":
+            image = image.convert("RGB")
+        image.thumbnail((MAX_IMAGE_SIDE, MAX_IMAGE_SIDE), Image.LANCZOS)
+
+        output = io.BytesIO()
+        # No exif= argument, so orientation/GPS/camera metadata is dropped
+        image.save(output, format="JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+        return output.getvalue()
+    except Exception as e:
+        print(f"Image preprocessing failed, sending original bytes: {e}")
+        return raw_bytes
+
 # Image path
 def encode_image(image_path):
-    if image_path.startswith("http://") or image_path.startswith("https://"):
-        resp = requests.get(image_path)
-        resp.raise_for_status()
-        return base64.b64encode(resp.content).decode("utf-8")
-    else:
-        with open(image_path, "rb") as f:
-            return base64.b64encode(f.read()).decode("utf-8")
+    """Load, preprocess and base64-encode an image for the vision API"""
+    return base64.b64encode(preprocess_image(load_image_bytes(image_path))).decode("utf-8")
+
+def image_pair_cache_key(raw_bytes_1, raw_bytes_2):
+    """Cache key for a label image pair: content hashes (order-independent) plus model and prompt version"""
+    digests = sorted(hashlib.sha256(raw).hexdigest() for raw in (raw_bytes_1, raw_bytes_2))
+    return f"{VISION_MODEL}:v{PROMPT_VERSION}:{digests[0]}:{digests[1]}"
 
 image_path = "/Users/prishabirla/Desktop/ADT/final/ocr/WhatsApp Image 2025-08-08 at 10.20.37.jpeg"  # Change as needed
 def extract_label_from_image(image_path1: str, image_path2: str):
-    """Extract product details from an image file or URL using Groq Vision API."""
-    image_base64_1 = encode_image(image_path1)
-    image_base64_2 = encode_image(image_path2)
+    """
+    Extract product details from an image file or URL using Groq Vision API.
+
+    Results are cached by the content hash of the image pair, so re-scanning
+    the same photos does not call the API again.
+    """
+    raw_1, raw_2 = load_image_pair(image_path1, image_path2)
+    return extract_label_from_bytes(raw_1, raw_2)
+
+def extract_label_from_bytes(raw_1: bytes, raw_2: bytes):
+    """
+    Extract product details from two in-memory label images (e.g. uploads).
+
+    Shares the content-hash result cache with extract_label_from_image.
+    """
+    cache = get_cache("label_extraction", LABEL_CACHE_TTL)
+    return cache.get_or_compute(
+        image_pair_cache_key(raw_1, raw_2),
+        lambda: _call_vision_api(raw_1, raw_2)
+    )
+
+def _call_vision_api(raw_1: bytes, raw_2: bytes):
+    """Preprocess both images and run the Groq Vision extraction"""
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        processed_1, processed_2 = executor.map(preprocess_image, (raw_1, raw_2))
+    image_base64_1 = base64.b64encode(processed_1).decode("utf-8")
+    image_base64_2 = base64.b64encode(processed_2).decode("utf-8")
     # Prompt
     prompt = """
     You are a product label information extraction assistant.
@@ -53,7 +165,7 @@ def extract_label_from_image(image_path1: str, image_path2: str):
 
     # API request payload
     payload = {
-        "model": "meta-llama/llama-4-scout-17b-16e-instruct",
+        "model": VISION_MODEL,
         "messages": [
             {"role": "system", "content": "You are a precise product label data extractor."},
             {
@@ -85,7 +197,7 @@ def extract_label_from_image(image_path1: str, image_path2: str):
     }
 
     # Send request
-    res = requests.post("https://api.groq.com/openai/v1/chat/completions", headers=headers, json=payload)
+    res = requests.post("https://api.groq.com/openai/v1/chat/completions", headers=headers, json=payload, timeout=60)
 
     try:
         result = res.json()
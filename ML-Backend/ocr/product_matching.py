@@ -8,17 +8,41 @@ import re
 from typing import Dict, List, Optional, Union, Tuple
 from collections import Counter
 import os
+import sys
 from dotenv import load_dotenv
+
+# Ensure shared ML-Backend modules are importable when running from the ocr directory
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, os.pardir))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from cache_store import get_cache, normalize_cache_key
+from rate_limit import get_rate_limiter
+from LCA.candidate_index import DEFAULT_MAX_CANDIDATES, BlockedSearchMixin, CandidateIndex, build_name_index, exact_name_key
+from LCA.size_units import SIZE_COLUMNS, add_size_columns_from_strings, add_size_columns_from_value_unit, catalog_size_value, parse_size, size_compatibility_mask
+
 load_dotenv()
 os.environ['TAVILY_API_KEY']=os.getenv('TAVILY_API_KEY')
-class CosmeticsSearcher:
-    def __init__(self, csv_file_path: str, tavily_api_key: str = os.environ['TAVILY_API_KEY']):
+
+# Lifetimes of cached Tavily responses (seconds); searches with no results expire sooner
+TAVILY_CACHE_TTL = float(os.getenv('TAVILY_CACHE_TTL', 7 * 24 * 3600))
+TAVILY_NEGATIVE_CACHE_TTL = float(os.getenv('TAVILY_NEGATIVE_CACHE_TTL', 6 * 3600))
+
+# Tavily requests per second shared by every searcher in the process
+TAVILY_RATE_LIMIT = float(os.getenv('TAVILY_RATE_LIMIT', 5))
+
+class CosmeticsSearcher(BlockedSearchMixin):
+    def __init__(self, csv_file_path: str, tavily_api_key: str = os.environ['TAVILY_API_KEY'],
+                 use_blocking: bool = True, max_candidates: int = DEFAULT_MAX_CANDIDATES):
         """
         Initialize the cosmetics searcher with CSV data and optional Tavily API key
         
         Args:
             csv_file_path: Path to the cosmetics CSV file
             tavily_api_key: API key for Tavily search (optional)
+            use_blocking: Score only blocking-index candidates in fuzzy search
+            max_candidates: Maximum number of candidates scored per fuzzy search
         """
         self.df = pd.read_csv(csv_file_path)
         # Fix: Handle weight value and unit columns
@@ -39,6 +63,20 @@ class CosmeticsSearcher:
         
         # Preprocess ingredients for faster matching
         self.df['processed_ingredients'] = self.df['ingredients'].apply(self._process_ingredients)
+        
+        # Parse sizes once into typed columns (size_value_ml / size_value_g / size_unit)
+        if 'weight_value' in self.df.columns and 'weight_unit' in self.df.columns:
+            add_size_columns_from_value_unit(self.df, 'weight_value', 'weight_unit')
+        else:
+            add_size_columns_from_strings(self.df, 'weight')
+        
+        # Blocking index so fuzzy search only scores a small candidate set
+        self.use_blocking = use_blocking
+        self.max_candidates = max_candidates
+        self.candidate_index = CandidateIndex(self.df)
+        
+        # Exact-name hash index for direct_search
+        self.name_index = build_name_index(self.df['product_name'])
     
     def _process_ingredients(self, ingredients_str: str) -> List[str]:
         """
@@ -68,36 +106,6 @@ class CosmeticsSearcher:
         
         return cleaned_ingredients
     
-    def _extract_size_info(self, weight_value: str, weight_unit: str) -> Tuple[float, str]:
-        """
-        Extract numeric value and unit from separate weight columns
-        
-        Args:
-            weight_value: Numeric weight value 
-            weight_unit: Unit (ml, oz, g, etc.)
-            
-        Returns:
-            Tuple of (numeric_value, unit)
-        """
-        if pd.isna(weight_value) or pd.isna(weight_unit) or weight_value == 'nan' or weight_unit == 'nan':
-            return (0.0, '')
-        
-        try:
-            value = float(weight_value)
-            unit = str(weight_unit).lower().strip()
-            
-            # Normalize units to ml equivalent for comparison
-            if unit in ['l']:
-                value *= 1000
-            elif unit in ['oz']:
-                value *= 29.5735  # fl oz to ml
-            elif unit in ['kg']:
-                value *= 1000
-            
-            return (value, unit)
-        except (ValueError, TypeError):
-            return (0.0, '')
-    
     def _calculate_ingredient_similarity(self, user_ingredients: List[str], csv_ingredients: List[str]) -> float:
         """
         Calculate similarity between two ingredient lists
@@ -130,36 +138,19 @@ class CosmeticsSearcher:
         
         return matches / total_user_ingredients if total_user_ingredients > 0 else 0.0
     
-    def _calculate_size_compatibility(self, user_size: str, csv_weight_value: str, csv_weight_unit: str, tolerance: float = 0.3) -> bool:
+    def _calculate_size_compatibility(self, user_size: str, csv_value: float, tolerance: float = 0.3) -> bool:
         """
         Check if sizes are compatible within tolerance
         
         Args:
             user_size: User's product size (e.g., "250ml")
-            csv_weight_value: CSV weight value
-            csv_weight_unit: CSV weight unit
+            csv_value: CSV size, pre-parsed to ml or g (0.0 if unknown)
             tolerance: Acceptable size difference ratio (default 30%)
             
         Returns:
             True if sizes are compatible
         """
-        # Extract user size info (existing method for user input)
-        user_match = re.search(r'(\d+(?:\.\d+)?)\s*(ml|oz|g|kg|l|gm)', str(user_size).lower())
-        if user_match:
-            user_value = float(user_match.group(1))
-            user_unit = user_match.group(2)
-            # Normalize user units
-            if user_unit in ['l']:
-                user_value *= 1000
-            elif user_unit in ['oz']:
-                user_value *= 29.5735
-            elif user_unit in ['kg']:
-                user_value *= 1000
-        else:
-            return True  # If we can't parse user size, don't filter out
-        
-        # Get CSV size info using new method
-        csv_value, csv_unit = self._extract_size_info(csv_weight_value, csv_weight_unit)
+        user_value, _ = parse_size(str(user_size))
         
         if user_value == 0.0 or csv_value == 0.0:
             return True  # If we can't determine size, don't filter out
@@ -204,11 +195,10 @@ class CosmeticsSearcher:
         if user_category and csv_category:
             scores['category_score'] = fuzz.ratio(user_category, csv_category) / 100.0
         
-        # Size compatibility - UPDATED to use new CSV structure
+        # Size compatibility - uses the size parsed at load time
         scores['size_compatible'] = self._calculate_size_compatibility(
             user_product.get('weight', ''),
-            str(row['weight_value']),  # Updated field name
-            str(row['weight_unit'])    # Updated field name
+            catalog_size_value(row)
         )
         
         # Calculate weighted overall score (same as before)
@@ -232,13 +222,11 @@ class CosmeticsSearcher:
         """
         Enhanced direct search considering name, ingredients, and other criteria
         """
-        product_name = user_product.get('product_name', '').lower()
+        # First try exact name match via the hash index
+        positions = self.name_index.get(exact_name_key(user_product.get('product_name', '')))
         
-        # First try exact name match
-        mask = self.df['product_name'].str.lower() == product_name
-        exact_matches = self.df[mask]
-        
-        if not exact_matches.empty:
+        if positions is not None:
+            exact_matches = self.df.iloc[positions]
             best_match = None
             best_score = 0.0
             
@@ -247,7 +235,7 @@ class CosmeticsSearcher:
                 
                 if scores['size_compatible'] and scores['ingredient_score'] > best_score:
                     best_score = scores['ingredient_score']
-                    best_match = row.copy()
+                    best_match = row.drop(labels=SIZE_COLUMNS)
                     best_match['search_scores'] = scores
             
             if best_match is not None:
@@ -256,14 +244,25 @@ class CosmeticsSearcher:
         
         return None
     
-    def enhanced_fuzzy_search(self, user_product: Dict, min_overall_score: float = 0.6) -> Optional[Dict]:
+    def enhanced_fuzzy_search(self, user_product: Dict, min_overall_score: float = 0.6,
+                              use_blocking: Optional[bool] = None) -> Optional[Dict]:
         """
         Enhanced fuzzy search with multi-criteria matching
+        
+        Args:
+            user_product: User's product information
+            min_overall_score: Minimum overall similarity score required
+            use_blocking: Override the instance's use_blocking setting (False forces a full scan)
         """
         best_match = None
         best_overall_score = 0.0
         
-        for idx, row in self.df.iterrows():
+        # Drop size-incompatible rows in one vectorized pass before scoring
+        candidates = self._blocking_candidates(user_product, use_blocking)
+        user_size_value, _ = parse_size(str(user_product.get('weight', '')))
+        candidates = candidates[size_compatibility_mask(candidates, user_size_value, tolerance=0.3)]
+        
+        for idx, row in candidates.iterrows():
             try:
                 scores = self._calculate_overall_score(row, user_product)
                 
@@ -285,7 +284,7 @@ class CosmeticsSearcher:
                 
                 if acceptable and scores['overall_score'] > best_overall_score:
                     best_overall_score = scores['overall_score']
-                    best_match = row.copy()
+                    best_match = row.drop(labels=SIZE_COLUMNS)
                     best_match['search_scores'] = scores
                     
             except Exception as e:
@@ -339,10 +338,21 @@ class CosmeticsSearcher:
                 "max_results": 5
             }
             
-            response = requests.post(url, json=payload, timeout=10)
-            response.raise_for_status()
+            def fetch():
+                get_rate_limiter('tavily', TAVILY_RATE_LIMIT).acquire()
+                response = requests.post(url, json=payload, timeout=10)
+                response.raise_for_status()
+                data = response.json()
+                # Searches that found nothing are cached as negative entries
+                return data if data.get('results') or data.get('answer') else None
             
-            data = response.json()
+            # Serve repeated queries from the persistent cache; concurrent identical
+            # lookups share a single API call
+            cache = get_cache('tavily_search', TAVILY_CACHE_TTL, TAVILY_NEGATIVE_CACHE_TTL)
+            data = cache.get_or_compute(normalize_cache_key(query), fetch)
+            if data is None:
+                print(f"No web results for '{query}'")
+                return None
             
             # Extract information from search results
             result_dict = self._extract_product_info_from_tavily(data, user_product)
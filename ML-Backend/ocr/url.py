@@ -1,17 +1,237 @@
+import os
 import re
-from urllib.parse import urlparse, unquote
+import sys
+import json
+from urllib.parse import urlparse, unquote, parse_qsl, urlencode, urlunparse
+import requests
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
+from contextlib import contextmanager
+import threading
 import time
 
+# Ensure shared ML-Backend modules are importable when running from the ocr directory
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, os.pardir))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from cache_store import get_cache
+from rate_limit import get_rate_limiter
+
+# Lifetimes of cached URL -> product name results (seconds); failed extractions expire sooner
+URL_NAME_CACHE_TTL = float(os.getenv('URL_NAME_CACHE_TTL', 30 * 24 * 3600))
+URL_NAME_NEGATIVE_CACHE_TTL = float(os.getenv('URL_NAME_NEGATIVE_CACHE_TTL', 3600))
+
+# Query parameters that only track the visit and never change the product shown
+TRACKING_PARAMS = {
+    'gclid', 'gclsrc', 'dclid', 'fbclid', 'msclkid', 'yclid', 'igshid', 'mc_cid', 'mc_eid',
+    'ref', 'ref_', 'referrer', 'tag', 'linkcode', 'linkid', 'ascsubtag', 'affid',
+    'affextparam1', 'affextparam2', 'aff_id', 'aff_sub', 'affiliate', 'cmpid', 'spm',
+}
+TRACKING_PARAM_PREFIXES = ('utm_', 'pf_rd_', 'pd_rd_', 'hsa_', '_hs', 'mtm_', 'pk_')
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+# Page loads per second allowed against any single domain (static and browser tiers)
+DOMAIN_RATE_LIMIT = float(os.getenv('DOMAIN_RATE_LIMIT', 1))
+# Seconds a page load may wait for its domain's rate limit before giving up
+DOMAIN_RATE_WAIT_TIMEOUT = float(os.getenv('DOMAIN_RATE_WAIT_TIMEOUT', 30))
+
+# Seconds allowed for the static (no browser) page fetch
+STATIC_FETCH_TIMEOUT = 8
+
+# Fallback selectors used when no site-specific selector matches
+GENERIC_TITLE_SELECTORS = [
+    'h1',
+    '[data-testid*="title"]',
+    '[data-testid*="product"]',
+    '.product-title',
+    '#product-title',
+    '.pdp-product-name',
+    '.product-name',
+    '[class*="product"][class*="title"]',
+    '[class*="product"][class*="name"]',
+    'span[class*="title"]',
+    'div[class*="title"]'
+]
+
+# Seconds a fast-load browser extraction may take end to end
+FAST_LOAD_DEADLINE = 12
+
+# Requests dropped by fast-load browsers (Chrome DevTools URL patterns): images,
+# fonts, media and common tracker/ad hosts never affect the product title
+BLOCKED_URL_PATTERNS = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.avif', '*.svg', '*.ico', '*.bmp',
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    '*.mp4', '*.webm', '*.m3u8', '*.mp3', '*.ogg', '*.wav',
+    '*googletagmanager.com*', '*google-analytics.com*', '*doubleclick.net*',
+    '*googlesyndication.com*', '*adservice.google.*', '*amazon-adsystem.com*',
+    '*facebook.net*', '*connect.facebook.com*', '*hotjar.com*', '*clarity.ms*',
+    '*criteo.com*', '*criteo.net*', '*taboola.com*', '*outbrain.com*',
+    '*scorecardresearch.com*', '*quantserve.com*', '*newrelic.com*', '*nr-data.net*',
+    '*segment.io*', '*segment.com*', '*mixpanel.com*', '*branch.io*', '*tiktok.com/i18n/pixel*'
+]
+
+# Generic selectors specific enough to end the fast-load wait early; looser
+# generic selectors (e.g. div[class*="title"]) also match banners and widgets
+# that render long before the product title, so they only apply after loading.
+# og:title is left out: it is in the served HTML, so it would end the wait at
+# DOMContentLoaded, before the rendered title the browser tier scrapes exists.
+EARLY_STOP_TITLE_SELECTORS = ['h1']
+
+# True once any selector has a visible element with text, or the page finished loading
+FIRST_TITLE_HIT_SCRIPT = """
+for (const selector of arguments[0]) {
+    let elements;
+    try { elements = document.querySelectorAll(selector); } catch (e) { continue; }
+    for (const el of elements) {
+        if (el.offsetParent !== null && el.innerText && el.innerText.trim()) { return true; }
+    }
+}
+return document.readyState === 'complete';
+"""
+
+# Page titles that mean the static fetch hit a bot wall instead of the product
+BLOCKED_PAGE_MARKERS = ['robot check', 'captcha', 'access denied', 'attention required', 'are you a human']
+
+# HTTP statuses that mean "try again later" rather than "no such page"
+TRANSIENT_HTTP_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+_http_session = None
+_http_session_lock = threading.Lock()
+
+
+class TransientExtractionError(Exception):
+    """Extraction failed for a reason that may go away (timeout, crash, rate limit), not a missing title"""
+
+
+def get_http_session():
+    """Process-wide requests.Session with pooled keep-alive connections"""
+    global _http_session
+    with _http_session_lock:
+        if _http_session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=20, pool_maxsize=20, max_retries=1)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers.update({
+                'User-Agent': USER_AGENT,
+                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+                'Accept-Language': 'en-US,en;q=0.9'
+            })
+            _http_session = session
+        return _http_session
+
+def domain_key(url):
+    """Host of a URL without 'www.', used to group extraction stats"""
+    domain = urlparse(url).netloc.lower()
+    return domain[4:] if domain.startswith('www.') else domain
+
+class DomainTierStats:
+    """
+    Per-domain success counters for the extraction tiers.
+
+    Every domain starts with the cheap 'static' tier. Once static fetches
+    have mostly failed for a domain, the 'browser' tier goes first there;
+    every probe_interval-th request still tries static first so a domain can
+    recover if the site changes.
+    """
+
+    TIERS = ('static', 'browser')
+
+    def __init__(self, min_attempts=3, min_success_rate=0.25, probe_interval=20):
+        """
+        Args:
+            min_attempts (int): Static attempts needed before the order can change
+            min_success_rate (float): Static success rate below which the browser goes first
+            probe_interval (int): Every Nth request on a browser-first domain tries static first
+        """
+        self.min_attempts = min_attempts
+        self.min_success_rate = min_success_rate
+        self.probe_interval = probe_interval
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def _domain(self, domain):
+        """Counters for a domain (caller holds the lock)"""
+        if domain not in self._stats:
+            self._stats[domain] = {
+                'requests': 0,
+                **{tier: {'attempts': 0, 'successes': 0} for tier in self.TIERS}
+            }
+        return self._stats[domain]
+
+    def record(self, domain, tier, success):
+        """Count one attempt of a tier on a domain"""
+        with self._lock:
+            counters = self._domain(domain)[tier]
+            counters['attempts'] += 1
+            if success:
+                counters['successes'] += 1
+
+    def success_rate(self, domain, tier):
+        """Success rate of a tier on a domain, or None before any attempt"""
+        with self._lock:
+            counters = self._stats.get(domain, {}).get(tier)
+            if not counters or not counters['attempts']:
+                return None
+            return counters['successes'] / counters['attempts']
+
+    def tier_order(self, domain):
+        """
+        Order in which the tiers should be tried for a domain
+
+        Args:
+            domain (str): Domain from domain_key()
+
+        Returns:
+            list: Tier names, first one to try first
+        """
+        with self._lock:
+            stats = self._domain(domain)
+            stats['requests'] += 1
+            static = stats['static']
+            if static['attempts'] < self.min_attempts:
+                return ['static', 'browser']
+            if static['successes'] / static['attempts'] >= self.min_success_rate:
+                return ['static', 'browser']
+            if stats['requests'] % self.probe_interval == 0:
+                return ['static', 'browser']
+            return ['browser', 'static']
+
+    def snapshot(self):
+        """Copy of all counters with success rates"""
+        with self._lock:
+            snapshot = {}
+            for domain, stats in self._stats.items():
+                entry = {'requests': stats['requests']}
+                for tier in self.TIERS:
+                    counters = stats[tier]
+                    entry[tier] = {
+                        **counters,
+                        'success_rate': round(counters['successes'] / counters['attempts'], 4)
+                        if counters['attempts'] else None
+                    }
+                snapshot[domain] = entry
+            return snapshot
+
+# Shared by every extractor in the process
+TIER_STATS = DomainTierStats()
+
 class ProductNameExtractor:
-    def __init__(self, headless=True, driver_path=None):
+    def __init__(self, headless=True, driver_path=None, fast_load=False, page_deadline=FAST_LOAD_DEADLINE):
         self.headless = headless
         self.driver_path = driver_path
+        # Fast-load mode: no images/fonts/media/trackers, eager page loads and a per-page deadline
+        self.fast_load = fast_load
+        self.page_deadline = page_deadline
         self.driver = None
         
         # Common URL patterns for different e-commerce sites
@@ -24,31 +244,44 @@ class ProductNameExtractor:
                     r'/exec/obidos/ASIN/[A-Z0-9]{10}'
                 ],
                 'name_from_url': r'/([^/]+)/dp/',
-                'title_selectors': ['#productTitle', 'h1.a-size-large', '.product-title']
+                'title_selectors': ['#productTitle', 'h1.a-size-large', '.product-title'],
+                'product_id': r'/(?:dp|gp/product|exec/obidos/ASIN)/([A-Z0-9]{10})',
+                'canonical_path': '/dp/{}',
+                'query_params': []
             },
             'flipkart': {
                 'url_pattern': r'flipkart\.com',
                 'product_patterns': [r'/p/[^/]+'],
                 'name_from_url': r'flipkart\.com/([^/]+)/p/',
-                'title_selectors': ['span.B_NuCI', 'h1.yhB1nd', '.pdp-product-name']
+                'title_selectors': ['span.B_NuCI', 'h1.yhB1nd', '.pdp-product-name'],
+                'query_params': ['pid']
             },
             'myntra': {
                 'url_pattern': r'myntra\.com',
                 'product_patterns': [r'/\d+/buy'],
                 'name_from_url': r'myntra\.com/([^/]+)/\d+',
-                'title_selectors': ['h1.pdp-name', '.pdp-product-name', 'h1']
+                'title_selectors': ['h1.pdp-name', '.pdp-product-name', 'h1'],
+                'product_id': r'/(\d+)/buy',
+                'canonical_path': '/{}/buy',
+                'query_params': []
             },
             'ebay': {
                 'url_pattern': r'ebay\.(com|in)',
                 'product_patterns': [r'/itm/'],
                 'name_from_url': r'/itm/([^/]+)/',
-                'title_selectors': ['#x-title-label-lbl', 'h1#it-ttl', '.x-item-title-label']
+                'title_selectors': ['#x-title-label-lbl', 'h1#it-ttl', '.x-item-title-label'],
+                'product_id': r'/itm/(?:[^/]+/)?(\d{9,})',
+                'canonical_path': '/itm/{}',
+                'query_params': []
             },
             'shopify': {
                 'url_pattern': r'\.myshopify\.com|shopify',
                 'product_patterns': [r'/products/'],
                 'name_from_url': r'/products/([^/?]+)',
-                'title_selectors': ['h1.product-single__title', '.product-title', 'h1']
+                'title_selectors': ['h1.product-single__title', '.product-title', 'h1'],
+                'product_id': r'/products/([^/?]+)',
+                'canonical_path': '/products/{}',
+                'query_params': ['variant']
             }
         }
     
@@ -81,6 +314,58 @@ class ProductNameExtractor:
             print(f"Error extracting from URL path: {e}")
             return None
     
+    @staticmethod
+    def _is_tracking_param(name):
+        """Check whether a query parameter only tracks the visit"""
+        name = name.lower()
+        return name in TRACKING_PARAMS or name.startswith(TRACKING_PARAM_PREFIXES)
+
+    def canonicalize_url(self, url):
+        """
+        Canonical form of a product URL, used as the key for cached names
+
+        Lowercases the host and drops 'www.'/'m.', default ports, the
+        fragment, repeated/trailing slashes and tracking parameters. Product
+        URLs on the sites in self.patterns are reduced to their product id
+        path and the query parameters that identify the product (e.g. every
+        Amazon URL for an ASIN becomes https://amazon.in/dp/<ASIN>).
+
+        Args:
+            url (str): Product URL
+
+        Returns:
+            str: Canonical URL
+        """
+        parsed = urlparse(url.strip())
+        host = (parsed.hostname or '').lower()
+        for prefix in ('www.', 'm.'):
+            if host.startswith(prefix):
+                host = host[len(prefix):]
+                break
+        if parsed.port and parsed.port not in (80, 443):
+            host = f"{host}:{parsed.port}"
+
+        path = re.sub(r'/{2,}', '/', unquote(parsed.path)).rstrip('/') or '/'
+        params = [
+            (name, value) for name, value in parse_qsl(parsed.query, keep_blank_values=True)
+            if not self._is_tracking_param(name)
+        ]
+
+        # Same site/product detection as extract_from_url_path
+        for site, config in self.patterns.items():
+            if not re.search(config['url_pattern'], host):
+                continue
+            if any(re.search(pattern, path) for pattern in config['product_patterns']):
+                if 'product_id' in config:
+                    match = re.search(config['product_id'], path)
+                    if match:
+                        path = config['canonical_path'].format(match.group(1))
+                if 'query_params' in config:
+                    params = [(name, value) for name, value in params if name in config['query_params']]
+            break
+
+        return urlunparse(('https', host, path, '', urlencode(sorted(params)), ''))
+
     def setup_driver(self):
         """Setup Chrome WebDriver with optimal settings"""
         try:
@@ -97,11 +382,17 @@ class ProductNameExtractor:
             chrome_options.add_argument('--disable-logging')
             chrome_options.add_argument('--disable-blink-features=AutomationControlled')
             
-            # Don't block images for better content detection
+            # Don't block images for better content detection (except in fast-load mode)
             # chrome_options.add_argument('--disable-images')
+            if self.fast_load:
+                # Return from get() at DOMContentLoaded instead of waiting for every subresource
+                chrome_options.page_load_strategy = 'eager'
+                chrome_options.add_experimental_option('prefs', {
+                    'profile.managed_default_content_settings.images': 2
+                })
             
             # User agent to avoid detection
-            chrome_options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+            chrome_options.add_argument(f'--user-agent={USER_AGENT}')
             
             # Hide automation indicators
             chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
@@ -116,8 +407,15 @@ class ProductNameExtractor:
             # Remove automation indicators
             self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
             
-            self.driver.set_page_load_timeout(30)
-            self.driver.implicitly_wait(10)
+            if self.fast_load:
+                # Drop heavy and third-party requests at the network layer
+                self.driver.execute_cdp_cmd('Network.enable', {})
+                self.driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOCKED_URL_PATTERNS})
+                self.driver.set_page_load_timeout(self.page_deadline)
+                self.driver.implicitly_wait(0)
+            else:
+                self.driver.set_page_load_timeout(30)
+                self.driver.implicitly_wait(10)
             
             print("✅ Chrome WebDriver setup successful")
             return True
@@ -135,26 +433,41 @@ class ProductNameExtractor:
             self.driver.quit()
             self.driver = None
     
-    def extract_from_page_content(self, url):
-        """Extract product name using Selenium web scraping"""
+    def extract_from_page_content(self, url, raise_errors=False):
+        """
+        Extract product name using Selenium web scraping
+
+        Args:
+            url (str): Product URL
+            raise_errors (bool): Re-raise browser errors (page load failures,
+                crashed drivers) instead of returning None
+
+        Returns:
+            str: Product name or None if not found
+        """
         try:
             if not self.driver and not self.setup_driver():
+                if raise_errors:
+                    raise DriverStartupError("Could not start Chrome WebDriver")
                 return None
             
-            print(f"🌐 Loading page: {url}")
-            self.driver.get(url)
-            
-            # Wait for page to load
-            WebDriverWait(self.driver, 10).until(
-                lambda driver: driver.execute_script("return document.readyState") == "complete"
-            )
-            time.sleep(3)  # Additional wait for dynamic content
-            
-            # Try to close any popups or cookie banners
-            self.close_popups()
-            
             parsed_url = urlparse(url)
             domain = parsed_url.netloc.lower()
+
+            print(f"🌐 Loading page: {url}")
+            if self.fast_load:
+                self.load_page_fast(url, domain)
+            else:
+                self.driver.get(url)
+
+                # Wait for page to load
+                WebDriverWait(self.driver, 10).until(
+                    lambda driver: driver.execute_script("return document.readyState") == "complete"
+                )
+                time.sleep(3)  # Additional wait for dynamic content
+
+                # Try to close any popups or cookie banners
+                self.close_popups()
             print(f"🔍 Searching for product title on {domain}")
             
             # Try site-specific selectors first
@@ -175,21 +488,7 @@ class ProductNameExtractor:
             
             # Generic selectors if site-specific ones don't work
             print("🔄 Trying generic selectors...")
-            generic_selectors = [
-                'h1',
-                '[data-testid*="title"]',
-                '[data-testid*="product"]',
-                '.product-title',
-                '#product-title',
-                '.pdp-product-name',
-                '.product-name',
-                '[class*="product"][class*="title"]',
-                '[class*="product"][class*="name"]',
-                'span[class*="title"]',
-                'div[class*="title"]'
-            ]
-            
-            for selector in generic_selectors:
+            for selector in GENERIC_TITLE_SELECTORS:
                 try:
                     elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
                     for element in elements:
@@ -215,8 +514,53 @@ class ProductNameExtractor:
             
         except Exception as e:
             print(f"❌ Error scraping page content: {e}")
+            if raise_errors:
+                raise
             return None
     
+    def wait_selectors_for(self, domain):
+        """Site-specific title selectors for a domain followed by the generic ones trusted to end the wait early"""
+        selectors = []
+        for site, config in self.patterns.items():
+            if re.search(config['url_pattern'], domain) and 'title_selectors' in config:
+                selectors.extend(config['title_selectors'])
+        return selectors + EARLY_STOP_TITLE_SELECTORS
+
+    def load_page_fast(self, url, domain):
+        """
+        Load a page in fast-load mode within self.page_deadline seconds
+
+        get() returns at DOMContentLoaded (eager strategy); then we poll until
+        a site-specific title selector or h1 has visible text or the
+        document finishes loading, whichever comes first. A page still loading at the deadline is
+        stopped and scraped as it is.
+
+        Args:
+            url (str): Product URL
+            domain (str): Lowercased host of the URL
+        """
+        deadline = time.monotonic() + self.page_deadline
+        try:
+            self.driver.get(url)
+        except TimeoutException:
+            print("⏱️ Page load hit the deadline, using what has loaded")
+            try:
+                self.driver.execute_script("window.stop();")
+            except Exception:
+                pass
+            return
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        selectors = self.wait_selectors_for(domain)
+        try:
+            WebDriverWait(self.driver, remaining, poll_frequency=0.1).until(
+                lambda driver: driver.execute_script(FIRST_TITLE_HIT_SCRIPT, selectors)
+            )
+        except TimeoutException:
+            print("⏱️ No title element before the deadline, using what has loaded")
+
     def close_popups(self):
         """Try to close common popups and cookie banners"""
         popup_selectors = [
@@ -242,7 +586,171 @@ class ProductNameExtractor:
                         break
             except Exception:
                 continue
-    
+
+    def fetch_static_html(self, url):
+        """Fetch the raw HTML of a page over the shared HTTP session (no JavaScript)"""
+        response = get_http_session().get(url, timeout=STATIC_FETCH_TIMEOUT, allow_redirects=True)
+        if response.status_code in TRANSIENT_HTTP_STATUSES:
+            raise TransientExtractionError(f"Static fetch returned HTTP {response.status_code}")
+        if response.status_code != 200:
+            print(f"❌ Static fetch returned HTTP {response.status_code}")
+            return None
+        if 'html' not in response.headers.get('Content-Type', 'text/html').lower():
+            return None
+        return response.text
+
+    def extract_from_static_html(self, url):
+        """
+        Extract product name from the raw HTML without starting a browser
+
+        Raises:
+            TransientExtractionError: The fetch timed out, failed to connect or was throttled
+        """
+        try:
+            print(f"⚡ Fetching page without browser: {url}")
+            html = self.fetch_static_html(url)
+            if not html:
+                return None
+            return self.extract_from_html(html, url)
+        except TransientExtractionError:
+            raise
+        except requests.RequestException as e:
+            raise TransientExtractionError(f"Static fetch failed: {str(e)[:80]}") from e
+        except Exception as e:
+            print(f"❌ Static fetch failed: {str(e)[:80]}")
+            return None
+
+    def extract_from_html(self, html, url):
+        """
+        Find the product title in a static HTML document
+
+        Tries the site-specific selectors, then JSON-LD Product data and
+        OpenGraph, then h1 and finally <title>. The loose generic selectors
+        are left to the browser tier: without visibility information they
+        match hidden menu, banner and modal text as readily as the title.
+
+        Args:
+            html (str): Page HTML
+            url (str): URL the HTML was fetched from
+
+        Returns:
+            str: Product name or None if not found
+        """
+        soup = BeautifulSoup(html, 'html.parser')
+        page_title = soup.title.get_text(' ', strip=True) if soup.title else ''
+        if any(marker in page_title.lower() for marker in BLOCKED_PAGE_MARKERS):
+            print(f"❌ Static fetch hit a bot check: {page_title[:50]}")
+            return None
+
+        domain = urlparse(url).netloc.lower()
+        for site, config in self.patterns.items():
+            if re.search(config['url_pattern'], domain) and 'title_selectors' in config:
+                for selector in config['title_selectors']:
+                    for element in soup.select(selector):
+                        title = element.get_text(' ', strip=True)
+                        if title:
+                            print(f"✅ Found static title with selector '{selector}': {title[:50]}...")
+                            return self.clean_product_name(title)
+
+        title = self._json_ld_product_name(soup)
+        if title:
+            print(f"✅ Found JSON-LD product name: {title[:50]}...")
+            return self.clean_product_name(title)
+
+        og_title = soup.find('meta', attrs={'property': 'og:title'})
+        title = (og_title.get('content') or '').strip() if og_title else ''
+        if title and not self.is_generic_title(title):
+            print(f"✅ Found OpenGraph title: {title[:50]}...")
+            return self.clean_product_name(title)
+
+        for element in soup.select('h1'):
+            title = element.get_text(' ', strip=True)
+            # Without layout information, very long text is a container, not a title
+            if 10 < len(title) <= 300 and not self.is_generic_title(title):
+                print(f"✅ Found static h1 title: {title[:50]}...")
+                return self.clean_product_name(title)
+
+        if page_title and len(page_title) > 10 and not self.is_generic_title(page_title):
+            print(f"✅ Using static page title: {page_title[:50]}...")
+            return self.clean_product_name(page_title)
+
+        return None
+
+    @staticmethod
+    def _json_ld_product_name(soup):
+        """Name of the first schema.org Product in the page's JSON-LD blocks"""
+        for script in soup.find_all('script', attrs={'type': 'application/ld+json'}):
+            try:
+                data = json.loads(script.string or script.get_text() or '')
+            except (ValueError, TypeError):
+                continue
+
+            nodes = data if isinstance(data, list) else [data]
+            while nodes:
+                node = nodes.pop(0)
+                if isinstance(node, list):
+                    nodes.extend(node)
+                    continue
+                if not isinstance(node, dict):
+                    continue
+                node_type = node.get('@type')
+                types = node_type if isinstance(node_type, list) else [node_type]
+                if 'Product' in types and isinstance(node.get('name'), str) and node['name'].strip():
+                    return node['name'].strip()
+                if '@graph' in node:
+                    nodes.extend(node['@graph'] if isinstance(node['@graph'], list) else [node['@graph']])
+        return None
+
+    def _extract_with_browser(self, url):
+        """Browser tier with this extractor's own driver"""
+        try:
+            return self.extract_from_page_content(url, raise_errors=True)
+        except (WebDriverException, DriverStartupError) as e:
+            raise TransientExtractionError(f"Browser failed: {str(e)[:80]}") from e
+
+    def extract_with_tiers(self, url, browser_extract=None):
+        """
+        Extract product name from the page, trying the cheapest tier first
+
+        The 'static' tier parses the raw HTML; the 'browser' tier renders
+        the page with Selenium. TIER_STATS decides the order per domain and
+        records the outcome of every completed attempt.
+
+        Args:
+            url (str): Product URL
+            browser_extract (callable): Browser tier, defaults to this extractor's own driver
+
+        Returns:
+            str: Product name or None if no tier found one
+
+        Raises:
+            TransientExtractionError: No name was found and a tier failed transiently
+                (timeout, crash, throttling), so the page wasn't really checked
+        """
+        tiers = {
+            'static': self.extract_from_static_html,
+            'browser': browser_extract or self._extract_with_browser
+        }
+        domain = domain_key(url)
+        limiter = get_rate_limiter(f"domain:{domain}", DOMAIN_RATE_LIMIT, capacity=2)
+        transient_error = None
+        for tier in TIER_STATS.tier_order(domain):
+            if not limiter.acquire(timeout=DOMAIN_RATE_WAIT_TIMEOUT):
+                transient_error = TransientExtractionError(f"Rate limit wait for {domain} timed out")
+                break
+            try:
+                name = tiers[tier](url)
+            except TransientExtractionError as e:
+                print(f"⚠️ {tier} tier failed transiently: {e}")
+                transient_error = e
+                continue
+            TIER_STATS.record(domain, tier, bool(name))
+            if name:
+                return name
+        if transient_error is not None:
+            raise transient_error
+        return None
+
     def generic_url_extraction(self, url):
         """Generic method to extract product name from any URL"""
         try:
@@ -313,6 +821,10 @@ class ProductNameExtractor:
         
         Returns:
             str: Product name or None if not found
+
+        Raises:
+            TransientExtractionError: Scraping failed transiently (see
+                extract_with_tiers); 'both' falls back to URL parsing instead
         """
         if method == 'url':
             # Only URL-based extraction
@@ -320,11 +832,15 @@ class ProductNameExtractor:
         
         elif method == 'scrape':
             # Only web scraping (recommended for accurate results)
-            return self.extract_from_page_content(url)
-        
+            return self.extract_with_tiers(url)
+
         elif method == 'both':
             # Try web scraping first (more accurate), then fallback to URL
-            name = self.extract_from_page_content(url)
+            try:
+                name = self.extract_with_tiers(url)
+            except TransientExtractionError as e:
+                print(f"⚠️ Web scraping failed transiently: {e}")
+                name = None
             if name:
                 return name
             
@@ -341,6 +857,306 @@ class ProductNameExtractor:
         """Context manager exit - ensures driver is closed"""
         self.close_driver()
 
+class PoolFullError(RuntimeError):
+    """Every browser slot in the extractor pool is taken"""
+
+
+class DriverStartupError(RuntimeError):
+    """Chrome WebDriver could not be started"""
+
+
+class ExtractorPool:
+    """
+    Bounded pool of warm ProductNameExtractor instances, one Chrome each.
+
+    Callers check an extractor out, use it exclusively and return it, so
+    concurrent requests never share a driver and don't pay browser startup.
+    Drivers that fail a health check, crash, or have served
+    max_pages_per_driver pages are quit and replaced.
+    """
+
+    def __init__(self, size=2, headless=True, driver_path=None,
+                 max_pages_per_driver=50, checkout_timeout=30.0, prewarm=True, fast_load=False):
+        """
+        Args:
+            size (int): Maximum number of live browsers
+            headless (bool): Run Chrome headless
+            driver_path (str): Optional ChromeDriver path
+            max_pages_per_driver (int): Pages served before a driver is recycled
+            checkout_timeout (float): Seconds to wait for a free driver
+            prewarm (bool): Start all browsers up front
+            fast_load (bool): Start browsers in fast-load mode (see ProductNameExtractor)
+        """
+        self.size = size
+        self.headless = headless
+        self.driver_path = driver_path
+        self.fast_load = fast_load
+        self.max_pages_per_driver = max_pages_per_driver
+        self.checkout_timeout = checkout_timeout
+
+        # Idle browsers, used LIFO so recently used (warm) ones stay in rotation.
+        # The condition is notified whenever a browser is returned or a slot
+        # frees up, so waiting checkouts can take it or start a new browser.
+        self._idle = []
+        self._lock = threading.Lock()
+        self._slot_or_idle = threading.Condition(self._lock)
+        self._live = 0
+        self._closed = False
+        self.stats = {'checkouts': 0, 'created': 0, 'recycled': 0, 'unhealthy': 0}
+
+        # Driver-less extractor for URL-only parsing
+        self._url_parser = ProductNameExtractor(headless=headless, driver_path=driver_path)
+
+        if prewarm:
+            for _ in range(size):
+                try:
+                    self._put_idle(self._create())
+                except Exception as e:
+                    print(f"❌ Could not prewarm browser: {e}")
+                    break
+
+    def _count(self, name):
+        """Increment a pool counter"""
+        with self._lock:
+            self.stats[name] += 1
+
+    def _create(self):
+        """
+        Start a new extractor with a live driver (counts against the pool size)
+
+        Raises:
+            PoolFullError: No free slot for another browser
+            DriverStartupError: Chrome did not start
+        """
+        with self._lock:
+            if self._live >= self.size:
+                raise PoolFullError("Extractor pool is full")
+            self._live += 1
+        return self._start_in_slot()
+
+    def _start_in_slot(self):
+        """
+        Start an extractor in a slot the caller already reserved (_live was incremented)
+
+        Raises:
+            DriverStartupError: Chrome did not start (the slot is released)
+        """
+        try:
+            extractor = ProductNameExtractor(
+                headless=self.headless, driver_path=self.driver_path, fast_load=self.fast_load
+            )
+            started = extractor.setup_driver()
+        except Exception:
+            self._release_slot()
+            raise
+        if not started:
+            self._release_slot()
+            raise DriverStartupError("Could not start Chrome WebDriver")
+        extractor.pages_served = 0
+        self._count('created')
+        return extractor
+
+    def _release_slot(self):
+        """Free a browser slot and wake a waiting checkout"""
+        with self._slot_or_idle:
+            self._live -= 1
+            self._slot_or_idle.notify()
+
+    def _put_idle(self, extractor):
+        """Make an extractor available and wake a waiting checkout"""
+        with self._slot_or_idle:
+            self._idle.append(extractor)
+            self._slot_or_idle.notify()
+
+    def _discard(self, extractor):
+        """Quit an extractor's driver and free its pool slot"""
+        try:
+            extractor.close_driver()
+        except Exception:
+            pass
+        self._release_slot()
+
+    @staticmethod
+    def _is_healthy(extractor):
+        """Check that the extractor's browser still responds"""
+        if extractor.driver is None:
+            return False
+        try:
+            extractor.driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    def checkout(self, timeout=None):
+        """
+        Take an extractor for exclusive use
+
+        Args:
+            timeout (float): Seconds to wait for a free extractor
+
+        Returns:
+            ProductNameExtractor with a live driver
+
+        Raises:
+            DriverStartupError: A new browser was needed and Chrome did not start
+            TimeoutError: No browser became free within the timeout
+        """
+        if self._closed:
+            raise RuntimeError("Extractor pool is closed")
+        self._count('checkouts')
+        deadline = time.monotonic() + (timeout or self.checkout_timeout)
+
+        while True:
+            with self._slot_or_idle:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("Extractor pool is closed")
+                    if self._idle:
+                        extractor = self._idle.pop()
+                        break
+                    if self._live < self.size:
+                        self._live += 1
+                        extractor = None  # Slot reserved; start the browser outside the lock
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError("No browser available in the extractor pool")
+                    self._slot_or_idle.wait(remaining)
+
+            if extractor is None:
+                return self._start_in_slot()
+            if self._is_healthy(extractor):
+                return extractor
+            self._count('unhealthy')
+            self._discard(extractor)
+
+    def checkin(self, extractor, failed=False):
+        """
+        Return an extractor to the pool, recycling it if needed
+
+        Args:
+            extractor (ProductNameExtractor): Extractor from checkout()
+            failed (bool): The caller hit an error while using it
+        """
+        extractor.pages_served = getattr(extractor, 'pages_served', 0) + 1
+        if (self._closed or failed or extractor.pages_served >= self.max_pages_per_driver
+                or not self._is_healthy(extractor)):
+            self._count('recycled')
+            self._discard(extractor)
+            return
+        self._put_idle(extractor)
+
+    @contextmanager
+    def extractor(self, timeout=None):
+        """Context manager wrapping checkout()/checkin()"""
+        extractor = self.checkout(timeout)
+        failed = False
+        try:
+            yield extractor
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self.checkin(extractor, failed=failed)
+
+    def _extract_with_browser(self, url):
+        """Browser tier: render the page with a pooled driver"""
+        try:
+            # Browser errors propagate through extractor() so the driver is recycled
+            with self.extractor() as extractor:
+                return extractor.extract_from_page_content(url, raise_errors=True)
+        except (WebDriverException, DriverStartupError, TimeoutError) as e:
+            raise TransientExtractionError(f"Browser failed: {str(e)[:80]}") from e
+
+    def extract_product_name(self, url, method='scrape'):
+        """
+        Extract a product name, checking out a pooled browser only when the
+        static tier fails (see ProductNameExtractor.extract_product_name)
+
+        Args:
+            url (str): Product URL
+            method (str): 'url', 'scrape' or 'both'
+
+        Returns:
+            str: Product name or None if not found
+
+        Raises:
+            TransientExtractionError: Scraping failed transiently (see
+                extract_with_tiers); 'both' falls back to URL parsing instead
+        """
+        if method == 'url':
+            return self._url_parser.extract_from_url_path(url)
+        try:
+            name = self._url_parser.extract_with_tiers(url, browser_extract=self._extract_with_browser)
+        except TransientExtractionError as e:
+            if method != 'both':
+                raise
+            print(f"⚠️ Web scraping failed transiently: {e}")
+            name = None
+        if name or method != 'both':
+            return name
+        print("Web scraping failed, falling back to URL extraction...")
+        return self._url_parser.extract_from_url_path(url)
+
+    def get_stats(self):
+        """Pool counters plus current live/idle browser counts"""
+        with self._lock:
+            return {**self.stats, 'live': self._live, 'idle': len(self._idle), 'size': self.size}
+
+    def close(self):
+        """Quit every idle browser; checked-out ones are quit when returned"""
+        with self._slot_or_idle:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._slot_or_idle.notify_all()  # Waiting checkouts fail fast
+        for extractor in idle:
+            self._discard(extractor)
+
+_canonicalizer = None
+
+def canonicalize_url(url):
+    """Canonical form of a product URL (see ProductNameExtractor.canonicalize_url)"""
+    global _canonicalizer
+    if _canonicalizer is None:
+        _canonicalizer = ProductNameExtractor()
+    return _canonicalizer.canonicalize_url(url)
+
+def get_url_name_cache():
+    """Persistent cache from canonical product URL to extracted product name"""
+    return get_cache('url_product_names', URL_NAME_CACHE_TTL, URL_NAME_NEGATIVE_CACHE_TTL)
+
+def cached_product_name(url, extract, method='scrape'):
+    """
+    Resolve a product name through the URL cache
+
+    URL variants with the same canonical form share one entry holding the
+    scraped name. Pages confirmed to have no findable title are cached with
+    the shorter negative TTL; transient failures (timeouts, crashed
+    browsers, throttling) are not cached. 'both' scrapes through the cache
+    and falls back to URL parsing on a miss or transient failure, so a
+    URL-parsed name is never cached in place of a scraped one. 'url'
+    extraction is plain parsing and is not cached.
+
+    Args:
+        url (str): Product URL
+        extract (callable): extract(url, method), run on a cache miss
+        method (str): 'url', 'scrape' or 'both'
+
+    Returns:
+        str: Product name or None if not found
+    """
+    if method == 'url':
+        return extract(url, method)
+    key = f"scrape:{canonicalize_url(url)}"
+    try:
+        name = get_url_name_cache().get_or_compute(key, lambda: extract(url, 'scrape'))
+    except TransientExtractionError as e:
+        print(f"⚠️ Not caching failed extraction for {url}: {e}")
+        name = None
+    if name is None and method == 'both':
+        return extract(url, 'url')
+    return name
+
 # Example usage
 def main():
     # Get product URL from user
@@ -361,7 +1177,11 @@ def main():
     # Using context manager to ensure driver is properly closed
     with ProductNameExtractor(headless=True) as extractor:
         # Extract product name from actual website
-        product_name = extractor.extract_product_name(product_url, method='scrape')
+        try:
+            product_name = extractor.extract_product_name(product_url, method='scrape')
+        except TransientExtractionError as e:
+            print(f"⚠️ {e}")
+            product_name = None
         
         print("\n" + "=" * 60)
         if product_name:
@@ -411,6 +1231,8 @@ def alternative_usage():
             print(f"Product Name: {product_name}")
         else:
             print("Could not extract product name")
+    except TransientExtractionError as e:
+        print(f"Could not extract product name: {e}")
     finally:
         extractor.close_driver()  # Important: Always close the driver
 
@@ -1,39 +1,63 @@
 import json
 import os
 import re
+import sys
 from typing import Dict, Optional, List
 from dotenv import load_dotenv
 
+# Make sibling ocr modules and shared ML-Backend modules importable from any working directory
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, os.pardir))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+if CURRENT_DIR not in sys.path:
+    sys.path.append(CURRENT_DIR)
+
 # Import your existing classes
-from url import ProductNameExtractor  # Your URL extraction module
+from url import ExtractorPool, ProductNameExtractor  # Your URL extraction module
 from product_matching import CosmeticsSearcher  # Your product matching module
+from rate_limit import DEFAULT_ITEM_TIMEOUT, DEFAULT_MAX_WORKERS, map_ordered
 
 load_dotenv()
 
 class EnhancedIntegratedProductPipeline:
-    def __init__(self, csv_file_path: str, tavily_api_key: str = None):
+    def __init__(self, csv_file_path: str, tavily_api_key: str = None,
+                 extractor_pool: ExtractorPool = None):
         """
         Initialize the enhanced integrated pipeline
         
         Args:
             csv_file_path: Path to the cosmetics CSV file
             tavily_api_key: API key for Tavily search (optional)
+            extractor_pool: Shared browser pool for name extraction (optional;
+                without one each URL starts its own browser if it needs one)
         """
         self.csv_file_path = csv_file_path
         self.tavily_api_key = tavily_api_key or os.getenv('TAVILY_API_KEY')
+        self.extractor_pool = extractor_pool
         
         # Initialize the cosmetics searcher with enhanced ingredient extraction
         self.cosmetics_searcher = EnhancedCosmeticsSearcher(csv_file_path, self.tavily_api_key)
     
+    def _extract_product_name(self, product_url: str, extractor_pool: ExtractorPool = None) -> Optional[str]:
+        """Extract a product name with a pooled browser, or a one-off browser without a pool"""
+        pool = extractor_pool or self.extractor_pool
+        if pool is not None:
+            return pool.extract_product_name(product_url, method='both')
+        with ProductNameExtractor(headless=True) as extractor:
+            return extractor.extract_product_name(product_url, method='both')
+
     def process_url_to_product_details(self, 
                                      product_url: str,
-                                     additional_info: Dict = None) -> Dict:
+                                     additional_info: Dict = None,
+                                     extractor_pool: ExtractorPool = None) -> Dict:
         """
         Enhanced pipeline: URL -> Product Name -> Product Details with guaranteed ingredients
         
         Args:
             product_url: The product URL to extract name from
             additional_info: Additional product information (optional)
+            extractor_pool: Browser pool to use instead of the pipeline's own (optional)
         
         Returns:
             Dictionary with complete product information including guaranteed ingredients
@@ -42,8 +66,7 @@ class EnhancedIntegratedProductPipeline:
             # Step 1: Extract product name from URL
             print(f"Extracting product name from URL: {product_url}")
             
-            with ProductNameExtractor(headless=True) as extractor:
-                product_name = extractor.extract_product_name(product_url, method='both')
+            product_name = self._extract_product_name(product_url, extractor_pool)
             
             if not product_name:
                 return {
@@ -370,28 +393,66 @@ class EnhancedIntegratedProductPipeline:
         
         return 'Unknown'
 
-    def batch_process_urls(self, urls_with_info: list) -> list:
+    def batch_process_urls(self, urls_with_info: list,
+                           max_workers: int = DEFAULT_MAX_WORKERS,
+                           item_timeout: float = DEFAULT_ITEM_TIMEOUT) -> list:
         """
-        Process multiple URLs at once
+        Process multiple URLs concurrently
+
+        Page fetches are throttled per domain and Tavily calls by its shared
+        rate limiter, so more workers never exceed the upstream limits. URLs
+        that need a browser share the pipeline's extractor pool; without one,
+        a pool of at most max_workers browsers is started on demand for the
+        batch and closed afterwards.
+
+        Args:
+            urls_with_info: URL strings or dicts with a 'url' key plus additional info
+            max_workers: Maximum number of URLs processed at once
+            item_timeout: Seconds allowed per URL
+
+        Returns:
+            Results in the same order as the input
         """
-        results = []
-        
-        for item in urls_with_info:
+        pool = self.extractor_pool
+        owns_pool = pool is None
+        if owns_pool:
+            pool = ExtractorPool(size=max_workers, headless=True, prewarm=False)
+
+        def process(item):
             if isinstance(item, str):
-                result = self.process_url_to_product_details(item)
+                return self.process_url_to_product_details(item, extractor_pool=pool)
             elif isinstance(item, dict) and 'url' in item:
-                url = item.pop('url')
-                additional_info = item
-                result = self.process_url_to_product_details(url, additional_info)
-            else:
-                result = {
-                    "error": "Invalid input format",
+                additional_info = dict(item)
+                url = additional_info.pop('url')
+                return self.process_url_to_product_details(url, additional_info, extractor_pool=pool)
+            return {
+                "error": "Invalid input format",
+                "success": False
+            }
+
+        def url_of(item):
+            return item.get('url') if isinstance(item, dict) else item
+
+        try:
+            return map_ordered(
+                process,
+                urls_with_info,
+                max_workers=max_workers,
+                item_timeout=item_timeout,
+                on_timeout=lambda item: {
+                    "error": f"Timed out after {item_timeout}s",
+                    "url": url_of(item),
+                    "success": False
+                },
+                on_error=lambda item, e: {
+                    "error": f"Pipeline error: {str(e)}",
+                    "url": url_of(item),
                     "success": False
                 }
-            
-            results.append(result)
-        
-        return results
+            )
+        finally:
+            if owns_pool:
+                pool.close()
 
 
 class EnhancedCosmeticsSearcher(CosmeticsSearcher):
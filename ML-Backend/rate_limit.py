@@ -0,0 +1,200 @@
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+# Defaults for batch processing helpers
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_ITEM_TIMEOUT = 120.0
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter.
+
+    Tokens refill continuously at `rate` per second up to `capacity`; each
+    call to an upstream service takes one. Callers block until a token is
+    available, so concurrent workers together never exceed the rate.
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        """
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum burst size (defaults to max(1, rate))
+        """
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity is not None else max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._stats = {'acquired': 0, 'rejected': 0, 'waited_seconds': 0.0}
+
+    def _refill(self, now: float):
+        """Add tokens earned since the last update (caller holds the lock)"""
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1.0, timeout: float = None) -> bool:
+        """
+        Take tokens, waiting for them to refill if needed
+
+        Args:
+            tokens: Number of tokens to take
+            timeout: Maximum seconds to wait (None waits as long as needed)
+
+        Returns:
+            True if the tokens were taken, False if the timeout would be exceeded
+        """
+        start = time.monotonic()
+        deadline = None if timeout is None else start + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    self._stats['acquired'] += 1
+                    self._stats['waited_seconds'] += now - start
+                    return True
+                wait = (tokens - self._tokens) / self.rate
+                if deadline is not None and now + wait > deadline:
+                    self._stats['rejected'] += 1
+                    return False
+            time.sleep(wait)
+
+    def stats(self) -> Dict:
+        """Acquire/reject counters and the configured rate"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['waited_seconds'] = round(stats['waited_seconds'], 3)
+        stats['rate_per_second'] = self.rate
+        stats['capacity'] = self.capacity
+        return stats
+
+
+_limiters: Dict[str, TokenBucket] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(name: str, rate: float, capacity: float = None) -> TokenBucket:
+    """
+    Process-wide rate limiter for an upstream service
+
+    Args:
+        name: Upstream name (e.g. 'upcitemdb', 'tavily')
+        rate: Requests per second allowed
+        capacity: Maximum burst size
+
+    Returns:
+        Shared TokenBucket (the first caller's rate and capacity win)
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            limiter = TokenBucket(rate, capacity)
+            _limiters[name] = limiter
+        return limiter
+
+
+def all_rate_limiter_stats() -> Dict[str, Dict]:
+    """Stats for every rate limiter created in this process"""
+    with _limiters_lock:
+        limiters = dict(_limiters)
+    return {name: limiter.stats() for name, limiter in limiters.items()}
+
+
+class _OrderedItem:
+    """One map_ordered item: its outcome and the worker slot it holds"""
+
+    def __init__(self, slots: threading.Semaphore):
+        self._slots = slots
+        self._slot_lock = threading.Lock()
+        self._holds_slot = True
+        self.started = threading.Event()
+        self.started_at = 0.0
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[Exception] = None
+
+    def release_slot(self):
+        """Give the worker slot back (once), on completion or when the item is abandoned"""
+        with self._slot_lock:
+            if not self._holds_slot:
+                return
+            self._holds_slot = False
+        self._slots.release()
+
+
+def map_ordered(fn: Callable[[Any], Any], items: List[Any],
+                max_workers: int = DEFAULT_MAX_WORKERS,
+                item_timeout: Optional[float] = DEFAULT_ITEM_TIMEOUT,
+                on_timeout: Callable[[Any], Any] = None,
+                on_error: Callable[[Any, Exception], Any] = None) -> List[Any]:
+    """
+    Apply fn to every item on at most max_workers threads, keeping input order
+
+    An item's timeout starts when a worker picks it up, so items waiting in
+    the queue (or on a rate limiter held by other items) are not penalised.
+    A timed-out item's thread cannot be interrupted; it finishes in the
+    background and its result is discarded, but its worker slot is handed
+    to the next item at once, so hung calls never stall the items behind
+    them.
+
+    Args:
+        fn: Function applied to each item
+        items: Inputs
+        max_workers: Maximum number of items processed at once
+        item_timeout: Seconds allowed per item (None for no limit)
+        on_timeout: Builds the result for a timed-out item (default: None)
+        on_error: Builds the result for an item whose fn raised (default: re-raise)
+
+    Returns:
+        Results in the same order as items
+    """
+    if not items:
+        return []
+
+    slots = threading.Semaphore(max(1, min(max_workers, len(items))))
+    states = [_OrderedItem(slots) for _ in items]
+    stopped = threading.Event()
+
+    def run(state: _OrderedItem, item: Any):
+        try:
+            state.result = fn(item)
+        except Exception as e:
+            state.error = e
+        finally:
+            state.done.set()
+            state.release_slot()
+
+    def dispatch():
+        for state, item in zip(states, items):
+            slots.acquire()
+            if stopped.is_set():
+                slots.release()
+                return
+            state.started_at = time.monotonic()
+            state.started.set()
+            # Daemon threads: a hung call must not keep the process alive
+            threading.Thread(target=run, args=(state, item), daemon=True).start()
+
+    threading.Thread(target=dispatch, daemon=True, name='map_ordered-dispatch').start()
+    try:
+        results = []
+        for state, item in zip(states, items):
+            state.started.wait()
+            remaining = None if item_timeout is None else max(state.started_at + item_timeout - time.monotonic(), 0)
+            if not state.done.wait(remaining):
+                state.release_slot()  # Abandon the call; let the next item run
+                results.append(on_timeout(item) if on_timeout else None)
+                continue
+            if state.error is not None:
+                if on_error is None:
+                    raise state.error
+                results.append(on_error(item, state.error))
+            else:
+                results.append(state.result)
+        return results
+    finally:
+        # Items not started yet are never run (e.g. after an error was re-raised)
+        stopped.set()